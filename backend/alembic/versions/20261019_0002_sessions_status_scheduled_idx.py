@@ -0,0 +1,34 @@
+"""index study_sessions on (status, scheduled_at, id)
+
+Revision ID: 20261019_0002
+Revises: 20260217_0001
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = '20261019_0002'
+down_revision = '20260217_0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Built concurrently so large session tables stay writable during the migration.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_study_sessions_status_scheduled_at',
+            'study_sessions',
+            ['status', 'scheduled_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_study_sessions_status_scheduled_at',
+            table_name='study_sessions',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,36 @@
+"""user_stats materialization
+
+Revision ID: 20261019_0003
+Revises: 20261019_0002
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision = '20261019_0003'
+down_revision = '20261019_0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_stats',
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('current_streak', sa.Integer(), nullable=False),
+        sa.Column('longest_streak', sa.Integer(), nullable=False),
+        sa.Column('last_done_date', sa.Date(), nullable=True),
+        sa.Column('last_done_day_sessions', sa.Integer(), nullable=False),
+        sa.Column('focus_minutes_total', sa.Integer(), nullable=False),
+        sa.Column('topic_minutes', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_stats')
@@ -0,0 +1,33 @@
+"""ai_jobs priority and dispatch tracking
+
+Revision ID: 20261019_0004
+Revises: 20261019_0003
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = '20261019_0004'
+down_revision = '20261019_0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'ai_jobs', sa.Column('priority', sa.Integer(), nullable=False, server_default='0')
+    )
+    op.add_column('ai_jobs', sa.Column('dispatched_at', sa.DateTime(timezone=True), nullable=True))
+    # Jobs created before this revision were sent to Celery directly.
+    op.execute('UPDATE ai_jobs SET dispatched_at = created_at')
+    op.create_index(
+        'ix_ai_jobs_status_dispatched_at', 'ai_jobs', ['status', 'dispatched_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ai_jobs_status_dispatched_at', table_name='ai_jobs')
+    op.drop_column('ai_jobs', 'dispatched_at')
+    op.drop_column('ai_jobs', 'priority')
@@ -0,0 +1,168 @@
+"""per-user change sequence and tombstones for /sync
+
+Revision ID: 20261019_0005
+Revises: 20261019_0004
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = '20261019_0005'
+down_revision = '20261019_0004'
+branch_labels = None
+depends_on = None
+
+_SYNCED_TABLES = (('study_plans', 'plan'), ('study_sessions', 'session'))
+
+# Existing rows get sequence numbers in creation order, so a first sync can page
+# through them like any other change.
+_NUMBERED = """
+    WITH numbered AS (
+        SELECT kind, id,
+               ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY created_at, kind, id) AS seq
+        FROM (
+            SELECT 'plan' AS kind, id, user_id, created_at FROM study_plans
+            UNION ALL
+            SELECT 'session' AS kind, id, user_id, created_at FROM study_sessions
+        ) AS changes
+    )
+"""
+
+# Every insert/update takes the next value of the owner's counter. The counter
+# row stays locked until commit, so one user's sequence numbers become visible
+# in order and a cursor can never skip a change that commits late.
+_STAMP_FUNCTION = """
+    CREATE FUNCTION sync_stamp_change() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE users SET change_seq = change_seq + 1 WHERE id = NEW.user_id
+        RETURNING change_seq INTO NEW.change_seq;
+        NEW.updated_at := now();
+        RETURN NEW;
+    END;
+    $$
+"""
+
+_DELETE_FUNCTION = """
+    CREATE FUNCTION sync_record_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        seq bigint;
+    BEGIN
+        UPDATE users SET change_seq = change_seq + 1 WHERE id = OLD.user_id
+        RETURNING change_seq INTO seq;
+        -- No counter row means the user itself is being deleted.
+        IF seq IS NOT NULL THEN
+            INSERT INTO sync_tombstones (user_id, change_seq, entity, entity_id, deleted_at)
+            VALUES (OLD.user_id, seq, TG_ARGV[0], OLD.id, now());
+        END IF;
+        RETURN OLD;
+    END;
+    $$
+"""
+
+
+def upgrade() -> None:
+    for column in ('change_seq', 'sync_floor'):
+        op.add_column(
+            'users', sa.Column(column, sa.BigInteger(), nullable=False, server_default='0')
+        )
+    for table, _entity in _SYNCED_TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                'updated_at',
+                sa.DateTime(timezone=True),
+                nullable=False,
+                server_default=sa.func.now(),
+            ),
+        )
+        op.add_column(
+            table, sa.Column('change_seq', sa.BigInteger(), nullable=False, server_default='0')
+        )
+
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('change_seq', sa.BigInteger(), nullable=False),
+        sa.Column('entity', sa.String(length=16), nullable=False),
+        sa.Column('entity_id', sa.String(length=36), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'change_seq'),
+    )
+    op.create_index(
+        'ix_sync_tombstones_deleted_at', 'sync_tombstones', ['deleted_at'], unique=False
+    )
+
+    for table, entity in _SYNCED_TABLES:
+        op.execute(f'UPDATE {table} SET updated_at = created_at')
+        op.execute(
+            f"""
+            {_NUMBERED}
+            UPDATE {table} SET change_seq = numbered.seq
+            FROM numbered
+            WHERE numbered.kind = '{entity}' AND numbered.id = {table}.id
+            """
+        )
+    op.execute(
+        """
+        UPDATE users SET change_seq = counts.total
+        FROM (
+            SELECT user_id, COUNT(*) AS total
+            FROM (
+                SELECT user_id FROM study_plans
+                UNION ALL
+                SELECT user_id FROM study_sessions
+            ) AS changes
+            GROUP BY user_id
+        ) AS counts
+        WHERE counts.user_id = users.id
+        """
+    )
+
+    op.create_index(
+        'ix_study_plans_user_id_change_seq', 'study_plans', ['user_id', 'change_seq'], unique=False
+    )
+    op.create_index(
+        'ix_study_sessions_user_id_change_seq',
+        'study_sessions',
+        ['user_id', 'change_seq'],
+        unique=False,
+    )
+
+    op.execute(_STAMP_FUNCTION)
+    op.execute(_DELETE_FUNCTION)
+    for table, entity in _SYNCED_TABLES:
+        op.execute(
+            f'CREATE TRIGGER {table}_sync_insert BEFORE INSERT ON {table} '
+            'FOR EACH ROW EXECUTE FUNCTION sync_stamp_change()'
+        )
+        # No-op updates keep their sequence number.
+        op.execute(
+            f'CREATE TRIGGER {table}_sync_update BEFORE UPDATE ON {table} '
+            'FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION sync_stamp_change()'
+        )
+        op.execute(
+            f'CREATE TRIGGER {table}_sync_delete AFTER DELETE ON {table} '
+            f"FOR EACH ROW EXECUTE FUNCTION sync_record_delete('{entity}')"
+        )
+
+
+def downgrade() -> None:
+    for table, _entity in _SYNCED_TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_sync_delete ON {table}')
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_sync_update ON {table}')
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_sync_insert ON {table}')
+    op.execute('DROP FUNCTION IF EXISTS sync_record_delete()')
+    op.execute('DROP FUNCTION IF EXISTS sync_stamp_change()')
+
+    op.drop_index('ix_study_sessions_user_id_change_seq', table_name='study_sessions')
+    op.drop_index('ix_study_plans_user_id_change_seq', table_name='study_plans')
+    op.drop_index('ix_sync_tombstones_deleted_at', table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+    for table, _entity in _SYNCED_TABLES:
+        op.drop_column(table, 'change_seq')
+        op.drop_column(table, 'updated_at')
+    op.drop_column('users', 'sync_floor')
+    op.drop_column('users', 'change_seq')
@@ -0,0 +1,37 @@
+"""transactional outbox
+
+Revision ID: 20261019_0006
+Revises: 20261019_0005
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = '20261019_0006'
+down_revision = '20261019_0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outbox_events',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('topic', sa.String(length=64), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('available_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_outbox_events_available_at', 'outbox_events', ['available_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_events_available_at', table_name='outbox_events')
+    op.drop_table('outbox_events')
@@ -0,0 +1,131 @@
+"""monthly partitions for ai_jobs and compressed archive
+
+Revision ID: 20261019_0007
+Revises: 20261019_0006
+Create Date: 2026-10-19
+"""
+
+from datetime import UTC, date, datetime, timedelta
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = '20261019_0007'
+down_revision = '20261019_0006'
+branch_labels = None
+depends_on = None
+
+_COLUMNS = (
+    'id, user_id, goal, topic, status, priority, dispatched_at, result_text, error, '
+    'created_at, updated_at'
+)
+# Months created ahead of time; `archive_ai_jobs_task` keeps extending this.
+_MONTHS_AHEAD = 2
+
+
+def _next_month(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _job_columns() -> list[sa.Column]:
+    return [
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('goal', sa.String(length=180), nullable=False),
+        sa.Column('topic', sa.String(length=120), nullable=False),
+        sa.Column('status', sa.String(length=24), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('dispatched_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('result_text', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    ]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text('SELECT min(created_at) FROM ai_jobs')).scalar()
+    newest = bind.execute(sa.text('SELECT max(created_at) FROM ai_jobs')).scalar()
+    today = datetime.now(UTC).date()
+    first = (oldest.astimezone(UTC).date() if oldest else today).replace(day=1)
+    last = max(newest.astimezone(UTC).date() if newest else today, today).replace(day=1)
+    for _ in range(_MONTHS_AHEAD):
+        last = _next_month(last)
+
+    # The partition key has to be part of every unique constraint, so the
+    # database no longer rejects a duplicate id on its own: ids are uuid4 from
+    # the application, and ai_jobs_archive keeps id as its primary key.
+    op.create_table(
+        'ai_jobs_partitioned',
+        *_job_columns(),
+        sa.PrimaryKeyConstraint('id', 'created_at', name='ai_jobs_partitioned_pkey'),
+        postgresql_partition_by='RANGE (created_at)',
+    )
+    month = first
+    while month <= last:
+        upper = _next_month(month)
+        op.execute(
+            f'CREATE TABLE ai_jobs_p{month:%Y%m} PARTITION OF ai_jobs_partitioned '
+            f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{upper} 00:00:00+00')"
+        )
+        month = upper
+    # Safety net if the nightly task has not created a month yet.
+    op.execute('CREATE TABLE ai_jobs_default PARTITION OF ai_jobs_partitioned DEFAULT')
+
+    op.execute(f'INSERT INTO ai_jobs_partitioned ({_COLUMNS}) SELECT {_COLUMNS} FROM ai_jobs')
+    op.drop_table('ai_jobs')
+    op.rename_table('ai_jobs_partitioned', 'ai_jobs')
+    op.execute('ALTER TABLE ai_jobs RENAME CONSTRAINT ai_jobs_partitioned_pkey TO ai_jobs_pkey')
+
+    op.create_index(
+        'ix_ai_jobs_user_id_created_at', 'ai_jobs', ['user_id', 'created_at'], unique=False
+    )
+    op.create_index(
+        'ix_ai_jobs_status_dispatched_at',
+        'ai_jobs',
+        ['status', 'dispatched_at'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+    op.create_index('ix_ai_jobs_updated_at', 'ai_jobs', ['updated_at'], unique=False)
+
+    op.create_table(
+        'ai_jobs_archive',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.Column('goal', sa.String(length=180), nullable=False),
+        sa.Column('topic', sa.String(length=120), nullable=False),
+        sa.Column('status', sa.String(length=24), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False),
+        sa.Column('result_codec', sa.String(length=8), nullable=True),
+        sa.Column('result_compressed', sa.LargeBinary(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_ai_jobs_archive_user_id', 'ai_jobs_archive', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    # Archived jobs are not moved back: their results are compressed outside SQL.
+    op.drop_index('ix_ai_jobs_archive_user_id', table_name='ai_jobs_archive')
+    op.drop_table('ai_jobs_archive')
+
+    op.create_table(
+        'ai_jobs_plain', *_job_columns(), sa.PrimaryKeyConstraint('id', name='ai_jobs_plain_pkey')
+    )
+    op.execute(f'INSERT INTO ai_jobs_plain ({_COLUMNS}) SELECT {_COLUMNS} FROM ai_jobs')
+    op.drop_table('ai_jobs')
+    op.rename_table('ai_jobs_plain', 'ai_jobs')
+    op.execute('ALTER TABLE ai_jobs RENAME CONSTRAINT ai_jobs_plain_pkey TO ai_jobs_pkey')
+    op.create_index('ix_ai_jobs_user_id', 'ai_jobs', ['user_id'], unique=False)
+    op.create_index('ix_ai_jobs_status', 'ai_jobs', ['status'], unique=False)
+    op.create_index(
+        'ix_ai_jobs_status_dispatched_at', 'ai_jobs', ['status', 'dispatched_at'], unique=False
+    )
@@ -0,0 +1,41 @@
+"""plan library with pgvector HNSW index
+
+Revision ID: 20261019_0008
+Revises: 20261019_0007
+Create Date: 2026-10-19
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = '20261019_0008'
+down_revision = '20261019_0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS vector')
+    op.create_table(
+        'plan_library',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('goal', sa.String(length=180), nullable=False),
+        sa.Column('topic', sa.String(length=120), nullable=False),
+        sa.Column('plan', sa.JSON(), nullable=False),
+        sa.Column('source_job_id', sa.String(length=36), nullable=True),
+        sa.Column('hits', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute('ALTER TABLE plan_library ADD COLUMN embedding vector(256) NOT NULL')
+    op.execute(
+        'CREATE INDEX ix_plan_library_embedding ON plan_library '
+        'USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_plan_library_embedding', table_name='plan_library')
+    op.drop_table('plan_library')
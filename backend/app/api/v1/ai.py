@@ -1,19 +1,42 @@
 from __future__ import annotations
 
+import json
+import logging
 import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import UTC, datetime, time, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from redis.exceptions import RedisError
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.core.dependencies import get_current_user, get_db
+from app.core import metrics
+from app.core.config import settings
+from app.core.dependencies import get_current_user, get_db, get_read_db, get_read_user
+from app.core.idempotency import IDEMPOTENCY_HEADER, idempotent
+from app.core.profiling import ProfiledRoute
+from app.core.rate_limit import rate_limit
+from app.core.redis import get_redis
 from app.db.models import AiJob, StudyPlan, User
 from app.schemas.ai import AiWeeklyStatusResponse, GeneratePlanRequest, JobResponse
+from app.services.ai_dispatcher import (
+    PRIORITY_INTERACTIVE,
+    estimate_wait_seconds,
+    live_job_filter,
+    queue_position,
+)
+from app.services.ai_job_archive import decompress_result, get_archived_job
 from app.services.ai_plan_formatter import normalize_ai_plan
-from app.workers.tasks.ai_tasks import enqueue_generate_plan
+from app.services.dashboard_cache import invalidate_dashboard_summary
+from app.services.outbox import AI_DISPATCH, add_event
+from app.services.template_planner import build_template_plan_for_user
+from app.services.weekly_plan import persist_weekly_plan
 
-router = APIRouter(prefix='/ai', tags=['ai'])
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix='/ai', tags=['ai'], route_class=ProfiledRoute)
 
 
 def _current_week_bounds() -> tuple[datetime, datetime]:
@@ -24,17 +47,67 @@ def _current_week_bounds() -> tuple[datetime, datetime]:
     return week_start, week_end
 
 
-@router.post('/plans/generate', response_model=JobResponse)
+@router.post(
+    '/plans/generate',
+    dependencies=[Depends(rate_limit('ai'))],
+    response_model=JobResponse,
+)
 def generate_plan(
     payload: GeneratePlanRequest,
+    idempotency_key: str | None = Header(default=None, alias=IDEMPOTENCY_HEADER, max_length=255),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> JobResponse:
+) -> JobResponse | Response:
+    with idempotent(idempotency_key, current_user.id, 'ai.generate', payload) as claim:
+        if claim.replay:
+            return claim.replay
+        with _user_generate_lock(current_user.id):
+            return claim.remember(_create_generation_job(db, current_user.id, payload))
+
+
+@contextmanager
+def _user_generate_lock(user_id: str) -> Iterator[None]:
+    # Serializes the in-flight check and job insert per user, so two concurrent
+    # retries cannot both enqueue. If the lock is unavailable the DB check alone applies.
+    lock = get_redis().lock(f'ai:generate:{user_id}', timeout=10, blocking_timeout=5)
+    try:
+        acquired = lock.acquire()
+    except RedisError as exc:
+        logger.warning('AI generate lock unavailable user_id=%s: %s', user_id, exc)
+        acquired = False
+    try:
+        yield
+    finally:
+        if acquired:
+            try:
+                lock.release()
+            except RedisError:
+                pass
+
+
+def _in_flight_job(
+    db: Session, user_id: str, week_start: datetime, week_end: datetime, now: datetime
+) -> AiJob | None:
+    # Jobs whose message was lost or that ran out of time are left to the
+    # dispatch sweep; they must not keep the user from asking again.
+    return db.scalar(
+        select(AiJob)
+        .where(
+            AiJob.user_id == user_id,
+            live_job_filter(now),
+            AiJob.created_at >= week_start,
+            AiJob.created_at < week_end,
+        )
+        .order_by(AiJob.created_at.desc())
+    )
+
+
+def _create_generation_job(db: Session, user_id: str, payload: GeneratePlanRequest) -> JobResponse:
     week_start, week_end = _current_week_bounds()
 
     existing_week_plan = db.scalar(
         select(StudyPlan.id).where(
-            StudyPlan.user_id == current_user.id,
+            StudyPlan.user_id == user_id,
             StudyPlan.created_at >= week_start,
             StudyPlan.created_at < week_end,
         )
@@ -45,32 +118,91 @@ def generate_plan(
             detail='Weekly planner already set. You can generate a new AI plan next week.',
         )
 
+    # A job for this week that is still queued or running will produce the plan;
+    # hand it back instead of paying for a second generation.
+    in_flight = _in_flight_job(db, user_id, week_start, week_end, datetime.now(UTC))
+    if in_flight:
+        metrics.increment('ai.generate.deduplicated')
+        logger.info('AI job already in flight job_id=%s', in_flight.id)
+        return JobResponse(job_id=in_flight.id, status=in_flight.status)
+
+    if settings.ai_plan_mode == 'template':
+        return _create_template_plan(db, user_id, payload)
+
+    # Deferred: ai_service brings httpx and the Ollama client, only needed here.
+    from app.services.ai_service import ollama_breaker
+
+    retry_after = 0.0 if settings.ai_template_fallback_enabled else ollama_breaker.retry_after()
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='AI planner is temporarily unavailable. Please try again shortly.',
+            headers={'Retry-After': str(int(retry_after) + 1)},
+        )
+
     job_id = str(uuid.uuid4())
 
     db.add(
         AiJob(
             id=job_id,
-            user_id=current_user.id,
+            user_id=user_id,
             goal=payload.goal,
             topic=payload.topic,
             status='queued',
+            priority=PRIORITY_INTERACTIVE,
         )
     )
+    # The outbox relay runs the dispatcher, so the request never waits on the broker.
+    add_event(db, AI_DISPATCH, {'job_id': job_id})
     db.commit()
-
-    enqueue_generate_plan(job_id=job_id, goal=payload.goal, topic=payload.topic)
+    logger.info('AI job queued job_id=%s', job_id)
     return JobResponse(job_id=job_id, status='queued')
 
 
-@router.get('/plans/status/weekly', response_model=AiWeeklyStatusResponse)
+def _create_template_plan(db: Session, user_id: str, payload: GeneratePlanRequest) -> JobResponse:
+    # Template plans cost milliseconds of CPU: build and persist them in the
+    # request. The completed job row is what `GET /jobs/{id}` and the weekly
+    # status read; nothing is queued.
+    result = json.dumps(build_template_plan_for_user(db, user_id, payload.goal, payload.topic))
+    structured = normalize_ai_plan(result, goal=payload.goal, topic=payload.topic)
+    persist_weekly_plan(db, user_id, payload.topic, structured)
+    job_id = str(uuid.uuid4())
+    db.add(
+        AiJob(
+            id=job_id,
+            user_id=user_id,
+            goal=payload.goal,
+            topic=payload.topic,
+            status='completed',
+            priority=PRIORITY_INTERACTIVE,
+            result_text=result,
+        )
+    )
+    db.commit()
+    invalidate_dashboard_summary(user_id)
+    metrics.increment('ai.generate.template')
+    return JobResponse(
+        job_id=job_id, status='completed', result=result, result_structured=structured
+    )
+
+
+@router.get(
+    '/plans/status/weekly',
+    dependencies=[Depends(rate_limit('reads'))],
+    response_model=AiWeeklyStatusResponse,
+)
 def weekly_status(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
 ) -> AiWeeklyStatusResponse:
+    return weekly_status_response(db, current_user.id)
+
+
+def weekly_status_response(db: Session, user_id: str) -> AiWeeklyStatusResponse:
     week_start, week_end = _current_week_bounds()
     has_generated = db.scalar(
         select(AiJob.id).where(
-            AiJob.user_id == current_user.id,
+            AiJob.user_id == user_id,
             AiJob.status == 'completed',
             AiJob.created_at >= week_start,
             AiJob.created_at < week_end,
@@ -79,23 +211,55 @@ def weekly_status(
     return AiWeeklyStatusResponse(has_generated_this_week=bool(has_generated))
 
 
-@router.get('/jobs/{job_id}', response_model=JobResponse)
+@router.get(
+    '/jobs/{job_id}',
+    dependencies=[Depends(rate_limit('reads'))],
+    response_model=JobResponse,
+)
 def get_job(
     job_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
 ) -> JobResponse:
     job = db.scalar(select(AiJob).where(AiJob.id == job_id, AiJob.user_id == current_user.id))
     if not job:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Job not found')
+        return _archived_job_response(db, current_user.id, job_id)
 
     structured = None
+    placeholder = False
     if job.status == 'completed':
         structured = normalize_ai_plan(job.result_text or '', goal=job.goal, topic=job.topic)
+    elif job.status in {'queued', 'running'} and settings.ai_template_placeholder_enabled:
+        # Instant template preview while the model works; replaced once the job completes.
+        structured = build_template_plan_for_user(db, current_user.id, job.goal, job.topic)
+        placeholder = True
+
+    position = None
+    eta_seconds = None
+    if job.status == 'queued' and job.dispatched_at is None:
+        position = queue_position(db, job.id)
+        eta_seconds = estimate_wait_seconds(db, position) if position else None
 
     return JobResponse(
         job_id=job.id,
         status=job.status,
         result=job.result_text,
         result_structured=structured,
+        placeholder=placeholder,
+        queue_position=position,
+        eta_seconds=eta_seconds,
+    )
+
+
+def _archived_job_response(db: Session, user_id: str, job_id: str) -> JobResponse:
+    # Jobs older than AI_JOBS_RETENTION_DAYS only exist in the archive.
+    archived = get_archived_job(db, user_id, job_id)
+    if not archived:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Job not found')
+    result = decompress_result(archived.result_codec, archived.result_compressed)
+    structured = None
+    if archived.status == 'completed':
+        structured = normalize_ai_plan(result or '', goal=archived.goal, topic=archived.topic)
+    return JobResponse(
+        job_id=archived.id, status=archived.status, result=result, result_structured=structured
     )
@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from datetime import UTC, datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.dependencies import get_db
+from app.core.profiling import ProfiledRoute
+from app.core.rate_limit import enforce_login_rate_limit, rate_limit
 from app.core.security import create_access_token, create_refresh_token, hash_password, verify_password
 from app.db.models import RefreshToken, User
 from app.schemas.auth import (
@@ -17,10 +19,10 @@ from app.schemas.auth import (
     TokenResponse,
 )
 
-router = APIRouter(prefix='/auth', tags=['auth'])
+router = APIRouter(prefix='/auth', tags=['auth'], route_class=ProfiledRoute)
 
 
-@router.post('/register', response_model=TokenResponse)
+@router.post('/register', dependencies=[Depends(rate_limit('auth'))], response_model=TokenResponse)
 def register(payload: RegisterRequest, db: Session = Depends(get_db)) -> TokenResponse:
     exists = db.scalar(select(User).where(User.email == payload.email))
     if exists:
@@ -44,7 +46,8 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)) -> TokenRe
 
 
 @router.post('/login', response_model=TokenResponse)
-def login(payload: LoginRequest, db: Session = Depends(get_db)) -> TokenResponse:
+def login(payload: LoginRequest, request: Request, db: Session = Depends(get_db)) -> TokenResponse:
+    enforce_login_rate_limit(request, payload.email)
     user = db.scalar(select(User).where(User.email == payload.email))
     if not user or not verify_password(payload.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid credentials')
@@ -62,7 +65,7 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)) -> TokenResponse
     return TokenResponse(access_token=create_access_token(user.id), refresh_token=refresh_value)
 
 
-@router.post('/refresh', response_model=TokenResponse)
+@router.post('/refresh', dependencies=[Depends(rate_limit('auth'))], response_model=TokenResponse)
 def refresh(payload: RefreshRequest, db: Session = Depends(get_db)) -> TokenResponse:
     now = datetime.now(UTC)
     record = db.scalar(select(RefreshToken).where(RefreshToken.token == payload.refresh_token))
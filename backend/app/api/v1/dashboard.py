@@ -1,18 +1,26 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from datetime import UTC, date, datetime, timedelta
+from datetime import UTC, date, datetime, time, timedelta
 from typing import Literal
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
 
-from app.core.dependencies import get_current_user, get_db
-from app.db.models import StudySession, User
+from app.core.dependencies import get_read_db, get_read_user
+from app.core.profiling import ProfiledRoute
+from app.core.rate_limit import rate_limit
+from app.core.wire_format import negotiated_response
+from app.db.models import StudySession, User, UserStats
 from app.schemas.dashboard import DashboardSummaryResponse
+from app.services.dashboard_cache import get_or_compute_summary
+from app.services.user_stats import visible_streak
 
-router = APIRouter(prefix='/dashboard', tags=['dashboard'])
+router = APIRouter(prefix='/dashboard', tags=['dashboard'], route_class=ProfiledRoute)
+
+# Oldest day any summary figure looks at (the 30d progress buckets reach back 31 days).
+_LOOKBACK_DAYS = 31
 
 
 def _session_schedule_day(item: StudySession) -> date:
@@ -27,6 +35,18 @@ def _session_done_day(item: StudySession) -> date | None:
     return item.completed_at.date()
 
 
+def _done_days_history(db: Session, user_id: str) -> set[date]:
+    # Only used until the nightly job has materialized user_stats for this user.
+    completed = db.scalars(
+        select(StudySession.completed_at).where(
+            StudySession.user_id == user_id,
+            StudySession.status == 'done',
+            StudySession.completed_at.is_not(None),
+        )
+    )
+    return {item.date() for item in completed if item}
+
+
 def _compute_streak(done_days: set[date], today: date) -> int:
     streak = 0
     cursor = today
@@ -36,25 +56,53 @@ def _compute_streak(done_days: set[date], today: date) -> int:
     return streak
 
 
-@router.get('/summary', response_model=DashboardSummaryResponse)
+@router.get(
+    '/summary',
+    dependencies=[Depends(rate_limit('reads'))],
+    response_model=DashboardSummaryResponse,
+)
 def summary(
+    request: Request,
     range_key: Literal['7d', '30d'] = Query(default='7d', alias='range'),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> DashboardSummaryResponse:
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+) -> Response:
+    return negotiated_response(request, summary_payload(db, current_user.id, range_key))
+
+
+def summary_payload(db: Session, user_id: str, range_key: str) -> bytes:
+    return get_or_compute_summary(
+        user_id, range_key, lambda: _build_summary(db, user_id, range_key)
+    )
+
+
+def _build_summary(db: Session, user_id: str, range_key: str) -> DashboardSummaryResponse:
     today = datetime.now(UTC).date()
     days = 7 if range_key == '7d' else 30
     since = today - timedelta(days=days - 1)
 
-    sessions = db.scalars(select(StudySession).where(StudySession.user_id == current_user.id)).all()
+    lookback = datetime.combine(today - timedelta(days=_LOOKBACK_DAYS), time.min, tzinfo=UTC)
+    sessions = db.scalars(
+        select(StudySession).where(
+            StudySession.user_id == user_id,
+            or_(
+                StudySession.scheduled_at >= lookback,
+                StudySession.completed_at >= lookback,
+                and_(StudySession.scheduled_at.is_(None), StudySession.created_at >= lookback),
+            ),
+        )
+    ).all()
 
     sessions_in_window = [item for item in sessions if _session_schedule_day(item) >= since]
 
     today_total = sum(1 for item in sessions if _session_schedule_day(item) == today)
     today_completed = sum(1 for item in sessions if _session_done_day(item) == today)
 
-    done_days = {_session_done_day(item) for item in sessions if _session_done_day(item)}
-    streak = _compute_streak({item for item in done_days if item}, today)
+    stats = db.scalar(select(UserStats).where(UserStats.user_id == user_id))
+    if stats:
+        streak = visible_streak(stats, today)
+    else:
+        streak = _compute_streak(_done_days_history(db, user_id), today)
 
     completed_by_day: dict[date, int] = defaultdict(int)
     for item in sessions:
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.dependencies import get_current_user, get_db
+from app.core.profiling import ProfiledRoute
+from app.db.models import User
+from app.schemas.exports import ImportResponse
+from app.services.dashboard_cache import invalidate_dashboard_summary
+from app.services.data_export import (
+    DataImportError,
+    NdjsonImporter,
+    iter_sessions_ics,
+    iter_user_ndjson,
+)
+from app.services.streaming import stream_with_session
+
+router = APIRouter(prefix='', tags=['exports'], route_class=ProfiledRoute)
+
+
+@router.get('/sessions/export.ics')
+def export_sessions_ics(current_user: User = Depends(get_current_user)) -> StreamingResponse:
+    user_id = current_user.id
+    return StreamingResponse(
+        stream_with_session(lambda db: iter_sessions_ics(db, user_id)),
+        media_type='text/calendar; charset=utf-8',
+        headers={'Content-Disposition': 'attachment; filename="schediora.ics"'},
+    )
+
+
+@router.get('/export.ndjson')
+def export_ndjson(current_user: User = Depends(get_current_user)) -> StreamingResponse:
+    user_id = current_user.id
+    return StreamingResponse(
+        stream_with_session(lambda db: iter_user_ndjson(db, user_id)),
+        media_type='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename="schediora-export.ndjson"'},
+    )
+
+
+@router.post('/import.ndjson', response_model=ImportResponse)
+async def import_ndjson(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> ImportResponse:
+    # The body is read incrementally and inserted in chunks inside one transaction,
+    # so a bad line rolls back the whole import. The total is capped because that
+    # transaction holds its locks and row versions until the last line.
+    importer = NdjsonImporter(db, current_user.id)
+    buffer = b''
+    pending: list[bytes] = []
+    received = 0
+
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > settings.import_max_bytes:
+                raise _too_large(f'Imports are limited to {settings.import_max_bytes} bytes')
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+            # A chunk can carry whole oversized lines, not just an oversized tail.
+            if any(len(line) > settings.import_max_line_bytes for line in (*lines, buffer)):
+                raise _too_large(
+                    f'Import lines are limited to {settings.import_max_line_bytes} bytes'
+                )
+            pending.extend(lines)
+            if len(pending) >= settings.import_batch_size:
+                await run_in_threadpool(importer.import_lines, pending)
+                pending = []
+
+        pending.append(buffer)
+        await run_in_threadpool(importer.import_lines, pending)
+        result = await run_in_threadpool(importer.finish)
+    except DataImportError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(exc)
+        ) from exc
+
+    invalidate_dashboard_summary(current_user.id)
+    return result
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=detail)
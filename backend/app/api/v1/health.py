@@ -1,6 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-router = APIRouter(prefix='/health', tags=['health'])
+from app.core import metrics
+from app.core.dependencies import require_metrics_token
+from app.core.profiling import ProfiledRoute
+from app.core.redis import get_redis
+
+router = APIRouter(prefix='/health', tags=['health'], route_class=ProfiledRoute)
 
 
 @router.get('/live')
@@ -11,3 +16,15 @@ def live() -> dict[str, str]:
 @router.get('/ready')
 def ready() -> dict[str, str]:
     return {'status': 'ready'}
+
+
+@router.get('/metrics', dependencies=[Depends(require_metrics_token)])
+def metrics_snapshot() -> dict[str, dict]:
+    return metrics.snapshot()
+
+
+@router.get('/metrics/workers', dependencies=[Depends(require_metrics_token)])
+def worker_metrics() -> dict[str, dict]:
+    # Snapshots pushed by Celery children and the outbox relay, keyed by
+    # `<profile>:<host>:<pid>`.
+    return metrics.exported_snapshots(get_redis())
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import UTC, datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy.orm import Session
+
+from app.api.v1.ai import weekly_status_response
+from app.api.v1.dashboard import summary_payload
+from app.api.v1.plans import plan_responses, session_responses
+from app.core.dependencies import get_read_db, get_read_user
+from app.core.profiling import ProfiledRoute
+from app.core.rate_limit import rate_limit
+from app.core.wire_format import negotiated_response, wants_msgpack
+from app.db.models import User
+from app.schemas.dashboard import DashboardSummaryResponse
+from app.schemas.home import HomeResponse
+from app.schemas.users import UserMeResponse
+from app.services.dashboard_cache import summary_version
+
+router = APIRouter(prefix='', tags=['home'], route_class=ProfiledRoute)
+
+
+def _bundle_etag(user_id: str, range_key: str, media: str) -> str | None:
+    # Every mutation that changes the bundle bumps the dashboard version, and the
+    # UTC day covers "today"/streak rollover, so together they version the bundle.
+    version = summary_version(user_id)
+    if version is None:
+        return None
+    key = f'{user_id}:{version}:{datetime.now(UTC).date()}:{range_key}:{media}'
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    candidates = {item.strip() for item in header.split(',')}
+    return '*' in candidates or etag in candidates
+
+
+@router.get(
+    '/home',
+    dependencies=[Depends(rate_limit('reads'))],
+    response_model=HomeResponse,
+)
+def home(
+    request: Request,
+    range_key: Literal['7d', '30d'] = Query(default='7d', alias='range'),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+) -> Response:
+    # Everything the app shows on launch/refresh, with one auth, one user load and
+    # one DB session. The version is read before the data so a concurrent write
+    # can only make the ETag older than the payload, never newer.
+    etag = _bundle_etag(current_user.id, range_key, 'msgpack' if wants_msgpack(request) else 'json')
+    headers = {'Cache-Control': 'private, no-cache', 'Vary': 'Accept'}
+    if etag:
+        headers['ETag'] = etag
+        if _etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    bundle = HomeResponse(
+        user=UserMeResponse(id=current_user.id, email=current_user.email),
+        plans=plan_responses(db, current_user.id),
+        sessions=session_responses(db, current_user.id, 'current'),
+        summary=DashboardSummaryResponse.model_validate_json(
+            summary_payload(db, current_user.id, range_key)
+        ),
+        ai=weekly_status_response(db, current_user.id),
+    )
+    return negotiated_response(request, bundle, headers=headers)
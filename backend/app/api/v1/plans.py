@@ -2,11 +2,17 @@ from __future__ import annotations
 
 from datetime import UTC, date, datetime, time, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.core.dependencies import get_current_user, get_db
+from app.core.config import settings
+from app.core.dependencies import get_current_user, get_db, get_read_db, get_read_user
+from app.core.idempotency import IDEMPOTENCY_HEADER, idempotent
+from app.core.profiling import ProfiledRoute
+from app.core.rate_limit import rate_limit
+from app.core.wire_format import negotiated_response
 from app.db.models import StudyPlan, StudySession, User
 from app.schemas.common import MessageResponse
 from app.schemas.plans import (
@@ -16,8 +22,12 @@ from app.schemas.plans import (
     StudyPlanResponse,
     StudySessionResponse,
 )
+from app.services.dashboard_cache import invalidate_dashboard_summary
+from app.services.scheduler import daily_capacity_minutes, load_busy_intervals, schedule_sessions
+from app.services.streaming import iter_ndjson, record_columns, stream_with_session
+from app.services.user_stats import apply_session_transition
 
-router = APIRouter(prefix='', tags=['plans'])
+router = APIRouter(prefix='', tags=['plans'], route_class=ProfiledRoute)
 
 
 def _current_week_bounds() -> tuple[datetime, datetime]:
@@ -30,12 +40,44 @@ def _current_week_bounds() -> tuple[datetime, datetime]:
     )
 
 
-@router.get('/plans', response_model=list[StudyPlanResponse])
+def _wants_stream(request: Request, stream: bool) -> bool:
+    return stream or 'application/x-ndjson' in request.headers.get('accept', '')
+
+
+def _ndjson_response(db: Session, query, record) -> StreamingResponse:
+    return StreamingResponse(
+        stream_with_session(
+            lambda stream_db: iter_ndjson(stream_db, query, record), bind=db.get_bind()
+        ),
+        media_type='application/x-ndjson',
+    )
+
+
+@router.get(
+    '/plans',
+    dependencies=[Depends(rate_limit('reads'))],
+    response_model=list[StudyPlanResponse],
+)
 def list_plans(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> list[StudyPlanResponse]:
-    plans = db.scalars(select(StudyPlan).where(StudyPlan.user_id == current_user.id)).all()
+    request: Request,
+    stream: bool = Query(default=False),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+) -> Response:
+    if _wants_stream(request, stream):
+        # One JSON object per line, read through a server-side cursor.
+        query = (
+            select(*record_columns(StudyPlan, StudyPlanResponse))
+            .where(StudyPlan.user_id == current_user.id)
+            .order_by(StudyPlan.created_at.asc(), StudyPlan.id.asc())
+        )
+        return _ndjson_response(db, query, StudyPlanResponse)
+
+    return negotiated_response(request, plan_responses(db, current_user.id))
+
+
+def plan_responses(db: Session, user_id: str) -> list[StudyPlanResponse]:
+    plans = db.scalars(select(StudyPlan).where(StudyPlan.user_id == user_id)).all()
     return [
         StudyPlanResponse(
             id=item.id,
@@ -48,13 +90,29 @@ def list_plans(
     ]
 
 
-@router.get('/sessions', response_model=list[StudySessionResponse])
+@router.get(
+    '/sessions',
+    dependencies=[Depends(rate_limit('reads'))],
+    response_model=list[StudySessionResponse],
+)
 def list_sessions(
+    request: Request,
     week: str = Query(default='current', pattern='^(current|all)$'),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> list[StudySessionResponse]:
-    query = select(StudySession).where(StudySession.user_id == current_user.id)
+    stream: bool = Query(default=False),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+) -> Response:
+    if _wants_stream(request, stream):
+        columns = record_columns(StudySession, StudySessionResponse)
+        query = _sessions_query(columns, current_user.id, week)
+        query = query.order_by(StudySession.created_at.asc(), StudySession.id.asc())
+        return _ndjson_response(db, query, StudySessionResponse)
+
+    return negotiated_response(request, session_responses(db, current_user.id, week))
+
+
+def _sessions_query(columns: list, user_id: str, week: str):
+    query = select(*columns).where(StudySession.user_id == user_id)
 
     if week == 'current':
         today = datetime.now(UTC).date()
@@ -66,7 +124,11 @@ def list_sessions(
             StudySession.created_at >= week_start_dt,
             StudySession.created_at < week_end_dt,
         )
+    return query
 
+
+def session_responses(db: Session, user_id: str, week: str) -> list[StudySessionResponse]:
+    query = _sessions_query([StudySession], user_id, week)
     sessions = db.scalars(query.order_by(StudySession.created_at.asc())).all()
     return [
         StudySessionResponse(
@@ -85,39 +147,47 @@ def list_sessions(
 @router.post('/plans', response_model=StudyPlanResponse)
 def create_plan(
     payload: StudyPlanCreateRequest,
+    idempotency_key: str | None = Header(default=None, alias=IDEMPOTENCY_HEADER, max_length=255),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> StudyPlanResponse:
-    plan = StudyPlan(
-        user_id=current_user.id,
-        title=payload.title,
-        topic=payload.topic,
-        duration_minutes=payload.duration_minutes,
-        status='pending',
-    )
-    db.add(plan)
-    db.flush()
+) -> StudyPlanResponse | Response:
+    with idempotent(idempotency_key, current_user.id, 'plans.create', payload) as claim:
+        if claim.replay:
+            return claim.replay
 
-    db.add(
-        StudySession(
-            plan_id=plan.id,
+        plan = StudyPlan(
             user_id=current_user.id,
             title=payload.title,
             topic=payload.topic,
             duration_minutes=payload.duration_minutes,
             status='pending',
-            scheduled_at=datetime.now(UTC),
         )
-    )
-    db.commit()
+        db.add(plan)
+        db.flush()
 
-    return StudyPlanResponse(
-        id=plan.id,
-        title=plan.title,
-        topic=plan.topic,
-        duration_minutes=plan.duration_minutes,
-        status=plan.status,
-    )
+        db.add(
+            StudySession(
+                plan_id=plan.id,
+                user_id=current_user.id,
+                title=payload.title,
+                topic=payload.topic,
+                duration_minutes=payload.duration_minutes,
+                status='pending',
+                scheduled_at=datetime.now(UTC),
+            )
+        )
+        db.commit()
+        invalidate_dashboard_summary(current_user.id)
+
+        return claim.remember(
+            StudyPlanResponse(
+                id=plan.id,
+                title=plan.title,
+                topic=plan.topic,
+                duration_minutes=plan.duration_minutes,
+                status=plan.status,
+            )
+        )
 
 
 @router.post('/plans/current/sessions', response_model=StudySessionResponse)
@@ -155,6 +225,7 @@ def add_session_to_current_plan(
         plan.status = 'in_progress'
 
     db.commit()
+    invalidate_dashboard_summary(current_user.id)
     db.refresh(session)
 
     return StudySessionResponse(
@@ -176,26 +247,129 @@ def update_session(
     current_user: User = Depends(get_current_user),
 ) -> MessageResponse:
     session = db.scalar(
-        select(StudySession).where(StudySession.id == session_id, StudySession.user_id == current_user.id)
+        select(StudySession).where(
+            StudySession.id == session_id, StudySession.user_id == current_user.id
+        )
     )
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Session not found')
 
+    previous_done_day = (
+        session.completed_at.date() if session.status == 'done' and session.completed_at else None
+    )
     session.status = payload.status  # type: ignore[assignment]
     session.completed_at = datetime.now(UTC) if payload.status == 'done' else None
+    apply_session_transition(
+        db,
+        current_user.id,
+        topic=session.topic,
+        duration_minutes=session.duration_minutes,
+        previous_done_day=previous_done_day,
+        new_done_day=session.completed_at.date() if session.completed_at else None,
+    )
 
     if session.plan_id:
-        sibling_sessions = db.scalars(select(StudySession).where(StudySession.plan_id == session.plan_id)).all()
         plan = db.scalar(select(StudyPlan).where(StudyPlan.id == session.plan_id, StudyPlan.user_id == current_user.id))
-        if plan and sibling_sessions:
-            statuses = {item.status for item in sibling_sessions}
-            if statuses == {'done'}:
-                plan.status = 'done'
-            elif 'in_progress' in statuses:
-                plan.status = 'in_progress'
-            else:
-                plan.status = 'pending'
+        if plan:
+            _sync_plan_status(db, plan)
 
     db.commit()
+    invalidate_dashboard_summary(current_user.id)
 
     return MessageResponse(message='session updated')
+
+
+@router.delete('/sessions/{session_id}', response_model=MessageResponse)
+def delete_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> MessageResponse:
+    session = db.scalar(
+        select(StudySession).where(
+            StudySession.id == session_id, StudySession.user_id == current_user.id
+        )
+    )
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Session not found')
+
+    done_day = (
+        session.completed_at.date() if session.status == 'done' and session.completed_at else None
+    )
+    plan = session.plan
+    # The delete trigger records a tombstone so /sync clients drop it too.
+    db.delete(session)
+    db.flush()
+    if done_day:
+        apply_session_transition(
+            db,
+            current_user.id,
+            topic=session.topic,
+            duration_minutes=session.duration_minutes,
+            previous_done_day=done_day,
+            new_done_day=None,
+        )
+    if plan:
+        plan.duration_minutes = max(30, plan.duration_minutes - session.duration_minutes)
+        _sync_plan_status(db, plan)
+
+    db.commit()
+    invalidate_dashboard_summary(current_user.id)
+
+    return MessageResponse(message='session deleted')
+
+
+def _sync_plan_status(db: Session, plan: StudyPlan) -> None:
+    # Entity query: the identity map supplies the in-memory status of a session
+    # changed in this request (autoflush is off).
+    sessions = db.scalars(select(StudySession).where(StudySession.plan_id == plan.id))
+    statuses = {item.status for item in sessions}
+    if not statuses:
+        return
+    if statuses == {'done'}:
+        plan.status = 'done'
+    elif 'in_progress' in statuses:
+        plan.status = 'in_progress'
+    else:
+        plan.status = 'pending'
+
+
+@router.post('/sessions/reschedule-missed', response_model=MessageResponse)
+def reschedule_missed_sessions(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> MessageResponse:
+    now = datetime.now(UTC)
+    missed = db.scalars(
+        select(StudySession)
+        .where(
+            StudySession.user_id == current_user.id,
+            StudySession.status == 'pending',
+            StudySession.scheduled_at < now,
+        )
+        .order_by(StudySession.scheduled_at.asc())
+    ).all()
+    if not missed:
+        return MessageResponse(message='no missed sessions')
+
+    horizon_days = settings.schedule_reschedule_horizon_days
+    schedule = schedule_sessions(
+        [item.duration_minutes for item in missed],
+        start=now,
+        days=horizon_days,
+        daily_capacity_minutes=daily_capacity_minutes(db, current_user.id),
+        busy=load_busy_intervals(
+            db,
+            current_user.id,
+            now,
+            now + timedelta(days=horizon_days),
+            exclude_ids=[item.id for item in missed],
+        ),
+    )
+    for item, scheduled_at in zip(missed, schedule, strict=True):
+        item.scheduled_at = scheduled_at
+
+    count = len(missed)
+    db.commit()
+    invalidate_dashboard_summary(current_user.id)
+    return MessageResponse(message=f'{count} sessions rescheduled')
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.dependencies import get_read_db, get_read_user
+from app.core.profiling import ProfiledRoute
+from app.core.rate_limit import rate_limit
+from app.core.wire_format import negotiated_response
+from app.db.models import User
+from app.schemas.sync import SyncResponse
+from app.services.sync import changes_since
+
+router = APIRouter(prefix='', tags=['sync'], route_class=ProfiledRoute)
+
+
+@router.get(
+    '/sync',
+    dependencies=[Depends(rate_limit('reads'))],
+    response_model=SyncResponse,
+)
+def sync(
+    request: Request,
+    since: int = Query(default=0, ge=0),
+    limit: int | None = Query(default=None, ge=1),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_read_user),
+) -> Response:
+    page_size = min(limit or settings.sync_page_size, settings.sync_max_page_size)
+    payload = changes_since(db, current_user.id, since, page_size)
+    return negotiated_response(request, payload, headers={'Cache-Control': 'private, no-cache'})
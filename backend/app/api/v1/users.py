@@ -7,11 +7,12 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.dependencies import get_current_user, get_db
+from app.core.profiling import ProfiledRoute
 from app.db.models import OnboardingPreference, User
 from app.schemas.common import MessageResponse
 from app.schemas.users import PreferencesRequest, UserMeResponse
 
-router = APIRouter(prefix='/users', tags=['users'])
+router = APIRouter(prefix='/users', tags=['users'], route_class=ProfiledRoute)
 
 
 @router.get('/me', response_model=UserMeResponse)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import zlib
+from typing import Protocol
+
+try:
+    import brotli
+except ImportError:  # optional: pip install '.[compression]'
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install '.[compression]'
+    zstandard = None
+
+# Levels for API responses: most of the size win at a fraction of the CPU of
+# the maximum settings (numbers in `python -m benchmarks.wire_format`).
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+
+class Encoder(Protocol):
+    def chunk(self, data: bytes) -> bytes: ...
+
+    def finish(self, data: bytes = b'') -> bytes: ...
+
+
+class _Gzip:
+    def __init__(self) -> None:
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        # Sync flush so a streamed NDJSON line reaches the client without waiting for more.
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self) -> None:
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        compressed = self._compressor.compress(data)
+        return compressed + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def available_encoders() -> dict[str, type[Encoder]]:
+    encoders: dict[str, type[Encoder]] = {'gzip': _Gzip}
+    if brotli is not None:
+        encoders['br'] = _Brotli
+    if zstandard is not None:
+        encoders['zstd'] = _Zstd
+    return encoders
+
+
+def _accepted(accept_encoding: str) -> dict[str, float]:
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: str, preferred: list[str]) -> str | None:
+    # Highest client q-value wins; ties go to the server's order in `preferred`.
+    accepted = _accepted(accept_encoding)
+    encoders = available_encoders()
+    best: tuple[float, int] | None = None
+    chosen = None
+    for rank, name in enumerate(preferred):
+        if name not in encoders:
+            continue
+        quality = accepted.get(name, accepted.get('*', 0.0))
+        if quality <= 0:
+            continue
+        if best is None or (quality, -rank) > best:
+            best = (quality, -rank)
+            chosen = name
+    return chosen
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
+import hmac
 from collections.abc import Generator
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
 
-from app.core.security import decode_access_token
+from app.core import metrics
+from app.core.config import settings
+from app.core.security import decode_request_token
 from app.db.models import User
-from app.db.session import SessionLocal
+from app.db.replicas import is_primary_sticky
+from app.db.session import SessionLocal, engine, replicas
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
@@ -22,24 +27,86 @@ def get_db() -> Generator[Session]:
         db.close()
 
 
-def get_current_user(
+def get_token_user_id(
+    request: Request,
     credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+) -> str:
     if not credentials:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Missing credentials')
 
     try:
-        payload = decode_access_token(credentials.credentials)
+        payload = decode_request_token(request, credentials.credentials)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid token') from exc
 
     user_id = payload.get('sub')
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid token subject')
+    return user_id
 
+
+def get_current_user(
+    user_id: str = Depends(get_token_user_id),
+    db: Session = Depends(get_db),
+) -> User:
     user = db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='User not found')
 
+    db.info['user_id'] = user.id
+    return user
+
+
+def get_read_db(user_id: str = Depends(get_token_user_id)) -> Generator[Session]:
+    # Read-only handlers go to a healthy replica unless the user wrote recently.
+    # The user comes from the token, so no primary connection is taken unless
+    # the read itself has to go there.
+    session = None
+    if replicas.engines and not is_primary_sticky(user_id):
+        session = _replica_session()
+    if session is None:
+        metrics.increment('db.reads.primary')
+        session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _replica_session() -> Session | None:
+    for replica in replicas.candidates():
+        session = SessionLocal(bind=replica)
+        try:
+            session.connection()
+        except DBAPIError as exc:
+            session.close()
+            replicas.mark_down(replica, exc)
+            continue
+        metrics.increment('db.reads.replica')
+        return session
+    return None
+
+
+def get_read_user(
+    user_id: str = Depends(get_token_user_id),
+    db: Session = Depends(get_read_db),
+) -> User:
+    user = db.scalar(select(User).where(User.id == user_id))
+    if not user and db.get_bind() is not engine:
+        # A replica may not have the account yet right after sign-up.
+        with SessionLocal() as primary:
+            user = primary.scalar(select(User).where(User.id == user_id))
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='User not found')
     return user
+
+
+def require_metrics_token(x_metrics_token: str = Header(default='')) -> None:
+    # Metrics name users' traffic patterns and internal hosts; without a
+    # configured token the endpoints are not served at all.
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Not Found')
+    if not hmac.compare_digest(x_metrics_token.encode(), settings.metrics_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid metrics token'
+        )
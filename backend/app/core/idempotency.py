@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TypeVar
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+ResponseModel = TypeVar('ResponseModel', bound=BaseModel)
+
+
+class IdempotencyClaim:
+    def __init__(
+        self, redis_key: str | None, fingerprint: str, replay: Response | None = None
+    ) -> None:
+        self.redis_key = redis_key
+        self.fingerprint = fingerprint
+        self.replay = replay
+
+    def remember(self, response: ResponseModel) -> ResponseModel:
+        if self.redis_key:
+            entry = {
+                'state': 'done',
+                'fingerprint': self.fingerprint,
+                'body': response.model_dump_json(),
+            }
+            try:
+                get_redis().set(
+                    self.redis_key, json.dumps(entry), ex=settings.idempotency_ttl_seconds
+                )
+            except RedisError as exc:
+                logger.warning('Failed to store idempotent response: %s', exc)
+        return response
+
+    def release(self) -> None:
+        if self.redis_key:
+            try:
+                get_redis().delete(self.redis_key)
+            except RedisError as exc:
+                logger.warning('Failed to release idempotency key: %s', exc)
+
+
+@contextmanager
+def idempotent(
+    key: str | None, user_id: str, scope: str, payload: BaseModel
+) -> Iterator[IdempotencyClaim]:
+    # The first request with a key runs and its response is stored; retries with
+    # the same key and body get that response back instead of running again.
+    fingerprint = hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+    if not key:
+        yield IdempotencyClaim(None, fingerprint)
+        return
+
+    redis_key = f'idempotency:{scope}:{user_id}:{key}'
+    pending = json.dumps({'state': 'pending', 'fingerprint': fingerprint})
+    try:
+        client = get_redis()
+        if client.set(redis_key, pending, nx=True, ex=settings.idempotency_pending_seconds):
+            claim = IdempotencyClaim(redis_key, fingerprint)
+        else:
+            claim = _replay(client.get(redis_key), fingerprint)
+    except RedisError as exc:
+        # Without Redis the request still runs, it just is not deduplicated.
+        metrics.increment('idempotency.errors')
+        logger.warning('Idempotency check failed, running request: %s', exc)
+        claim = IdempotencyClaim(None, fingerprint)
+
+    try:
+        yield claim
+    except BaseException:
+        claim.release()
+        raise
+
+
+def _replay(stored: bytes | None, fingerprint: str) -> IdempotencyClaim:
+    if stored is None:
+        # Expired between SET and GET; treat like a request without a key.
+        return IdempotencyClaim(None, fingerprint)
+
+    entry = json.loads(stored)
+    if entry['fingerprint'] != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f'{IDEMPOTENCY_HEADER} was already used with a different request body',
+        )
+    if entry['state'] != 'done':
+        metrics.increment('idempotency.in_progress')
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='A request with this idempotency key is still in progress',
+            headers={'Retry-After': '1'},
+        )
+
+    metrics.increment('idempotency.replays')
+    response = Response(
+        content=entry['body'],
+        media_type='application/json',
+        headers={'Idempotent-Replayed': 'true'},
+    )
+    return IdempotencyClaim(None, fingerprint, replay=response)
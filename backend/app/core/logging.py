@@ -1,8 +1,130 @@
+from __future__ import annotations
+
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
+import uuid
+from contextvars import ContextVar
+from datetime import UTC, datetime
+
+from app.core.config import settings
+
+request_id_var: ContextVar[str | None] = ContextVar('request_id', default=None)
+job_id_var: ContextVar[str | None] = ContextVar('job_id', default=None)
+
+_CONTEXT_FIELDS = ('request_id', 'job_id')
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {
+    'message',
+    'asctime',
+    *_CONTEXT_FIELDS,
+}
+
+_listener: logging.handlers.QueueListener | None = None
+_listener_pid: int | None = None
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+class ContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.job_id = job_id_var.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = max(0.0, min(rate, 1.0))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = ' '.join(
+            f'{key}={value}' for key in _CONTEXT_FIELDS if (value := getattr(record, key, None))
+        )
+        return f'{line} {context}' if context else line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, object] = {
+            'ts': datetime.fromtimestamp(record.created, UTC).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key in _CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value:
+                payload[key] = value
+
+        # Fields passed through `extra=` end up as plain record attributes.
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc_info'] = record.exc_text
+
+        return json.dumps(payload, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve args and traceback on the caller thread, but leave formatting
+        # (and therefore the JSON layout) to the listener's handler.
+        prepared = logging.makeLogRecord(record.__dict__)
+        prepared.msg = record.getMessage()
+        prepared.args = None
+        if record.exc_info:
+            prepared.exc_text = logging.Formatter().formatException(record.exc_info)
+            prepared.exc_info = None
+        return prepared
 
 
 def configure_logging() -> None:
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s %(levelname)s [%(name)s] %(message)s',
+    # Handlers do their I/O on the listener thread; the caller only enqueues.
+    # A forked worker child needs its own listener because threads do not survive fork().
+    global _listener, _listener_pid
+
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+
+    stream_handler = logging.StreamHandler()
+    if settings.log_format == 'json':
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(
+            TextFormatter('%(asctime)s %(levelname)s [%(name)s] %(message)s')
+        )
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(DebugSamplingFilter(settings.log_debug_sample_rate))
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(settings.log_level.upper())
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
     )
+    _listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(_listener.stop)
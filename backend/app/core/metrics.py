@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import defaultdict
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from redis import Redis
+
+# Process-local metrics. An API process reports its own values through
+# `GET /health/metrics`. Processes without an HTTP server (Celery children, the
+# outbox relay) push a snapshot to Redis with `export_snapshot`, and
+# `GET /health/metrics/workers` lists them. Aggregation across processes is
+# left to the scraper.
+
+EXPORT_PREFIX = 'metrics:process:'
+
+_lock = threading.Lock()
+_counters: dict[str, float] = defaultdict(float)
+_gauges: dict[str, float] = {}
+_timings: dict[str, list[float]] = {}
+_collectors: list[Callable[[], None]] = []
+
+
+def increment(name: str, value: float = 1.0) -> None:
+    with _lock:
+        _counters[name] += value
+
+
+def set_gauge(name: str, value: float) -> None:
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name: str, value: float) -> None:
+    with _lock:
+        stats = _timings.get(name)
+        if stats is None:
+            _timings[name] = [1, value, value]
+        else:
+            stats[0] += 1
+            stats[1] += value
+            stats[2] = max(stats[2], value)
+
+
+def counter_value(name: str) -> float:
+    with _lock:
+        return _counters.get(name, 0.0)
+
+
+def register_collector(collector: Callable[[], None]) -> None:
+    # Collectors run on each snapshot to refresh derived gauges.
+    _collectors.append(collector)
+
+
+def snapshot() -> dict[str, dict]:
+    for collector in _collectors:
+        collector()
+
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'gauges': dict(_gauges),
+            'timings': {
+                name: {'count': count, 'sum': total, 'avg': total / count, 'max': peak}
+                for name, (count, total, peak) in _timings.items()
+            },
+        }
+
+
+def export_snapshot(redis: Redis, process: str, ttl_seconds: int) -> None:
+    # Expires unless refreshed, so processes that exited drop out of the list.
+    redis.set(f'{EXPORT_PREFIX}{process}', json.dumps(snapshot()), ex=ttl_seconds)
+
+
+def exported_snapshots(redis: Redis) -> dict[str, dict]:
+    keys = sorted(redis.scan_iter(match=f'{EXPORT_PREFIX}*', count=500))
+    if not keys:
+        return {}
+    return {
+        key.decode().removeprefix(EXPORT_PREFIX): json.loads(value)
+        for key, value in zip(keys, redis.mget(keys), strict=True)
+        if value is not None
+    }
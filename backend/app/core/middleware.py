@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.compression import Encoder, available_encoders, choose_encoding
+from app.core.logging import new_request_id, request_id_var
+
+REQUEST_ID_HEADER = b'x-request-id'
+
+
+def _incoming_request_id(scope: Scope) -> str | None:
+    for name, value in scope.get('headers', []):
+        if name == REQUEST_ID_HEADER:
+            candidate = value.decode('latin-1').strip()
+            if 0 < len(candidate) <= 128 and candidate.isprintable():
+                return candidate
+            return None
+    return None
+
+
+class RequestIdMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _incoming_request_id(scope) or new_request_id()
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                message['headers'] = [
+                    *message.get('headers', []),
+                    (REQUEST_ID_HEADER, request_id.encode('latin-1')),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
+
+
+_COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'application/msgpack', 'text/')
+# Compressing more than this on the event loop would stall other requests;
+# zlib, brotli and zstandard all release the GIL, so a worker thread does it.
+_THREAD_COMPRESS_BYTES = 64 * 1024
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, *, minimum_size: int, encodings: list[str]) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = encodings
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get('accept-encoding', ''), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int) -> None:
+        self._send = send
+        self._encoding = encoding
+        self._minimum_size = minimum_size
+        self._start: Message | None = None
+        self._encoder: Encoder | None = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            headers = Headers(raw=message.get('headers', []))
+            content_type = headers.get('content-type', '')
+            self._passthrough = (
+                message['status'] in (204, 304)
+                or 'content-encoding' in headers
+                or not content_type.startswith(_COMPRESSIBLE_TYPES)
+            )
+            if self._passthrough:
+                await self._send(message)
+            else:
+                self._start = message
+            return
+
+        if self._passthrough or message['type'] != 'http.response.body':
+            await self._send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self._start is not None:
+            start, self._start = self._start, None
+            headers = MutableHeaders(scope=start)
+            headers.add_vary_header('Accept-Encoding')
+            if not more_body and len(body) < self._minimum_size:
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            self._encoder = available_encoders()[self._encoding]()
+            headers['Content-Encoding'] = self._encoding
+            if more_body:
+                # Streamed (NDJSON, exports): compress chunk by chunk, length unknown.
+                del headers['Content-Length']
+                await self._send(start)
+            else:
+                body = await self._compress(self._encoder.finish, body)
+                headers['Content-Length'] = str(len(body))
+                await self._send(start)
+                await self._send({'type': 'http.response.body', 'body': body})
+                return
+
+        assert self._encoder is not None
+        if more_body:
+            body = await self._compress(self._encoder.chunk, body)
+        else:
+            body = await self._compress(self._encoder.finish, body)
+        await self._send({'type': 'http.response.body', 'body': body, 'more_body': more_body})
+
+    async def _compress(self, compress, body: bytes) -> bytes:
+        if len(body) > _THREAD_COMPRESS_BYTES:
+            return await anyio.to_thread.run_sync(compress, body)
+        return compress(body)
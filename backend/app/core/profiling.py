@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import functools
+import hmac
+import inspect
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from pathlib import Path
+
+import anyio
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logging import request_id_var
+
+logger = logging.getLogger(__name__)
+
+# On-demand sampling profiler. A background thread reads the stacks of the
+# threads registered for one request (or task) every few milliseconds, and the
+# result is written as a speedscope file (https://www.speedscope.app), which
+# shows it as a flame graph. Sync endpoints run in the threadpool, so
+# `ProfiledRoute` registers the endpoint's thread; dependencies are not covered.
+
+PROFILE_HEADER = 'x-profile'
+_MAX_DEPTH = 200
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+_active_profiler: ContextVar[SamplingProfiler | None] = ContextVar('active_profiler', default=None)
+
+
+class SamplingProfiler:
+    def __init__(self, name: str, interval_seconds: float) -> None:
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self._threads: set[int] = set()
+        self._samples: list[tuple[tuple[str, str, int], ...]] = []
+        self._weights: list[float] = []
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._started = 0.0
+        self.elapsed = 0.0
+
+    def add_thread(self, ident: int) -> None:
+        self._threads.add(ident)
+
+    def remove_thread(self, ident: int) -> None:
+        self._threads.discard(ident)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sampler.join()
+        self.elapsed = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval_seconds):
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            for ident in tuple(self._threads):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self._samples.append(_stack(frame))
+                    self._weights.append(now - last)
+            last = now
+
+    def speedscope(self) -> dict:
+        index: dict[tuple[str, str, int], int] = {}
+        samples = [
+            [index.setdefault(frame, len(index)) for frame in stack] for stack in self._samples
+        ]
+        frames = [{'name': name, 'file': file, 'line': line} for name, file, line in index]
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': frames},
+            'profiles': [
+                {
+                    'type': 'sampled',
+                    'name': self.name,
+                    'unit': 'seconds',
+                    'startValue': 0,
+                    'endValue': self.elapsed,
+                    'samples': samples,
+                    'weights': self._weights,
+                }
+            ],
+            'name': self.name,
+            'exporter': 'schediora',
+        }
+
+    def write(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.speedscope()))
+        return path
+
+
+def profile_path(directory: str, name: str) -> Path:
+    stamp = datetime.now(UTC).strftime('%Y%m%dT%H%M%S.%fZ')
+    return Path(directory) / f'{stamp}-{_UNSAFE.sub("_", name).strip("_")[:120]}.speedscope.json'
+
+
+def _stack(frame) -> tuple[tuple[str, str, int], ...]:
+    stack = []
+    while frame is not None and len(stack) < _MAX_DEPTH:
+        code = frame.f_code
+        stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+@contextmanager
+def _registered(profiler: SamplingProfiler | None) -> Iterator[None]:
+    if profiler is None:
+        yield
+        return
+    ident = threading.get_ident()
+    profiler.add_thread(ident)
+    try:
+        yield
+    finally:
+        profiler.remove_thread(ident)
+
+
+def _profiled_endpoint(endpoint: Callable) -> Callable:
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def run_async(*args, **kwargs):
+            with _registered(_active_profiler.get()):
+                return await endpoint(*args, **kwargs)
+
+        return run_async
+
+    @functools.wraps(endpoint)
+    def run(*args, **kwargs):
+        with _registered(_active_profiler.get()):
+            return endpoint(*args, **kwargs)
+
+    return run
+
+
+class ProfiledRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable, **kwargs) -> None:
+        super().__init__(path, _profiled_endpoint(endpoint), **kwargs)
+
+
+@contextmanager
+def profile_block(name: str) -> Iterator[None]:
+    # For work outside HTTP (Celery tasks): profiles the calling thread for a
+    # random PROFILING_SAMPLE_RATE share of calls.
+    if not settings.profiling_enabled or random.random() >= settings.profiling_sample_rate:
+        yield
+        return
+    profiler = SamplingProfiler(name, settings.profiling_interval_ms / 1000)
+    profiler.add_thread(threading.get_ident())
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        path = profiler.write(profile_path(settings.profiling_dir, name))
+        logger.info('Profile written path=%s elapsed=%.3fs', path, profiler.elapsed)
+
+
+class ProfilingMiddleware:
+    # Profiles a request when it carries `X-Profile: <PROFILING_TOKEN>` or falls
+    # into the random PROFILING_SAMPLE_RATE share. Forced requests get the file
+    # name back in the `X-Profile` response header.
+
+    def __init__(
+        self, app: ASGIApp, *, directory: str, sample_rate: float, token: str, interval_ms: float
+    ) -> None:
+        self.app = app
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.token = token.encode()
+        self.interval_seconds = interval_ms / 1000
+
+    def _forced(self, scope: Scope) -> bool:
+        if not self.token:
+            return False
+        supplied = Headers(scope=scope).get(PROFILE_HEADER, '').encode()
+        return hmac.compare_digest(supplied, self.token)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        forced = self._forced(scope)
+        if not forced and random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        name = f'{scope["method"]} {scope["path"]} {request_id_var.get() or ""}'.strip()
+        profiler = SamplingProfiler(name, self.interval_seconds)
+        path = profile_path(self.directory, name)
+
+        async def send_with_profile(message: Message) -> None:
+            if forced and message['type'] == 'http.response.start':
+                message['headers'] = [
+                    *message.get('headers', []),
+                    (PROFILE_HEADER.encode(), path.name.encode('latin-1')),
+                ]
+            await send(message)
+
+        token = _active_profiler.set(profiler)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            _active_profiler.reset(token)
+            profiler.stop()
+            await anyio.to_thread.run_sync(profiler.write, path)
+            logger.info('Profile written path=%s elapsed=%.3fs', path, profiler.elapsed)
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+
+from fastapi import HTTPException, Request, status
+from redis.exceptions import RedisError
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.core.security import decode_request_token
+
+logger = logging.getLogger(__name__)
+
+# Checks the per-client bucket and, when given, the group-wide bucket in one
+# round trip; a token is only taken when both have one. Redis TIME keeps every
+# API process on the same clock. Returns {allowed, retry_after_ms}.
+_TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = now_parts[1] * 1000 + math.floor(now_parts[2] / 1000)
+local states = {}
+local wait = 0
+for index, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[index * 2 - 1])
+    local burst = tonumber(ARGV[index * 2])
+    local stored = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(stored[1]) or burst
+    local ts = tonumber(stored[2]) or now
+    tokens = math.min(burst, tokens + math.max(now - ts, 0) * rate)
+    if tokens < 1 then
+        wait = math.max(wait, math.ceil((1 - tokens) / rate))
+    end
+    states[index] = {key, tokens, rate, burst}
+end
+if wait > 0 then
+    return {0, wait}
+end
+for _, state in ipairs(states) do
+    redis.call('HSET', state[1], 'tokens', state[2] - 1, 'ts', now)
+    redis.call('PEXPIRE', state[1], math.ceil(state[4] / state[3]))
+end
+return {1, 0}
+"""
+
+_FALLBACK_MAX_BUCKETS = 10_000
+# After a Redis error, stay on the local buckets for a while instead of paying
+# a socket timeout on every request.
+_REDIS_RETRY_SECONDS = 5.0
+_redis_retry_at = 0.0
+
+
+@dataclass(frozen=True)
+class Limit:
+    per_minute: int
+    burst: int
+
+    @property
+    def rate_per_ms(self) -> float:
+        return self.per_minute / 60_000
+
+
+def _group_limits(group: str) -> tuple[Limit, Limit | None]:
+    per_client = Limit(
+        getattr(settings, f'rate_limit_{group}_per_minute'),
+        getattr(settings, f'rate_limit_{group}_burst'),
+    )
+    global_per_minute = getattr(settings, f'rate_limit_{group}_global_per_minute')
+    # The group-wide bucket allows a few seconds' worth of burst.
+    global_limit = None
+    if global_per_minute:
+        global_limit = Limit(global_per_minute, max(global_per_minute // 10, 1))
+    return per_client, global_limit
+
+
+@lru_cache
+def _script():
+    return get_redis().register_script(_TOKEN_BUCKET_SCRIPT)
+
+
+class _LocalBuckets:
+    # Per-process fallback with the same algorithm; used only while Redis is down.
+
+    def __init__(self) -> None:
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, keys: list[str], limits: list[Limit]) -> float:
+        now = time.monotonic() * 1000
+        with self._lock:
+            states = []
+            wait = 0.0
+            for key, limit in zip(keys, limits, strict=True):
+                tokens, ts = self._buckets.get(key, (float(limit.burst), now))
+                tokens = min(limit.burst, tokens + (now - ts) * limit.rate_per_ms)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / limit.rate_per_ms)
+                states.append((key, tokens))
+            if wait:
+                return wait
+            for key, tokens in states:
+                self._buckets[key] = (tokens - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > _FALLBACK_MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        return 0.0
+
+
+_local_buckets = _LocalBuckets()
+
+
+def client_address(request: Request) -> str:
+    # Behind N trusted proxies the client is the N-th address from the right of
+    # X-Forwarded-For; anything further left is whatever the client sent.
+    address = request.client.host if request.client else 'unknown'
+    hops = settings.rate_limit_trusted_proxy_hops
+    if hops:
+        forwarded = [
+            part.strip()
+            for header in request.headers.getlist('x-forwarded-for')
+            for part in header.split(',')
+            if part.strip()
+        ]
+        if len(forwarded) >= hops:
+            address = forwarded[-hops]
+    return address
+
+
+def _client_identity(request: Request, group: str) -> str:
+    # Authenticated groups are limited per user; auth endpoints and anonymous
+    # callers per client address.
+    authorization = request.headers.get('authorization', '')
+    if group != 'auth' and authorization.lower().startswith('bearer '):
+        try:
+            subject = decode_request_token(request, authorization[7:]).get('sub')
+        except ValueError:
+            subject = None
+        if subject:
+            return f'user:{subject}'
+    return f'ip:{client_address(request)}'
+
+
+def _login_buckets(request: Request, email: str) -> tuple[list[str], list[Limit]]:
+    # Per address (login group), so one address cannot try a password against
+    # many accounts, and per address and account (auth group limits), so
+    # guessing one account's password stays slow while users behind one NAT
+    # do not lock each other out.
+    address = client_address(request)
+    account = hashlib.sha256(email.strip().lower().encode()).hexdigest()[:16]
+    per_address, global_limit = _group_limits('login')
+    per_account, _ = _group_limits('auth')
+    keys = [f'ratelimit:login:ip:{address}', f'ratelimit:login:ip:{address}:account:{account}']
+    limits = [per_address, per_account]
+    if global_limit:
+        keys.append('ratelimit:login:global')
+        limits.append(global_limit)
+    return keys, limits
+
+
+def check_rate_limit(group: str, identity: str) -> float:
+    # Returns 0 when the request may proceed, else the wait in milliseconds.
+    per_client, global_limit = _group_limits(group)
+    keys = [f'ratelimit:{group}:{identity}']
+    limits = [per_client]
+    if global_limit:
+        keys.append(f'ratelimit:{group}:global')
+        limits.append(global_limit)
+    return _take(keys, limits)
+
+
+def _take(keys: list[str], limits: list[Limit]) -> float:
+    global _redis_retry_at
+    if time.monotonic() >= _redis_retry_at:
+        try:
+            args: list[float] = []
+            for limit in limits:
+                args.extend((limit.rate_per_ms, limit.burst))
+            allowed, wait_ms = _script()(keys=keys, args=args)
+            return 0.0 if allowed else float(wait_ms)
+        except RedisError as exc:
+            _redis_retry_at = time.monotonic() + _REDIS_RETRY_SECONDS
+            logger.warning('Rate limiting falls back to in-process buckets: %s', exc)
+
+    metrics.increment('rate_limit.fallback')
+    return _local_buckets.take(keys, limits)
+
+
+def enforce_rate_limit(group: str, identity: str) -> None:
+    _enforce(group, lambda: check_rate_limit(group, identity))
+
+
+def enforce_login_rate_limit(request: Request, email: str) -> None:
+    keys, limits = _login_buckets(request, email)
+    _enforce('login', lambda: _take(keys, limits))
+
+
+def _enforce(group: str, check: Callable[[], float]) -> None:
+    if not settings.rate_limit_enabled:
+        return
+    started = time.perf_counter()
+    wait_ms = check()
+    metrics.observe('rate_limit.check_seconds', time.perf_counter() - started)
+    if wait_ms:
+        metrics.increment(f'rate_limit.{group}.limited')
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail='Too many requests. Please slow down.',
+            headers={'Retry-After': str(max(math.ceil(wait_ms / 1000), 1))},
+        )
+    metrics.increment(f'rate_limit.{group}.allowed')
+
+
+def rate_limit(group: str) -> Callable[[Request], None]:
+    def dependency(request: Request) -> None:
+        enforce_rate_limit(group, _client_identity(request, group))
+
+    return dependency
@@ -0,0 +1,14 @@
+from functools import lru_cache
+
+from redis import Redis
+
+from app.core.config import settings
+
+
+@lru_cache
+def get_redis() -> Redis:
+    return Redis.from_url(
+        settings.redis_url,
+        socket_timeout=settings.redis_socket_timeout_seconds,
+        socket_connect_timeout=settings.redis_socket_timeout_seconds,
+    )
@@ -2,24 +2,36 @@ from __future__ import annotations
 
 import secrets
 from datetime import UTC, datetime, timedelta
-
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import cache
+from typing import TYPE_CHECKING
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=['argon2'], deprecated='auto')
+if TYPE_CHECKING:
+    from starlette.requests import Request
+
+# passlib and jose (with its cryptography backend) are imported on first use so
+# CLI, migration and worker processes that import the app do not pay for them.
+
+
+@cache
+def _pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=['argon2'], deprecated='auto')
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 
 def create_access_token(subject: str) -> str:
+    from jose import jwt
+
     expires = datetime.now(UTC) + timedelta(minutes=settings.jwt_access_expire_minutes)
     payload = {'sub': subject, 'exp': expires, 'type': 'access'}
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
@@ -30,7 +42,20 @@ def create_refresh_token() -> str:
 
 
 def decode_access_token(token: str) -> dict:
+    from jose import JWTError, jwt
+
     try:
         return jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
     except JWTError as exc:
         raise ValueError('Invalid token') from exc
+
+
+def decode_request_token(request: Request, token: str) -> dict:
+    # The rate limiter and the auth dependency both need the claims; decode once
+    # per request.
+    cached = getattr(request.state, 'token_claims', None)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+    claims = decode_access_token(token)
+    request.state.token_claims = (token, claims)
+    return claims
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import msgpack
+from fastapi import Request, Response
+from pydantic_core import to_json, to_jsonable_python
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+_MSGPACK_ACCEPT = (MSGPACK_MEDIA_TYPE, 'application/x-msgpack')
+
+
+def wants_msgpack(request: Request) -> bool:
+    accept = request.headers.get('accept', '')
+    return any(media_type in accept for media_type in _MSGPACK_ACCEPT)
+
+
+def negotiated_response(
+    request: Request, data: Any, *, headers: dict[str, str] | None = None
+) -> Response:
+    # `data` is a model, a list of models or an already serialized JSON body (cache
+    # hits). MessagePack keeps the JSON shape, datetimes included as ISO strings,
+    # so clients can switch formats without a second schema.
+    headers = {**(headers or {}), 'Vary': 'Accept'}
+    if wants_msgpack(request):
+        if isinstance(data, bytes):
+            data = json.loads(data)
+        content = msgpack.packb(to_jsonable_python(data), use_bin_type=True)
+        return Response(content=content, media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+
+    content = data if isinstance(data, bytes) else to_json(data)
+    return Response(content=content, media_type='application/json', headers=headers)
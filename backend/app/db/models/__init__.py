@@ -1,11 +1,16 @@
 from app.db.models.models import (
     AiJob,
+    AiJobArchive,
     DashboardDailyMetric,
     OnboardingPreference,
+    OutboxEvent,
+    PlanLibraryEntry,
     RefreshToken,
     StudyPlan,
     StudySession,
+    SyncTombstone,
     User,
+    UserStats,
 )
 
 __all__ = [
@@ -14,6 +19,11 @@ __all__ = [
     'OnboardingPreference',
     'StudyPlan',
     'StudySession',
+    'SyncTombstone',
     'AiJob',
+    'AiJobArchive',
     'DashboardDailyMetric',
+    'OutboxEvent',
+    'PlanLibraryEntry',
+    'UserStats',
 ]
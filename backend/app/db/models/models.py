@@ -3,11 +3,26 @@ from __future__ import annotations
 import uuid
 from datetime import UTC, datetime, date
 
-from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
+from app.db.types import Vector
 
 
 class User(Base):
@@ -17,6 +32,10 @@ class User(Base):
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     password_hash: Mapped[str] = mapped_column(String(255))
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    # Per-user change counter for /sync, bumped by the study_plans/study_sessions
+    # triggers; `sync_floor` is the highest tombstone sequence already pruned.
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default='0')
+    sync_floor: Mapped[int] = mapped_column(BigInteger, default=0, server_default='0')
 
     refresh_tokens: Mapped[list[RefreshToken]] = relationship(back_populates='user', cascade='all,delete')
     plans: Mapped[list[StudyPlan]] = relationship(back_populates='user', cascade='all,delete')
@@ -47,6 +66,7 @@ class OnboardingPreference(Base):
 
 class StudyPlan(Base):
     __tablename__ = 'study_plans'
+    __table_args__ = (Index('ix_study_plans_user_id_change_seq', 'user_id', 'change_seq'),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[str] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), index=True)
@@ -55,6 +75,10 @@ class StudyPlan(Base):
     duration_minutes: Mapped[int] = mapped_column(Integer)
     status: Mapped[str] = mapped_column(String(24), default='pending', index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default='0')
 
     user: Mapped[User] = relationship(back_populates='plans')
     sessions: Mapped[list[StudySession]] = relationship(back_populates='plan', cascade='all,delete')
@@ -62,6 +86,10 @@ class StudyPlan(Base):
 
 class StudySession(Base):
     __tablename__ = 'study_sessions'
+    __table_args__ = (
+        Index('ix_study_sessions_status_scheduled_at', 'status', 'scheduled_at', 'id'),
+        Index('ix_study_sessions_user_id_change_seq', 'user_id', 'change_seq'),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     plan_id: Mapped[str | None] = mapped_column(ForeignKey('study_plans.id', ondelete='SET NULL'), nullable=True)
@@ -73,24 +101,136 @@ class StudySession(Base):
     scheduled_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+    change_seq: Mapped[int] = mapped_column(BigInteger, default=0, server_default='0')
 
     plan: Mapped[StudyPlan | None] = relationship(back_populates='sessions')
 
 
+class SyncTombstone(Base):
+    __tablename__ = 'sync_tombstones'
+
+    user_id: Mapped[str] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    change_seq: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    entity: Mapped[str] = mapped_column(String(16))
+    entity_id: Mapped[str] = mapped_column(String(36))
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC), index=True
+    )
+
+
+class UserStats(Base):
+    __tablename__ = 'user_stats'
+
+    user_id: Mapped[str] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    current_streak: Mapped[int] = mapped_column(Integer, default=0)
+    longest_streak: Mapped[int] = mapped_column(Integer, default=0)
+    last_done_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    last_done_day_sessions: Mapped[int] = mapped_column(Integer, default=0)
+    focus_minutes_total: Mapped[int] = mapped_column(Integer, default=0)
+    topic_minutes: Mapped[dict] = mapped_column(JSONB, default=dict)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+
+
 class AiJob(Base):
+    # Range-partitioned by month on created_at (migration 20261019_0007); the
+    # partition key has to be part of the primary key.
     __tablename__ = 'ai_jobs'
+    __table_args__ = (
+        Index('ix_ai_jobs_user_id_created_at', 'user_id', 'created_at'),
+        # Only live jobs are indexed for the dispatcher, so this index stays tiny.
+        Index(
+            'ix_ai_jobs_status_dispatched_at',
+            'status',
+            'dispatched_at',
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+        Index('ix_ai_jobs_updated_at', 'updated_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), index=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'))
     goal: Mapped[str] = mapped_column(String(180))
     topic: Mapped[str] = mapped_column(String(120))
-    status: Mapped[str] = mapped_column(String(24), default='queued', index=True)
+    status: Mapped[str] = mapped_column(String(24), default='queued')
+    priority: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    dispatched_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     result_text: Mapped[str | None] = mapped_column(Text, nullable=True)
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, default=lambda: datetime.now(UTC)
+    )
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
 
 
+class AiJobArchive(Base):
+    # Finished history moved out of expired ai_jobs partitions; the raw model
+    # output is kept compressed (see app/services/ai_job_archive.py).
+    __tablename__ = 'ai_jobs_archive'
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), index=True)
+    goal: Mapped[str] = mapped_column(String(180))
+    topic: Mapped[str] = mapped_column(String(120))
+    status: Mapped[str] = mapped_column(String(24))
+    priority: Mapped[int] = mapped_column(Integer, default=0)
+    result_codec: Mapped[str | None] = mapped_column(String(8), nullable=True)
+    result_compressed: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+
+
+class PlanLibraryEntry(Base):
+    # Normalized plans from completed LLM jobs, looked up by goal/topic
+    # similarity before asking the model again (app/services/plan_library.py).
+    __tablename__ = 'plan_library'
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    goal: Mapped[str] = mapped_column(String(180))
+    topic: Mapped[str] = mapped_column(String(120))
+    # HNSW (vector_cosine_ops) index created in migration 20261019_0008.
+    embedding: Mapped[list[float]] = mapped_column(Vector(256))
+    plan: Mapped[dict] = mapped_column(JSON)
+    source_job_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    hits: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+    last_used_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class OutboxEvent(Base):
+    __tablename__ = 'outbox_events'
+
+    # SQLite (unit tests) only autoincrements INTEGER primary keys.
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True
+    )
+    topic: Mapped[str] = mapped_column(String(64))
+    payload: Mapped[dict] = mapped_column(JSON, default=dict)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC), index=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+
+
 class DashboardDailyMetric(Base):
     __tablename__ = 'dashboard_daily_metrics'
     __table_args__ = (UniqueConstraint('user_id', 'metric_date', name='uq_metrics_user_day'),)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+import time
+
+from redis.exceptions import RedisError
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaPool:
+    # Round-robin over replica engines. A replica that fails to hand out a
+    # connection is skipped for `retry_seconds`, then tried again.
+
+    def __init__(self, engines: list[Engine], retry_seconds: float) -> None:
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._counter = itertools.count()
+        self._down_until: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def candidates(self) -> list[Engine]:
+        if not self.engines:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            start = next(self._counter) % len(self.engines)
+        ordered = self.engines[start:] + self.engines[:start]
+        return [engine for engine in ordered if self._down_until.get(id(engine), 0.0) <= now]
+
+    def mark_down(self, engine: Engine, exc: DBAPIError) -> None:
+        with self._lock:
+            self._down_until[id(engine)] = time.monotonic() + self.retry_seconds
+        metrics.increment('db.replica.failures')
+        logger.warning('Read replica unavailable, skipping for %ss: %s', self.retry_seconds, exc)
+
+
+def _sticky_key(user_id: str) -> str:
+    return f'db:primary-sticky:{user_id}'
+
+
+def mark_primary_sticky(user_id: str) -> None:
+    # Read-your-writes: after a user's write commits, their reads stay on the
+    # primary long enough for replicas to catch up.
+    if not settings.database_replica_urls:
+        return
+    try:
+        get_redis().set(_sticky_key(user_id), b'1', ex=settings.database_replica_sticky_seconds)
+    except RedisError as exc:
+        logger.warning('Failed to mark primary stickiness user_id=%s: %s', user_id, exc)
+
+
+def is_primary_sticky(user_id: str) -> bool:
+    try:
+        return bool(get_redis().exists(_sticky_key(user_id)))
+    except RedisError:
+        # Without the marker we cannot rule out a recent write.
+        return True
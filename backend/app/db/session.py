@@ -1,7 +1,82 @@
-from sqlalchemy import create_engine
+import logging
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 
+from app.core import metrics
 from app.core.config import settings
+from app.db.replicas import ReplicaPool, mark_primary_sticky
+
+logger = logging.getLogger(__name__)
+
+
+def _create_engine(url: str, name: str, *, pre_ping: bool = False) -> Engine:
+    options: dict = {'pool_pre_ping': settings.database_pool_pre_ping or pre_ping}
+    if settings.database_pgbouncer_mode:
+        # PgBouncer transaction pooling may run each transaction on a different
+        # server connection, so psycopg must not prepare statements server-side.
+        options['connect_args'] = {'prepare_threshold': None}
+    if settings.database_pool_mode == 'null':
+        options['poolclass'] = NullPool
+    else:
+        options.update(
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_recycle=settings.database_pool_recycle_seconds,
+            pool_timeout=settings.database_pool_timeout_seconds,
+        )
+
+    engine = create_engine(url, **options)
+
+    @event.listens_for(engine, 'handle_error')
+    def _on_error(context) -> None:
+        # Pessimistic on error instead of a pre-ping round trip per checkout:
+        # SQLAlchemy invalidates the pool on a disconnect and the next checkout
+        # opens fresh connections.
+        if context.is_disconnect:
+            metrics.increment(f'db.pool.{name}.disconnects')
+            logger.warning('Database connection lost on %s, pool invalidated', name)
+
+    def _collect_pool_metrics() -> None:
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            metrics.set_gauge(f'db.pool.{name}.size', pool.size())
+            metrics.set_gauge(f'db.pool.{name}.checked_out', pool.checkedout())
+            metrics.set_gauge(f'db.pool.{name}.checked_in', pool.checkedin())
+            metrics.set_gauge(f'db.pool.{name}.overflow', pool.overflow())
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+    metrics.register_collector(_collect_pool_metrics)
+    return engine
+
+
+engine = _create_engine(settings.database_url, 'primary')
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Replicas always pre-ping: `get_read_db` decides on checkout whether to fall
+# back to another replica or the primary, and a dead pooled connection would
+# otherwise only fail later, inside the request.
+replicas = ReplicaPool(
+    [
+        _create_engine(url, f'replica{index}', pre_ping=True)
+        for index, url in enumerate(settings.database_replica_urls)
+    ],
+    retry_seconds=settings.database_replica_retry_seconds,
+)
+
+
+def dispose_engines() -> None:
+    # Called in forked worker children: drop inherited pooled connections without
+    # closing them, since the parent still owns the sockets.
+    for item in [engine, *replicas.engines]:
+        item.dispose(close=False)
+
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _stick_to_primary(session) -> None:
+    # Sessions that know which user they act for (see `get_current_user`) keep
+    # that user's reads on the primary for a short while after each commit.
+    user_id = session.info.get('user_id')
+    if user_id:
+        mark_primary_sticky(user_id)
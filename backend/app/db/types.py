@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from sqlalchemy import Float
+from sqlalchemy.types import UserDefinedType
+
+
+class Vector(UserDefinedType):
+    # pgvector column without the pgvector Python package: values travel in the
+    # extension's text form ('[0.1,0.2]'). Other dialects store that text as is.
+    cache_ok = True
+    # psycopg binds '::VECTOR(n)' so the text form compares against the column.
+    render_bind_cast = True
+
+    def __init__(self, dimensions: int) -> None:
+        self.dimensions = dimensions
+
+    def get_col_spec(self, **_kwargs) -> str:
+        return f'VECTOR({self.dimensions})'
+
+    def bind_processor(self, dialect):
+        def process(value: list[float] | None) -> str | None:
+            if value is None:
+                return None
+            return '[' + ','.join(f'{item:.6g}' for item in value) + ']'
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value: str | None) -> list[float] | None:
+            if value is None:
+                return None
+            return [float(item) for item in value.strip('[]').split(',') if item]
+
+        return process
+
+    class comparator_factory(UserDefinedType.Comparator):
+        def cosine_distance(self, other):
+            # `<=>` is what the vector_cosine_ops HNSW index serves.
+            return self.op('<=>', return_type=Float)(other)
@@ -3,10 +3,28 @@ from fastapi import FastAPI
 from app.api.v1.router import api_router
 from app.core.config import settings
 from app.core.logging import configure_logging
+from app.core.middleware import CompressionMiddleware, RequestIdMiddleware
+from app.core.profiling import ProfilingMiddleware
 
 configure_logging()
 
 app = FastAPI(title=settings.app_name, debug=settings.debug)
+if settings.profiling_enabled:
+    # Added before RequestIdMiddleware so it runs inside it and sees the request id.
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=settings.profiling_dir,
+        sample_rate=settings.profiling_sample_rate,
+        token=settings.profiling_token,
+        interval_ms=settings.profiling_interval_ms,
+    )
+app.add_middleware(RequestIdMiddleware)
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_bytes,
+        encodings=settings.compression_encodings,
+    )
 app.include_router(api_router, prefix=settings.api_prefix)
 
 
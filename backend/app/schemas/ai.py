@@ -22,6 +22,9 @@ class JobResponse(BaseModel):
     status: str
     result: str | None = None
     result_structured: StructuredPlanResult | None = None
+    placeholder: bool = False
+    queue_position: int | None = None
+    eta_seconds: int | None = None
 
 
 class AiWeeklyStatusResponse(BaseModel):
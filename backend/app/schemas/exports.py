@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import Annotated, Literal
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+from app.schemas.plans import PlanMinutes, SessionMinutes
+
+
+# Imported records keep their exported `created_at`, so history, streaks and
+# weekly status come back as they were: a restored plan from the current week
+# is this week's plan, and generating another one is refused (409) as usual.
+class PlanRecord(BaseModel):
+    type: Literal['plan'] = 'plan'
+    id: str
+    title: str = Field(max_length=180)
+    topic: str = Field(max_length=120)
+    duration_minutes: PlanMinutes
+    status: Literal['pending', 'in_progress', 'done']
+    created_at: datetime
+
+
+class SessionRecord(BaseModel):
+    type: Literal['session'] = 'session'
+    id: str
+    plan_id: str | None
+    title: str = Field(max_length=180)
+    topic: str = Field(max_length=120)
+    duration_minutes: SessionMinutes
+    status: Literal['pending', 'in_progress', 'done']
+    scheduled_at: datetime | None
+    completed_at: datetime | None
+    created_at: datetime
+
+
+class JobRecord(BaseModel):
+    type: Literal['job'] = 'job'
+    id: str
+    goal: str = Field(max_length=180)
+    topic: str = Field(max_length=120)
+    status: str = Field(max_length=24)
+    result_text: str | None
+    error: str | None
+    created_at: datetime
+    updated_at: datetime
+
+
+ExportRecord = Annotated[PlanRecord | SessionRecord | JobRecord, Field(discriminator='type')]
+export_record_adapter: TypeAdapter[PlanRecord | SessionRecord | JobRecord] = TypeAdapter(
+    ExportRecord
+)
+
+
+class ImportResponse(BaseModel):
+    plans: int
+    sessions: int
+    jobs: int
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+from app.schemas.ai import AiWeeklyStatusResponse
+from app.schemas.dashboard import DashboardSummaryResponse
+from app.schemas.plans import StudyPlanResponse, StudySessionResponse
+from app.schemas.users import UserMeResponse
+
+
+class HomeResponse(BaseModel):
+    user: UserMeResponse
+    plans: list[StudyPlanResponse]
+    sessions: list[StudySessionResponse]
+    summary: DashboardSummaryResponse
+    ai: AiWeeklyStatusResponse
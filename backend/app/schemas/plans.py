@@ -1,12 +1,18 @@
-from pydantic import BaseModel
-from typing import Literal
 from datetime import datetime
+from typing import Annotated, Literal
+
+from pydantic import BaseModel, Field
+
+# A session fits in a day; a plan's total is bounded by its integer column.
+SessionMinutes = Annotated[int, Field(ge=1, le=24 * 60)]
+PlanMinutes = Annotated[int, Field(ge=0, le=2**31 - 1)]
 
 
 class StudyPlanCreateRequest(BaseModel):
     title: str
     topic: str
-    duration_minutes: int
+    # Also the duration of the plan's first session.
+    duration_minutes: SessionMinutes
 
 
 class StudyPlanResponse(BaseModel):
@@ -34,4 +40,4 @@ class StudySessionResponse(BaseModel):
 class StudySessionCreateRequest(BaseModel):
     title: str
     topic: str
-    duration_minutes: int
+    duration_minutes: SessionMinutes
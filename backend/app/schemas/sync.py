@@ -0,0 +1,23 @@
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class SyncTable(BaseModel):
+    # Column names once, then one positional row per changed record.
+    fields: list[str]
+    rows: list[list[Any]]
+
+
+class SyncDeleted(BaseModel):
+    plans: list[str]
+    sessions: list[str]
+
+
+class SyncResponse(BaseModel):
+    cursor: int
+    has_more: bool
+    reset: bool = False
+    plans: SyncTable
+    sessions: SyncTable
+    deleted: SyncDeleted
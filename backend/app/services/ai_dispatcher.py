@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import logging
+import math
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.models import AiJob
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+GENERATE_TASK = 'app.workers.tasks.ai_tasks.generate_plan_task'
+GENERATE_BATCH_TASK = 'app.workers.tasks.ai_tasks.generate_plan_batch_task'
+DISPATCH_TASK = 'app.workers.tasks.maintenance_tasks.dispatch_ai_jobs_task'
+
+# Higher runs first. API requests use PRIORITY_INTERACTIVE; jobs created
+# without a priority (column default 0) run after them.
+PRIORITY_INTERACTIVE = 10
+LIVE_STATUSES = ('queued', 'running')
+
+# Jobs wait in `ai_jobs` (queued, not dispatched) and are released to Celery a
+# few at a time, so the broker queue stays short and the order below decides
+# who runs next: by priority, then round-robin across users, then age.
+
+
+def _waiting_jobs():
+    user_rank = (
+        func.row_number()
+        .over(partition_by=AiJob.user_id, order_by=(AiJob.priority.desc(), AiJob.created_at.asc()))
+        .label('user_rank')
+    )
+    waiting = (
+        select(AiJob.id, AiJob.priority, AiJob.created_at, user_rank)
+        .where(AiJob.status == 'queued', AiJob.dispatched_at.is_(None))
+        .subquery()
+    )
+    order = (waiting.c.priority.desc(), waiting.c.user_rank.asc(), waiting.c.created_at.asc())
+    return waiting, order
+
+
+def _stale_before(now: datetime) -> datetime:
+    return now - timedelta(seconds=settings.ai_dispatch_stale_seconds)
+
+
+def _expired_before(now: datetime) -> datetime:
+    return now - timedelta(seconds=settings.ai_job_timeout_seconds)
+
+
+def live_job_filter(now: datetime):
+    # Queued or running and still expected to finish: not past the job timeout,
+    # and not dispatched so long ago that the message must have been lost.
+    return and_(
+        AiJob.status.in_(LIVE_STATUSES),
+        AiJob.created_at >= _expired_before(now),
+        or_(AiJob.dispatched_at.is_(None), AiJob.dispatched_at >= _stale_before(now)),
+    )
+
+
+def _in_flight_count(db: Session, now: datetime) -> int:
+    # Dispatched jobs that never finish (lost worker, lost message) stop
+    # counting after the stale window so they cannot block dispatch forever.
+    return db.scalar(
+        select(func.count())
+        .select_from(AiJob)
+        .where(AiJob.status.in_(LIVE_STATUSES), AiJob.dispatched_at >= _stale_before(now))
+    ) or 0
+
+
+def recover_stale_jobs(db: Session, now: datetime) -> tuple[int, int]:
+    # A queued job whose message was lost (broker restart, lost retry) is handed
+    # back to the dispatcher once the stale window has passed. A job still
+    # running by then lost its worker or is stuck: requeueing it could run it
+    # twice, so it fails like a job that could not finish within
+    # AI_JOB_TIMEOUT_SECONDS, and the user can ask again. Workers only run jobs
+    # they claim from `queued`, so a late original message is skipped.
+    failed = db.execute(
+        update(AiJob)
+        .where(AiJob.status.in_(LIVE_STATUSES), AiJob.created_at < _expired_before(now))
+        .values(
+            status='failed',
+            error='Timed out waiting for a worker',
+            dispatched_at=None,
+            updated_at=now,
+        )
+    ).rowcount
+    stalled = db.execute(
+        update(AiJob)
+        .where(AiJob.status == 'running', AiJob.dispatched_at < _stale_before(now))
+        .values(status='failed', error='Worker stopped responding', updated_at=now)
+    ).rowcount
+    requeued = db.execute(
+        update(AiJob)
+        .where(AiJob.status == 'queued', AiJob.dispatched_at < _stale_before(now))
+        .values(dispatched_at=None, updated_at=now)
+    ).rowcount
+    db.commit()
+    if failed or stalled or requeued:
+        metrics.increment('ai.dispatch.requeued', requeued)
+        metrics.increment('ai.dispatch.timed_out', failed)
+        metrics.increment('ai.dispatch.stalled', stalled)
+        logger.warning(
+            'Recovered stale AI jobs requeued=%d failed=%d stalled=%d', requeued, failed, stalled
+        )
+    return requeued, failed + stalled
+
+
+def _celery():
+    # Imported on first enqueue: building the Celery app loads celery, kombu and
+    # the worker modules, which most API requests never need.
+    from app.workers.celery_app import celery_app
+
+    return celery_app
+
+
+def _batches(jobs: list, size: int) -> list[list]:
+    size = max(size, 1)
+    return [jobs[start : start + size] for start in range(0, len(jobs), size)]
+
+
+def _should_collect(rows: list, free_slots: int, now: datetime) -> bool:
+    # Micro-batching: with a parallel model server, a lone new job waits up to
+    # AI_BATCH_WINDOW_MS for company, so one worker slot carries a full batch.
+    # A delayed dispatch run picks it up once the window has passed.
+    batch_size = min(settings.ollama_num_parallel, free_slots)
+    if batch_size <= 1 or len(rows) >= batch_size:
+        return False
+    waited = (now - min(row.created_at for row in rows)).total_seconds()
+    remaining = settings.ai_batch_window_ms / 1000 - waited
+    if remaining <= 0:
+        return False
+    try:
+        _celery().send_task(DISPATCH_TASK, countdown=remaining)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning('Could not schedule batch dispatch, dispatching now: %s', exc)
+        return False
+    metrics.increment('ai.dispatch.collecting')
+    return True
+
+
+def dispatch_pending_jobs() -> int:
+    # Safe to call concurrently: the conditional UPDATE hands each job to exactly one caller.
+    db = SessionLocal()
+    try:
+        now = datetime.now(UTC)
+        free_slots = settings.ai_dispatch_max_in_flight - _in_flight_count(db, now)
+        if free_slots <= 0:
+            return 0
+
+        waiting, order = _waiting_jobs()
+        rows = db.execute(
+            select(waiting.c.id, waiting.c.created_at).order_by(*order).limit(free_slots)
+        ).all()
+        if not rows:
+            return 0
+        if _should_collect(rows, free_slots, now):
+            return 0
+        job_ids = [row.id for row in rows]
+
+        claimed = db.execute(
+            update(AiJob)
+            .where(AiJob.id.in_(job_ids), AiJob.dispatched_at.is_(None))
+            .values(dispatched_at=now)
+            .returning(AiJob.id, AiJob.goal, AiJob.topic, AiJob.created_at)
+        ).all()
+        db.commit()
+
+        sent = 0
+        celery_app = _celery()
+        try:
+            # One broker connection for the whole batch.
+            with celery_app.producer_or_acquire() as producer:
+                for batch in _batches(claimed, settings.ollama_num_parallel):
+                    jobs = [
+                        {'job_id': job.id, 'goal': job.goal, 'topic': job.topic} for job in batch
+                    ]
+                    if len(jobs) == 1:
+                        celery_app.send_task(GENERATE_TASK, kwargs=jobs[0], producer=producer)
+                    else:
+                        celery_app.send_task(
+                            GENERATE_BATCH_TASK, kwargs={'jobs': jobs}, producer=producer
+                        )
+                    for job in batch:
+                        waited = (now - job.created_at).total_seconds()
+                        metrics.observe('ai.dispatch.wait_seconds', waited)
+                    sent += len(batch)
+        finally:
+            unsent = [job.id for job in claimed[sent:]]
+            if unsent:
+                # Broker publish failed: put the rest back for the next dispatch.
+                db.execute(update(AiJob).where(AiJob.id.in_(unsent)).values(dispatched_at=None))
+                db.commit()
+
+        metrics.increment('ai.dispatch.sent', sent)
+        logger.info('Dispatched AI jobs count=%d free_slots=%d', sent, free_slots)
+        return sent
+    finally:
+        db.close()
+
+
+def queue_position(db: Session, job_id: str) -> int | None:
+    # 1-based position among jobs not yet handed to a worker, in dispatch order.
+    waiting, order = _waiting_jobs()
+    ranked = select(
+        waiting.c.id, func.row_number().over(order_by=order).label('position')
+    ).subquery()
+    return db.scalar(select(ranked.c.position).where(ranked.c.id == job_id))
+
+
+def estimate_wait_seconds(db: Session, position: int) -> int | None:
+    # Based on how many jobs finished recently; unknown when nothing finished.
+    window = settings.ai_throughput_window_seconds
+    finished = db.scalar(
+        select(func.count())
+        .select_from(AiJob)
+        .where(
+            AiJob.status.in_(('completed', 'failed')),
+            AiJob.updated_at >= datetime.now(UTC) - timedelta(seconds=window),
+        )
+    )
+    if not finished:
+        return None
+    return math.ceil(position * window / finished)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import logging
+import re
+import zlib
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import column, select, table, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.db.models import AiJob, AiJobArchive
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional extra
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# ai_jobs is range-partitioned by month (ai_jobs_pYYYYMM, UTC bounds). Whole
+# months past the retention window are copied into ai_jobs_archive with the
+# model output compressed, then the partition is dropped: no bulk DELETE, no
+# vacuum debt on the hot table.
+
+_PARTITION_NAME = re.compile(r'^ai_jobs_p(\d{4})(\d{2})$')
+# Archived rows are written once and rarely read, so spend CPU on ratio.
+_ZSTD_LEVEL = 10
+_ZLIB_LEVEL = 9
+
+
+def compress_result(result_text: str | None) -> tuple[str | None, bytes | None]:
+    if result_text is None:
+        return None, None
+    raw = result_text.encode()
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(raw)
+    return 'zlib', zlib.compress(raw, _ZLIB_LEVEL)
+
+
+def decompress_result(codec: str | None, data: bytes | None) -> str | None:
+    if data is None:
+        return None
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('zstandard is required to read this archived job')
+        return zstandard.ZstdDecompressor().decompress(data).decode()
+    return zlib.decompress(data).decode()
+
+
+def next_month(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(month: date) -> str:
+    return f'ai_jobs_p{month:%Y%m}'
+
+
+def partition_month(name: str) -> date | None:
+    match = _PARTITION_NAME.match(name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def expired_months(months: list[date], today: date, retention_days: int) -> list[date]:
+    # A month goes only once all of it is older than the retention window.
+    cutoff = today - timedelta(days=retention_days)
+    return sorted(month for month in months if next_month(month) <= cutoff)
+
+
+def ensure_partitions(db: Session, today: date, months_ahead: int) -> list[str]:
+    created: list[str] = []
+    month = today.replace(day=1)
+    for _ in range(months_ahead + 1):
+        name = partition_name(month)
+        upper = next_month(month)
+        if db.scalar(text('SELECT to_regclass(:name)'), {'name': name}) is None:
+            _create_partition(db, name, month, upper)
+            created.append(name)
+        month = upper
+    return created
+
+
+def _create_partition(db: Session, name: str, month: date, upper: date) -> None:
+    bounds = {'lower': f'{month} 00:00:00+00', 'upper': f'{upper} 00:00:00+00'}
+    create = text(
+        f'CREATE TABLE {name} PARTITION OF ai_jobs '
+        f"FOR VALUES FROM ('{bounds['lower']}') TO ('{bounds['upper']}')"
+    )
+    # Postgres refuses to create a partition while the default partition holds
+    # rows for its range (the task did not run for a while): take the default
+    # out, create the month, move its rows over and put the default back.
+    stranded = db.scalar(
+        text(
+            'SELECT EXISTS (SELECT 1 FROM ai_jobs_default '
+            'WHERE created_at >= :lower AND created_at < :upper)'
+        ),
+        bounds,
+    )
+    if not stranded:
+        db.execute(create)
+        return
+
+    db.execute(text("SET LOCAL lock_timeout = '5s'"))
+    db.execute(text('ALTER TABLE ai_jobs DETACH PARTITION ai_jobs_default'))
+    db.execute(create)
+    columns = ', '.join(col.name for col in AiJob.__table__.columns)
+    moved = db.execute(
+        text(
+            'WITH moved AS ('
+            'DELETE FROM ai_jobs_default WHERE created_at >= :lower AND created_at < :upper '
+            f'RETURNING {columns}) '
+            f'INSERT INTO {name} ({columns}) SELECT {columns} FROM moved'
+        ),
+        bounds,
+    ).rowcount
+    db.execute(text('ALTER TABLE ai_jobs ATTACH PARTITION ai_jobs_default DEFAULT'))
+    logger.info('Moved ai_jobs rows out of the default partition name=%s rows=%d', name, moved)
+
+
+def list_partitions(db: Session) -> dict[str, date]:
+    names = db.scalars(
+        text(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            "WHERE pg_inherits.inhparent = 'ai_jobs'::regclass"
+        )
+    )
+    # The DEFAULT partition does not parse and is never archived.
+    return {name: month for name in names if (month := partition_month(name)) is not None}
+
+
+def _copy_to_archive(db: Session, rows, archived_at: datetime) -> int:
+    values = []
+    for row in rows:
+        codec, compressed = compress_result(row.result_text)
+        values.append(
+            {
+                'id': row.id,
+                'user_id': row.user_id,
+                'goal': row.goal,
+                'topic': row.topic,
+                'status': row.status,
+                'priority': row.priority,
+                'result_codec': codec,
+                'result_compressed': compressed,
+                'error': row.error,
+                'created_at': row.created_at,
+                'updated_at': row.updated_at,
+                'archived_at': archived_at,
+            }
+        )
+    if values:
+        # A rerun after a crash between copy and drop finds the rows already there.
+        db.execute(pg_insert(AiJobArchive).on_conflict_do_nothing(index_elements=['id']), values)
+    return len(values)
+
+
+def archive_partition(db: Session, name: str, batch_size: int) -> int:
+    if partition_month(name) is None:
+        raise ValueError(f'Not a monthly ai_jobs partition: {name}')
+    source = table(name, *(column(col.name) for col in AiJob.__table__.columns))
+    rows = db.execute(select(source).execution_options(yield_per=batch_size))
+    archived_at = datetime.now(UTC)
+    moved = 0
+    for batch in rows.partitions():
+        moved += _copy_to_archive(db, batch, archived_at)
+    # Dropping a partition briefly locks the parent; give up rather than queue
+    # behind long readers, the next run retries.
+    db.execute(text("SET LOCAL lock_timeout = '5s'"))
+    db.execute(text(f'DROP TABLE {name}'))
+    logger.info('Archived ai_jobs partition name=%s rows=%d', name, moved)
+    return moved
+
+
+def archive_default_rows(db: Session, before: datetime, batch_size: int) -> int:
+    # Old rows that landed in ai_jobs_default (e.g. imported history whose month
+    # was already archived) are moved row by row instead.
+    archived_at = datetime.now(UTC)
+    moved = 0
+    while True:
+        rows = db.execute(
+            text(
+                'DELETE FROM ai_jobs_default WHERE ctid IN ('
+                'SELECT ctid FROM ai_jobs_default WHERE created_at < :before LIMIT :limit) '
+                'RETURNING *'
+            ),
+            {'before': before, 'limit': batch_size},
+        ).all()
+        if not rows:
+            return moved
+        moved += _copy_to_archive(db, rows, archived_at)
+
+
+def get_archived_job(db: Session, user_id: str, job_id: str) -> AiJobArchive | None:
+    return db.scalar(
+        select(AiJobArchive).where(AiJobArchive.id == job_id, AiJobArchive.user_id == user_id)
+    )
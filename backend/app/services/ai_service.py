@@ -2,44 +2,135 @@ import logging
 
 import httpx
 
+from app.core import metrics
 from app.core.config import settings
+from app.services.circuit_breaker import CircuitBreaker
 
 logger = logging.getLogger(__name__)
 
+ollama_breaker = CircuitBreaker(
+    'ollama',
+    failure_threshold=settings.ollama_circuit_failure_threshold,
+    window_seconds=settings.ollama_circuit_window_seconds,
+    open_seconds=settings.ollama_circuit_open_seconds,
+)
+
+
+class AiServiceUnavailableError(Exception):
+    pass
+
+
+class AiRequestRejectedError(Exception):
+    # Ollama answered 4xx (unknown model, bad request): a configuration problem,
+    # not an outage, so it is neither retried nor counted by the breaker.
+    pass
+
+
+class CircuitOpenError(AiServiceUnavailableError):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f'AI model circuit open, retry in {retry_after:.0f}s')
+        self.retry_after = retry_after
+
+
+# Everything fixed goes into `system`, ahead of the per-job goal and topic, so
+# the rendered prompt always starts with the same tokens and Ollama reuses its
+# cached prefix while the model stays loaded (`keep_alive`).
+SYSTEM_PROMPT = (
+    'You write study plans. Return ONLY valid JSON with this exact shape:\n'
+    '{\n'
+    '  "title": "string",\n'
+    '  "summary": "string",\n'
+    '  "steps": [\n'
+    '    {"title": "string", "detail": "string"}\n'
+    '  ]\n'
+    '}\n\n'
+    'Rules:\n'
+    '- Keep steps actionable and concise.\n'
+    '- Use 6-10 steps.\n'
+    '- Do not include markdown, checklist markers, or prose outside JSON.\n'
+)
+_NANOSECONDS = 1e9
+
+
+def _request_body(prompt: str, *, num_predict: int | None = None) -> dict:
+    options: dict = {
+        'temperature': 0.2,
+        'num_predict': settings.ollama_num_predict if num_predict is None else num_predict,
+        'num_ctx': settings.ollama_num_ctx,
+    }
+    if settings.ollama_stop:
+        options['stop'] = settings.ollama_stop
+    return {
+        'model': settings.ollama_model,
+        'system': SYSTEM_PROMPT,
+        'prompt': prompt,
+        'stream': False,
+        'format': 'json',
+        'keep_alive': settings.ollama_keep_alive,
+        'options': options,
+    }
+
+
+def record_generation_metrics(payload: dict) -> None:
+    # Ollama reports durations in nanoseconds. Without streaming, time to first
+    # token is what the server spent before decoding: model load + prompt eval.
+    load = payload.get('load_duration', 0) / _NANOSECONDS
+    prompt_eval = payload.get('prompt_eval_duration', 0) / _NANOSECONDS
+    metrics.observe('ai.ollama.ttft_seconds', load + prompt_eval)
+    metrics.observe('ai.ollama.load_seconds', load)
+    metrics.observe('ai.ollama.prompt_tokens', payload.get('prompt_eval_count', 0))
+    output_tokens = payload.get('eval_count', 0)
+    metrics.observe('ai.ollama.output_tokens', output_tokens)
+    eval_seconds = payload.get('eval_duration', 0) / _NANOSECONDS
+    if eval_seconds:
+        metrics.observe('ai.ollama.tokens_per_second', output_tokens / eval_seconds)
+    if payload.get('done_reason') == 'length':
+        metrics.increment('ai.ollama.truncated')
+
+
+def warm_up_model() -> bool:
+    # Loads the model and fills the prompt cache with SYSTEM_PROMPT before the
+    # first job, so that job does not pay a cold load against its timeout.
+    body = _request_body('Goal: warm-up\nTopic: warm-up', num_predict=1)
+    try:
+        with httpx.Client(timeout=settings.ollama_warmup_timeout_seconds) as client:
+            response = client.post(f'{settings.ollama_base_url}/api/generate', json=body)
+            response.raise_for_status()
+            payload = response.json()
+    except (httpx.HTTPError, ValueError) as exc:
+        logger.warning('Ollama warm-up failed: %s', exc)
+        return False
+    load = payload.get('load_duration', 0) / _NANOSECONDS
+    metrics.observe('ai.ollama.warmup_seconds', payload.get('total_duration', 0) / _NANOSECONDS)
+    logger.info('Ollama model warm model=%s load=%.1fs', settings.ollama_model, load)
+    return True
+
 
 def generate_study_plan(goal: str, topic: str) -> str:
-    prompt = (
-        'Return ONLY valid JSON with this exact shape:\n'
-        '{\n'
-        '  "title": "string",\n'
-        '  "summary": "string",\n'
-        '  "steps": [\n'
-        '    {"title": "string", "detail": "string"}\n'
-        '  ]\n'
-        '}\n\n'
-        f'Goal: {goal}\n'
-        f'Topic: {topic}\n\n'
-        'Rules:\n'
-        '- Keep steps actionable and concise.\n'
-        '- Use 6-10 steps.\n'
-        '- Do not include markdown, checklist markers, or prose outside JSON.\n'
-    )
+    if not ollama_breaker.allow_request():
+        raise CircuitOpenError(ollama_breaker.retry_after())
 
     try:
-        with httpx.Client(timeout=30.0) as client:
+        with httpx.Client(timeout=settings.ollama_timeout_seconds) as client:
             response = client.post(
                 f"{settings.ollama_base_url}/api/generate",
-                json={
-                    'model': settings.ollama_model,
-                    'prompt': prompt,
-                    'stream': False,
-                    'format': 'json',
-                    'options': {'temperature': 0.2},
-                },
+                json=_request_body(f'Goal: {goal}\nTopic: {topic}'),
             )
             response.raise_for_status()
             payload = response.json()
-            return payload.get('response', 'No response')
-    except Exception as exc:  # noqa: BLE001
+    except (httpx.HTTPError, ValueError) as exc:
+        if isinstance(exc, httpx.HTTPStatusError) and exc.response.is_client_error:
+            # The server is up and answering.
+            ollama_breaker.record_success()
+            logger.error('Ollama rejected the request: %s', exc)
+            raise AiRequestRejectedError(f'Ollama rejected the request: {exc}') from exc
+        ollama_breaker.record_failure()
         logger.warning('Ollama request failed: %s', exc)
-        return 'AI generation unavailable, fallback response.'
+        raise AiServiceUnavailableError(f'Ollama request failed: {exc}') from exc
+
+    ollama_breaker.record_success()
+    record_generation_metrics(payload)
+    text = payload.get('response')
+    if not isinstance(text, str) or not text.strip():
+        raise AiServiceUnavailableError('Ollama returned no response text')
+    return text
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from redis.exceptions import RedisError
+
+from app.core import metrics
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    # State lives in Redis so every API and worker process sees the same circuit.
+    # Redis failures fail open: the breaker must never be the reason a call is refused.
+
+    def __init__(
+        self, name: str, *, failure_threshold: int, window_seconds: int, open_seconds: int
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self._failures_key = f'circuit:{name}:failures'
+        self._open_until_key = f'circuit:{name}:open_until'
+        self._probe_key = f'circuit:{name}:probe'
+
+    def _open_until(self) -> float | None:
+        value = get_redis().get(self._open_until_key)
+        return float(value) if value is not None else None
+
+    def retry_after(self) -> float:
+        try:
+            open_until = self._open_until()
+        except RedisError:
+            return 0.0
+        return max(open_until - time.time(), 0.0) if open_until else 0.0
+
+    def allow_request(self) -> bool:
+        try:
+            open_until = self._open_until()
+            if open_until is None:
+                return True
+            if time.time() < open_until:
+                metrics.increment(f'circuit.{self.name}.rejected')
+                return False
+            # Half-open: a single probe goes through, everyone else waits for its outcome.
+            return bool(get_redis().set(self._probe_key, b'1', nx=True, ex=self.open_seconds))
+        except RedisError as exc:
+            logger.warning('Circuit %s state unavailable: %s', self.name, exc)
+            return True
+
+    def record_success(self) -> None:
+        try:
+            get_redis().delete(self._failures_key, self._open_until_key, self._probe_key)
+        except RedisError as exc:
+            logger.warning('Circuit %s reset failed: %s', self.name, exc)
+
+    def record_failure(self) -> None:
+        try:
+            client = get_redis()
+            pipeline = client.pipeline()
+            pipeline.incr(self._failures_key)
+            pipeline.expire(self._failures_key, self.window_seconds, nx=True)
+            pipeline.exists(self._probe_key)
+            failures, _, probing = pipeline.execute()
+
+            if not probing and failures < self.failure_threshold:
+                return
+
+            pipeline = client.pipeline()
+            # The open marker outlives the open window so the circuit stays half-open
+            # until a probe succeeds.
+            pipeline.set(
+                self._open_until_key, time.time() + self.open_seconds, ex=self.open_seconds * 10
+            )
+            pipeline.delete(self._failures_key, self._probe_key)
+            pipeline.execute()
+        except RedisError as exc:
+            logger.warning('Circuit %s failure not recorded: %s', self.name, exc)
+            return
+
+        metrics.increment(f'circuit.{self.name}.opened')
+        logger.warning('Circuit %s opened for %ss', self.name, self.open_seconds)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+
+from redis.exceptions import RedisError
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.schemas.dashboard import DashboardSummaryResponse
+
+logger = logging.getLogger(__name__)
+
+_LOCK_TTL_MS = 5_000
+_LOCK_WAIT_SECONDS = 2.0
+_LOCK_POLL_SECONDS = 0.05
+_VERSION_TTL_SECONDS = 2 * 24 * 60 * 60
+
+# Entries live under a per-user version so an invalidation that races with a
+# recompute can never be overwritten by the stale result.
+_READ_SCRIPT = """
+local version = redis.call('GET', KEYS[1]) or '0'
+return {version, redis.call('GET', KEYS[1] .. ':' .. version .. ':' .. ARGV[1])}
+"""
+
+
+@lru_cache
+def _read_script():
+    return get_redis().register_script(_READ_SCRIPT)
+
+
+def _version_key(user_id: str) -> str:
+    return f'dashboard:summary:{user_id}'
+
+
+def _seconds_until_utc_midnight(now: datetime) -> int:
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=UTC)
+    return max(int((midnight - now).total_seconds()), 1)
+
+
+def get_or_compute_summary(
+    user_id: str,
+    range_key: str,
+    compute: Callable[[], DashboardSummaryResponse],
+) -> bytes:
+    if not settings.dashboard_cache_enabled:
+        return compute().model_dump_json().encode()
+
+    now = datetime.now(UTC)
+    # The UTC day is part of the key so streak and "today" counts roll over at midnight.
+    entry_suffix = f'{range_key}:{now.date().isoformat()}'
+    version_key = _version_key(user_id)
+
+    try:
+        client = get_redis()
+        version, cached = _read_script()(keys=[version_key], args=[entry_suffix])
+    except RedisError as exc:
+        metrics.increment('dashboard_cache.errors')
+        logger.warning('Dashboard cache read failed: %s', exc)
+        return compute().model_dump_json().encode()
+
+    if cached is not None:
+        metrics.increment('dashboard_cache.hits')
+        return cached
+
+    metrics.increment('dashboard_cache.misses')
+    entry_key = f'{version_key}:{version.decode()}:{entry_suffix}'
+    lock_key = f'{entry_key}:lock'
+
+    try:
+        acquired = bool(client.set(lock_key, b'1', nx=True, px=_LOCK_TTL_MS))
+        if not acquired:
+            waited = _wait_for_entry(client, entry_key)
+            if waited is not None:
+                metrics.increment('dashboard_cache.stampede_waits')
+                return waited
+
+        payload = compute().model_dump_json().encode()
+        ttl = min(settings.dashboard_cache_ttl_seconds, _seconds_until_utc_midnight(now))
+        client.set(entry_key, payload, ex=ttl)
+        if acquired:
+            client.delete(lock_key)
+        return payload
+    except RedisError as exc:
+        metrics.increment('dashboard_cache.errors')
+        logger.warning('Dashboard cache write failed: %s', exc)
+        return compute().model_dump_json().encode()
+
+
+def _wait_for_entry(client, entry_key: str) -> bytes | None:
+    deadline = time.monotonic() + _LOCK_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(_LOCK_POLL_SECONDS)
+        cached = client.get(entry_key)
+        if cached is not None:
+            return cached
+    return None
+
+
+def summary_version(user_id: str) -> str | None:
+    # Bumped by every invalidation; None when Redis cannot be read.
+    try:
+        version = get_redis().get(_version_key(user_id))
+    except RedisError as exc:
+        metrics.increment('dashboard_cache.errors')
+        logger.warning('Dashboard cache version read failed: %s', exc)
+        return None
+    return version.decode() if version else '0'
+
+
+def invalidate_dashboard_summary(user_id: str) -> None:
+    try:
+        pipeline = get_redis().pipeline()
+        pipeline.incr(_version_key(user_id))
+        pipeline.expire(_version_key(user_id), _VERSION_TTL_SECONDS)
+        pipeline.execute()
+    except RedisError as exc:
+        metrics.increment('dashboard_cache.errors')
+        logger.warning('Dashboard cache invalidation failed user_id=%s: %s', user_id, exc)
+
+
+def bump_summary_versions(user_ids: list[str]) -> None:
+    # Raises RedisError; the outbox relay retries on failure.
+    pipeline = get_redis().pipeline(transaction=False)
+    for user_id in user_ids:
+        pipeline.incr(_version_key(user_id))
+        pipeline.expire(_version_key(user_id), _VERSION_TTL_SECONDS)
+    pipeline.execute()
+
+
+def invalidate_dashboard_summaries(user_ids: list[str]) -> None:
+    if not user_ids:
+        return
+    try:
+        bump_summary_versions(user_ids)
+    except RedisError as exc:
+        metrics.increment('dashboard_cache.errors')
+        logger.warning('Dashboard cache invalidation failed for %d users: %s', len(user_ids), exc)
+
+
+def _collect_hit_ratio() -> None:
+    hits = metrics.counter_value('dashboard_cache.hits')
+    lookups = hits + metrics.counter_value('dashboard_cache.misses')
+    metrics.set_gauge('dashboard_cache.hit_ratio', hits / lookups if lookups else 0.0)
+
+
+metrics.register_collector(_collect_hit_ratio)
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterable, Iterator
+from datetime import UTC, datetime
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import AiJob, AiJobArchive, StudyPlan, StudySession
+from app.schemas.exports import (
+    ImportResponse,
+    JobRecord,
+    PlanRecord,
+    SessionRecord,
+    export_record_adapter,
+)
+from app.services.ai_job_archive import decompress_result
+from app.services.streaming import iter_ndjson, record_columns
+from app.services.user_stats import recompute_user_stats
+
+# Exports read through server-side cursors (`yield_per` turns on `stream_results`)
+# and emit one chunk per partition, so memory stays flat for any history size.
+
+_ICS_LINE_OCTETS = 75
+_ICS_HEADER = (
+    'BEGIN:VCALENDAR\r\n'
+    'VERSION:2.0\r\n'
+    'PRODID:-//Schediora//Study Sessions//EN\r\n'
+    'CALSCALE:GREGORIAN\r\n'
+    'X-WR-CALNAME:Schediora\r\n'
+)
+_ICS_FOOTER = 'END:VCALENDAR\r\n'
+
+
+class DataImportError(ValueError):
+    pass
+
+
+def _ics_time(value: datetime) -> str:
+    return value.astimezone(UTC).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _ics_escape(value: str) -> str:
+    return (
+        value.replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def _ics_line(line: str) -> str:
+    # RFC 5545 content lines are folded at 75 octets without splitting a UTF-8 character.
+    if len(line.encode()) <= _ICS_LINE_OCTETS:
+        return line + '\r\n'
+    parts: list[str] = []
+    current: list[str] = []
+    size = 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > _ICS_LINE_OCTETS:
+            parts.append(''.join(current))
+            current = []
+            size = 1  # the leading space of the continuation line
+        current.append(char)
+        size += width
+    parts.append(''.join(current))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _ics_event(row, stamp: str) -> str:
+    return ''.join(
+        (
+            'BEGIN:VEVENT\r\n',
+            _ics_line(f'UID:{row.id}@schediora'),
+            f'DTSTAMP:{stamp}\r\n',
+            f'DTSTART:{_ics_time(row.scheduled_at)}\r\n',
+            f'DURATION:PT{row.duration_minutes}M\r\n',
+            _ics_line(f'SUMMARY:{_ics_escape(row.title)}'),
+            _ics_line(f'CATEGORIES:{_ics_escape(row.topic)}'),
+            'STATUS:CONFIRMED\r\n',
+            'END:VEVENT\r\n',
+        )
+    )
+
+
+def iter_sessions_ics(db: Session, user_id: str) -> Iterator[bytes]:
+    stamp = _ics_time(datetime.now(UTC))
+    query = (
+        select(
+            StudySession.id,
+            StudySession.title,
+            StudySession.topic,
+            StudySession.duration_minutes,
+            StudySession.scheduled_at,
+        )
+        .where(StudySession.user_id == user_id, StudySession.scheduled_at.is_not(None))
+        .order_by(StudySession.scheduled_at.asc(), StudySession.id.asc())
+        .execution_options(yield_per=settings.export_batch_size)
+    )
+
+    yield _ICS_HEADER.encode()
+    for partition in db.execute(query).partitions():
+        yield ''.join(_ics_event(row, stamp) for row in partition).encode()
+    yield _ICS_FOOTER.encode()
+
+
+def iter_user_ndjson(db: Session, user_id: str) -> Iterator[bytes]:
+    # Plans come first so an import can resolve every session's plan_id on the fly.
+    sources = (
+        (PlanRecord, StudyPlan),
+        (SessionRecord, StudySession),
+        (JobRecord, AiJob),
+    )
+    for record, model in sources:
+        query = (
+            select(*record_columns(model, record))
+            .where(model.user_id == user_id)
+            .order_by(model.created_at.asc(), model.id.asc())
+        )
+        yield from iter_ndjson(db, query, record)
+    yield from _iter_archived_jobs_ndjson(db, user_id)
+
+
+def _iter_archived_jobs_ndjson(db: Session, user_id: str) -> Iterator[bytes]:
+    # Same `job` records as live jobs, so an import cannot tell them apart.
+    query = (
+        select(AiJobArchive)
+        .where(AiJobArchive.user_id == user_id)
+        .order_by(AiJobArchive.created_at.asc(), AiJobArchive.id.asc())
+        .execution_options(yield_per=settings.export_batch_size)
+    )
+    for partition in db.scalars(query).partitions():
+        yield ''.join(
+            JobRecord(
+                id=job.id,
+                goal=job.goal,
+                topic=job.topic,
+                status=job.status,
+                result_text=decompress_result(job.result_codec, job.result_compressed),
+                error=job.error,
+                created_at=job.created_at,
+                updated_at=job.updated_at,
+            ).model_dump_json()
+            + '\n'
+            for job in partition
+        ).encode()
+
+
+class NdjsonImporter:
+    # Records get fresh ids so an export can be imported next to the original data.
+    # Only the plan id mapping is kept across chunks; everything else is flushed.
+
+    def __init__(self, db: Session, user_id: str) -> None:
+        self.db = db
+        self.user_id = user_id
+        self.line_number = 0
+        self.plan_ids: dict[str, str] = {}
+        self.counts = {'plans': 0, 'sessions': 0, 'jobs': 0}
+
+    def import_lines(self, lines: Iterable[bytes]) -> None:
+        plans: list[dict] = []
+        sessions: list[dict] = []
+        jobs: list[dict] = []
+
+        for line in lines:
+            self.line_number += 1
+            if not line.strip():
+                continue
+            try:
+                record = export_record_adapter.validate_json(line)
+            except ValidationError as exc:
+                message = exc.errors()[0]['msg']
+                raise DataImportError(f'line {self.line_number}: {message}') from exc
+
+            values = record.model_dump(exclude={'type', 'id'})
+            values['id'] = str(uuid.uuid4())
+            values['user_id'] = self.user_id
+            if isinstance(record, PlanRecord):
+                self.plan_ids[record.id] = values['id']
+                plans.append(values)
+            elif isinstance(record, SessionRecord):
+                values['plan_id'] = self.plan_ids.get(record.plan_id) if record.plan_id else None
+                sessions.append(values)
+            else:
+                if values['status'] in ('queued', 'running'):
+                    # Never re-run imported jobs; the dispatcher would pick them up otherwise.
+                    values['status'] = 'failed'
+                    values['error'] = values['error'] or 'Imported while still in progress'
+                jobs.append(values)
+
+        # executemany with insertmanyvalues: one round trip per chunk and table.
+        batches = (
+            (StudyPlan, plans, 'plans'),
+            (StudySession, sessions, 'sessions'),
+            (AiJob, jobs, 'jobs'),
+        )
+        for model, rows, key in batches:
+            if rows:
+                self.db.execute(insert(model), rows)
+                self.counts[key] += len(rows)
+
+    def finish(self) -> ImportResponse:
+        if self.counts['sessions']:
+            recompute_user_stats(self.db, [self.user_id])
+        self.db.commit()
+        return ImportResponse(**self.counts)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.db.models import OutboxEvent
+from app.services.ai_dispatcher import dispatch_pending_jobs
+from app.services.dashboard_cache import bump_summary_versions
+
+logger = logging.getLogger(__name__)
+
+# Side effects that must follow a commit are written as rows in the same
+# transaction and published by `app.workers.outbox_relay`, so a request never
+# waits on the broker and a crash after commit cannot lose them. Delivery is
+# at-least-once: every handler must be safe to run twice.
+
+AI_DISPATCH = 'ai.dispatch'
+CACHE_INVALIDATE = 'cache.invalidate'
+
+CACHE_INVALIDATION_CHANNEL = 'cache:invalidate'
+
+
+def add_event(db: Session, topic: str, payload: dict) -> None:
+    db.add(OutboxEvent(topic=topic, payload=payload))
+
+
+def _dispatch_ai_jobs(payloads: list[dict]) -> None:
+    # One dispatcher pass serves any number of new jobs.
+    dispatch_pending_jobs()
+
+
+def _invalidate_caches(payloads: list[dict]) -> None:
+    user_ids = sorted({user_id for payload in payloads for user_id in payload['user_ids']})
+    bump_summary_versions(user_ids)
+    # For process-local caches in other services; nothing subscribes yet.
+    get_redis().publish(CACHE_INVALIDATION_CHANNEL, json.dumps({'user_ids': user_ids}))
+
+
+HANDLERS: dict[str, Callable[[list[dict]], None]] = {
+    AI_DISPATCH: _dispatch_ai_jobs,
+    CACHE_INVALIDATE: _invalidate_caches,
+}
+
+
+def relay_batch(
+    db: Session,
+    batch_size: int,
+    handlers: dict[str, Callable[[list[dict]], None]] | None = None,
+) -> int:
+    handlers = HANDLERS if handlers is None else handlers
+    now = datetime.now(UTC)
+    # SKIP LOCKED lets several relays run side by side without double-claiming.
+    events = db.scalars(
+        select(OutboxEvent)
+        .where(OutboxEvent.available_at <= now)
+        .order_by(OutboxEvent.id.asc())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not events:
+        db.rollback()
+        return 0
+
+    by_topic: dict[str, list[OutboxEvent]] = defaultdict(list)
+    for event in events:
+        by_topic[event.topic].append(event)
+
+    delivered: list[int] = []
+    for topic, group in by_topic.items():
+        try:
+            handler = handlers[topic]
+            handler([event.payload for event in group])
+        except Exception as exc:  # noqa: BLE001
+            metrics.increment('outbox.failures', len(group))
+            logger.warning('Outbox publish failed topic=%s events=%d: %s', topic, len(group), exc)
+            for event in group:
+                event.attempts += 1
+                event.last_error = repr(exc)[:500]
+                backoff = min(2**event.attempts, settings.outbox_max_backoff_seconds)
+                event.available_at = now + timedelta(seconds=backoff)
+            continue
+        delivered.extend(event.id for event in group)
+
+    if delivered:
+        db.execute(
+            delete(OutboxEvent)
+            .where(OutboxEvent.id.in_(delivered))
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    metrics.increment('outbox.published', len(delivered))
+    return len(delivered)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import re
+import time
+import unicodedata
+from datetime import UTC, datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.db.models import PlanLibraryEntry
+
+logger = logging.getLogger(__name__)
+
+# Plans from completed LLM jobs are kept with an embedding of their goal and
+# topic. A new job whose goal/topic lands close enough to a stored one reuses
+# that plan instead of calling the model.
+#
+# The embedding is local and deterministic: signed feature hashing of words
+# and character trigrams, so paraphrases, plurals and typos stay close without
+# a model download. Goal and topic are hashed separately and each normalized
+# before they are summed, so cosine similarity is close to the mean of the goal
+# and topic similarities: a different topic alone costs about half of it.
+
+DIMENSIONS = PlanLibraryEntry.embedding.type.dimensions
+_WORD = re.compile(r'\w+')
+_TRIGRAM_WEIGHT = 0.5
+_STOP_WORDS = frozenset(
+    (
+        'a an and as at be for from get i in into is it learn '
+        'my of on or study the to want with'
+    ).split()
+)
+
+
+def _normalize(value: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', value.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _features(value: str, namespace: str) -> dict[str, float]:
+    words = [word for word in _WORD.findall(_normalize(value)) if word not in _STOP_WORDS]
+    features: dict[str, float] = {}
+    for word in words:
+        features[f'{namespace}w:{word}'] = features.get(f'{namespace}w:{word}', 0.0) + 1.0
+        padded = f'#{word}#'
+        for index in range(len(padded) - 2):
+            key = f'{namespace}c:{padded[index:index + 3]}'
+            features[key] = features.get(key, 0.0) + _TRIGRAM_WEIGHT
+    return features
+
+
+def _unit(vector: list[float]) -> list[float]:
+    norm = math.sqrt(sum(item * item for item in vector))
+    return [item / norm for item in vector] if norm else vector
+
+
+def _hashed(features: dict[str, float]) -> list[float]:
+    vector = [0.0] * DIMENSIONS
+    for feature, weight in features.items():
+        digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'big')
+        sign = 1.0 if digest & 1 else -1.0
+        vector[(digest >> 1) % DIMENSIONS] += sign * weight
+    return _unit(vector)
+
+
+def embed(goal: str, topic: str) -> list[float]:
+    goal_vector = _hashed(_features(goal, 'g'))
+    topic_vector = _hashed(_features(topic, 't'))
+    return _unit([g + t for g, t in zip(goal_vector, topic_vector, strict=True)])
+
+
+def cosine_similarity(left: list[float], right: list[float]) -> float:
+    dot = sum(a * b for a, b in zip(left, right, strict=True))
+    norms = math.sqrt(sum(a * a for a in left)) * math.sqrt(sum(b * b for b in right))
+    return dot / norms if norms else 0.0
+
+
+def find_similar(
+    db: Session, embedding: list[float], min_similarity: float
+) -> tuple[PlanLibraryEntry, float] | None:
+    # Nearest neighbour through the HNSW index; the threshold is applied after.
+    distance = PlanLibraryEntry.embedding.cosine_distance(embedding)
+    row = db.execute(select(PlanLibraryEntry, distance).order_by(distance).limit(1)).first()
+    if row is None:
+        return None
+    entry, found = row
+    similarity = 1.0 - found
+    return (entry, similarity) if similarity >= min_similarity else None
+
+
+def reuse_plan(db: Session, embedding: list[float], min_similarity: float) -> dict | None:
+    started = time.perf_counter()
+    match = find_similar(db, embedding, min_similarity)
+    metrics.observe('ai.plan_reuse.lookup_seconds', time.perf_counter() - started)
+    if match is None:
+        metrics.increment('ai.plan_reuse.misses')
+        return None
+    entry, similarity = match
+    entry.hits = PlanLibraryEntry.hits + 1
+    entry.last_used_at = datetime.now(UTC)
+    metrics.increment('ai.plan_reuse.hits')
+    logger.info('Reusing library plan entry_id=%s similarity=%.3f', entry.id, similarity)
+    return entry.plan
+
+
+def remember_plan(
+    db: Session, *, goal: str, topic: str, embedding: list[float], plan: dict, job_id: str
+) -> None:
+    db.add(
+        PlanLibraryEntry(
+            goal=goal, topic=topic, embedding=embedding, plan=plan, source_job_id=job_id
+        )
+    )
+
+
+def _collect_hit_ratio() -> None:
+    hits = metrics.counter_value('ai.plan_reuse.hits')
+    lookups = hits + metrics.counter_value('ai.plan_reuse.misses')
+    metrics.set_gauge('ai.plan_reuse.hit_ratio', hits / lookups if lookups else 0.0)
+
+
+metrics.register_collector(_collect_hit_ratio)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable, Sequence
+from datetime import UTC, datetime, time, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import OnboardingPreference, StudySession
+
+# Everything below works in integer minutes from midnight UTC of the first
+# scheduled day, so a plan of 10-100 sessions is placed in microseconds.
+
+_DAY_MINUTES = 24 * 60
+
+
+def schedule_sessions(
+    durations: Sequence[int],
+    *,
+    start: datetime,
+    days: int = 7,
+    daily_capacity_minutes: int | None = None,
+    busy: Iterable[tuple[datetime, int]] = (),
+    day_start_hour: int | None = None,
+    day_end_hour: int | None = None,
+    break_minutes: int | None = None,
+) -> list[datetime]:
+    capacity = daily_capacity_minutes or settings.schedule_default_daily_minutes
+    day_start = settings.schedule_day_start_hour if day_start_hour is None else day_start_hour
+    day_end = settings.schedule_day_end_hour if day_end_hour is None else day_end_hour
+    gap = settings.schedule_break_minutes if break_minutes is None else break_minutes
+
+    origin = datetime.combine(start.astimezone(UTC).date(), time.min, tzinfo=UTC)
+    not_before = math.ceil((start - origin).total_seconds() / 60)
+
+    free: list[list[list[int]]] = []
+    for day in range(days):
+        low = max(day * _DAY_MINUTES + day_start * 60, not_before)
+        high = day * _DAY_MINUTES + day_end * 60
+        free.append([[low, high]] if low < high else [])
+
+    load = [0] * days
+    for busy_start, busy_minutes in busy:
+        begin = int((busy_start - origin).total_seconds() // 60)
+        day = begin // _DAY_MINUTES
+        if 0 <= day < days:
+            load[day] += busy_minutes
+        _reserve(free, begin - gap, begin + busy_minutes + gap)
+
+    count = len(durations)
+    placed: list[int | None] = [None] * count
+
+    # Pass 1: keep plan order (day index never goes back) and spread sessions
+    # evenly over the remaining days, within each day's capacity.
+    day = 0
+    placed_today = 0
+    quota = 0
+    for index, duration in enumerate(durations):
+        while day < days:
+            if placed_today == 0:
+                quota = math.ceil((count - index) / (days - day))
+            if placed_today < quota and load[day] + duration <= capacity:
+                minute = _take(free[day], duration, gap)
+                if minute is not None:
+                    placed[index] = minute
+                    load[day] += duration
+                    placed_today += 1
+                    break
+            day += 1
+            placed_today = 0
+
+    # Pass 2: anything left over ignores capacity but still avoids overlaps,
+    # preferring the least loaded day.
+    spill: list[list[int]] = []
+    spill_days = 0
+    for index, duration in enumerate(durations):
+        if placed[index] is not None:
+            continue
+        for day in sorted(range(days), key=load.__getitem__):
+            minute = _take(free[day], duration, gap)
+            if minute is not None:
+                placed[index] = minute
+                load[day] += duration
+                break
+        else:
+            # The window is completely full: continue on the days after it, so
+            # every session still gets its own slot.
+            minute = _take(spill, duration, gap)
+            while minute is None:
+                day = days + spill_days
+                spill_days += 1
+                low = day * _DAY_MINUTES + day_start * 60
+                spill.append([low, max(day * _DAY_MINUTES + day_end * 60, low + duration)])
+                minute = _take(spill, duration, gap)
+            placed[index] = minute
+
+    return [origin + timedelta(minutes=minute) for minute in placed if minute is not None]
+
+
+def _reserve(free: list[list[list[int]]], begin: int, end: int) -> None:
+    first_day = max(begin // _DAY_MINUTES, 0)
+    last_day = min(end // _DAY_MINUTES, len(free) - 1)
+    for day in range(first_day, last_day + 1):
+        remaining: list[list[int]] = []
+        for low, high in free[day]:
+            if end <= low or begin >= high:
+                remaining.append([low, high])
+                continue
+            if low < begin:
+                remaining.append([low, begin])
+            if end < high:
+                remaining.append([end, high])
+        free[day] = remaining
+
+
+def _take(intervals: list[list[int]], duration: int, gap: int) -> int | None:
+    for position, interval in enumerate(intervals):
+        low, high = interval
+        if high - low >= duration:
+            interval[0] = low + duration + gap
+            if interval[0] >= high:
+                del intervals[position]
+            return low
+    return None
+
+
+def daily_capacity_minutes(db: Session, user_id: str) -> int:
+    daily_hours = db.scalar(
+        select(OnboardingPreference.daily_hours).where(OnboardingPreference.user_id == user_id)
+    )
+    if daily_hours and daily_hours > 0:
+        return daily_hours * 60
+    return settings.schedule_default_daily_minutes
+
+
+def load_busy_intervals(
+    db: Session,
+    user_id: str,
+    start: datetime,
+    end: datetime,
+    *,
+    exclude_ids: Iterable[str] = (),
+) -> list[tuple[datetime, int]]:
+    query = select(StudySession.scheduled_at, StudySession.duration_minutes).where(
+        StudySession.user_id == user_id,
+        StudySession.status != 'done',
+        StudySession.scheduled_at >= start - timedelta(days=1),
+        StudySession.scheduled_at < end,
+    )
+    excluded = list(exclude_ids)
+    if excluded:
+        query = query.where(StudySession.id.not_in(excluded))
+    return [(scheduled_at, minutes) for scheduled_at, minutes in db.execute(query) if scheduled_at]
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+
+def stream_with_session(
+    produce: Callable[[Session], Iterator[bytes]],
+    bind: Engine | None = None,
+) -> Iterator[bytes]:
+    # A streamed body outlives the request dependencies, so the stream owns its
+    # session; `bind` keeps it on the engine (e.g. replica) the request was routed to.
+    db = SessionLocal(bind=bind) if bind is not None else SessionLocal()
+    try:
+        yield from produce(db)
+    finally:
+        db.close()
+
+
+def record_columns(model, record: type[BaseModel]) -> list:
+    return [getattr(model, name) for name in record.model_fields if name != 'type']
+
+
+def iter_ndjson(db: Session, query: Select, record: type[BaseModel]) -> Iterator[bytes]:
+    # `yield_per` turns on server-side cursors (`stream_results`); each partition
+    # becomes one chunk, so only `EXPORT_BATCH_SIZE` rows are in memory at a time.
+    result = db.execute(query.execution_options(yield_per=settings.export_batch_size))
+    for partition in result.partitions():
+        yield ''.join(record(**row._mapping).model_dump_json() + '\n' for row in partition).encode()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import heapq
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models import StudyPlan, StudySession, SyncTombstone, User
+from app.schemas.sync import SyncDeleted, SyncResponse, SyncTable
+
+# Every write to a plan or session takes the next value of the owner's
+# `users.change_seq` (see migration 20261019_0005), and deletes leave a
+# tombstone with their own value. A client keeps the last cursor it saw and
+# asks for everything above it, so steady-state polling reads only changes.
+
+PLAN_FIELDS = ('id', 'title', 'topic', 'duration_minutes', 'status', 'updated_at')
+SESSION_FIELDS = (
+    'id',
+    'plan_id',
+    'title',
+    'topic',
+    'duration_minutes',
+    'status',
+    'scheduled_at',
+    'completed_at',
+    'updated_at',
+)
+
+
+def _empty(cursor: int, *, reset: bool = False) -> SyncResponse:
+    return SyncResponse(
+        cursor=cursor,
+        has_more=False,
+        reset=reset,
+        plans=SyncTable(fields=list(PLAN_FIELDS), rows=[]),
+        sessions=SyncTable(fields=list(SESSION_FIELDS), rows=[]),
+        deleted=SyncDeleted(plans=[], sessions=[]),
+    )
+
+
+def _changed(
+    db: Session,
+    model,
+    fields: tuple[str, ...],
+    kind: str,
+    user_id: str,
+    since: int,
+    high: int,
+    limit: int,
+) -> list[tuple[int, str, list]]:
+    columns = [getattr(model, name) for name in fields]
+    query = (
+        select(model.change_seq, *columns)
+        .where(model.user_id == user_id, model.change_seq > since, model.change_seq <= high)
+        .order_by(model.change_seq.asc())
+        .limit(limit)
+    )
+    return [(row[0], kind, list(row[1:])) for row in db.execute(query)]
+
+
+def changes_since(db: Session, user_id: str, since: int, limit: int) -> SyncResponse:
+    counters = db.execute(select(User.change_seq, User.sync_floor).where(User.id == user_id)).one()
+    high, floor = counters.change_seq, counters.sync_floor
+
+    # A cursor from before pruned tombstones cannot be continued; the client
+    # drops its copy and starts again from 0.
+    if 0 < since < floor:
+        return _empty(0, reset=True)
+    # A cursor ahead of the counter was issued by the primary or a fresher
+    # replica and this replica has not caught up yet: nothing new here, keep it.
+    if since >= high:
+        return _empty(since)
+
+    # `high` was read first: everything at or below it is committed (sequence
+    # numbers commit in order), so all three reads see the same prefix. A row
+    # that changes meanwhile moves above `high` and comes with the next poll.
+    fetch = limit + 1
+    streams = [
+        _changed(db, StudyPlan, PLAN_FIELDS, 'plan', user_id, since, high, fetch),
+        _changed(db, StudySession, SESSION_FIELDS, 'session', user_id, since, high, fetch),
+    ]
+    if since:
+        # A first sync has nothing to delete locally.
+        tombstones = db.execute(
+            select(SyncTombstone.change_seq, SyncTombstone.entity, SyncTombstone.entity_id)
+            .where(
+                SyncTombstone.user_id == user_id,
+                SyncTombstone.change_seq > since,
+                SyncTombstone.change_seq <= high,
+            )
+            .order_by(SyncTombstone.change_seq.asc())
+            .limit(fetch)
+        )
+        streams.append(
+            [(seq, f'deleted_{entity}', [entity_id]) for seq, entity, entity_id in tombstones]
+        )
+
+    merged = list(heapq.merge(*streams, key=lambda item: item[0]))
+    page = merged[:limit]
+    has_more = len(merged) > limit
+    # A short page returned everything up to `high`, so the cursor can jump there.
+    response = _empty(page[-1][0] if has_more else high)
+    response.has_more = has_more
+
+    for _seq, kind, values in page:
+        if kind == 'plan':
+            response.plans.rows.append(values)
+        elif kind == 'session':
+            response.sessions.rows.append(values)
+        elif kind == 'deleted_plan':
+            response.deleted.plans.append(values[0])
+        elif kind == 'deleted_session':
+            response.deleted.sessions.append(values[0])
+    return response
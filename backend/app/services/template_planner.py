@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models import OnboardingPreference
+
+# CPU-only plan builder. Produces the same {title, summary, steps} shape as
+# `normalize_ai_plan`, so callers can use it wherever an LLM plan is expected.
+
+_MAX_STEPS = 10
+_MIN_STEPS = 6
+
+_GOAL_PATTERNS: list[tuple[str, re.Pattern[str]]] = [
+    ('exam', re.compile(r'\b(exam|test|quiz|midterm|final|certif\w*|ielts|toefl|sat|gre)\b', re.I)),
+    ('project', re.compile(r'\b(project|build|portfolio|thesis|app|prototype)\b', re.I)),
+    (
+        'language',
+        re.compile(r'\b(language|speak\w*|vocab\w*|grammar|fluen\w*|conversation)\b', re.I),
+    ),
+]
+
+# Each step is (title, detail); `{topic}` and `{focus}` are filled in per user.
+_TEMPLATES: dict[str, list[tuple[str, str]]] = {
+    'exam': [
+        ('Map the {topic} syllabus', 'List every exam unit and mark weak areas'),
+        ('Review core {topic} concepts', 'Summarize key definitions and formulas'),
+        ('Practice {focus} questions', 'Timed set, then check every mistake'),
+        ('Active recall on {topic}', 'Flashcards for the items missed so far'),
+        ('Solve a past {topic} paper', 'Full timed attempt under exam conditions'),
+        ('Analyze errors from the past paper', 'Group mistakes by topic and revisit notes'),
+        ('Targeted drill on weak {topic} units', 'Short problem sets on the lowest-scoring units'),
+        ('Second timed {topic} practice', 'Aim to beat the first paper score'),
+        ('Condense {topic} revision notes', 'One page of formulas and traps'),
+        ('Light {topic} review before the exam', 'Skim revision notes and rest'),
+    ],
+    'project': [
+        ('Define the {topic} project scope', 'Write the goal, constraints and definition of done'),
+        ('Research {focus} references', 'Collect examples and note reusable ideas'),
+        ('Outline the {topic} plan', 'Break the work into milestones'),
+        ('Build the first {topic} milestone', 'Focus on the smallest working version'),
+        ('Review progress on {topic}', 'Check against the definition of done'),
+        ('Build the next {topic} milestone', 'Extend the working version'),
+        ('Fix issues found in {topic} review', 'Address the highest-impact gaps first'),
+        ('Polish the {topic} deliverable', 'Clean up structure and presentation'),
+        ('Document {topic} outcomes', 'Record decisions and lessons learned'),
+        ('Present or share the {topic} project', 'Collect feedback for the next iteration'),
+    ],
+    'language': [
+        ('Set {topic} learning targets', 'Pick the vocabulary and grammar for this week'),
+        ('Learn new {topic} vocabulary', 'Spaced repetition deck of 20 new words'),
+        ('Study {focus} grammar', 'Read the rule, then write 10 example sentences'),
+        ('Listening practice in {topic}', 'Short audio clip, shadow key phrases'),
+        ('Speaking practice in {topic}', 'Record a 2-minute monologue and review it'),
+        ('Reading practice in {topic}', 'One short article, note unknown words'),
+        ('Writing practice in {topic}', 'Short paragraph using this week\'s vocabulary'),
+        ('Review {topic} vocabulary deck', 'Repeat missed cards'),
+        ('Conversation drill in {topic}', 'Role-play an everyday scenario'),
+        ('Weekly {topic} self-check', 'Quiz yourself on the week\'s targets'),
+    ],
+    'mastery': [
+        ('Set goals for {topic}', 'Decide what you should be able to do by the end of the week'),
+        ('Study {topic} fundamentals', 'Read and take structured notes'),
+        ('Deep dive into {focus}', 'Work through one detailed example'),
+        ('Practice {topic} exercises', 'Start easy and increase difficulty'),
+        ('Active recall on {topic}', 'Explain the main ideas without notes'),
+        ('Apply {topic} to a small problem', 'Use the concepts end to end'),
+        ('Review mistakes in {topic}', 'Revisit notes for anything unclear'),
+        ('Extend {focus} practice', 'Harder exercises on the focus area'),
+        ('Summarize {topic} learnings', 'One-page summary for future review'),
+        ('Weekly {topic} reflection', 'Plan next week based on progress'),
+    ],
+}
+
+
+def classify_goal(goal: str) -> str:
+    for name, pattern in _GOAL_PATTERNS:
+        if pattern.search(goal):
+            return name
+    return 'mastery'
+
+
+def session_minutes_for(daily_hours: int | None) -> int:
+    # Split the daily budget into two sessions, rounded to 5 minutes and kept in
+    # the 25-90 minute range that works for focused study blocks.
+    hours = daily_hours if daily_hours and daily_hours > 0 else 1
+    minutes = hours * 60 // 2
+    return max(25, min(90, minutes - minutes % 5))
+
+
+def build_template_plan(
+    goal: str,
+    topic: str,
+    *,
+    daily_hours: int | None = None,
+    focus_topics: list[str] | None = None,
+) -> dict:
+    kind = classify_goal(goal)
+    minutes = session_minutes_for(daily_hours)
+    focus = [item.strip() for item in focus_topics or [] if item and item.strip()] or [topic]
+    step_count = max(_MIN_STEPS, min(_MAX_STEPS, _MIN_STEPS + (daily_hours or 0)))
+
+    steps = []
+    for index, (title, detail) in enumerate(_TEMPLATES[kind][:step_count]):
+        focus_name = focus[index % len(focus)]
+        steps.append(
+            {
+                'title': title.format(topic=topic, focus=focus_name),
+                'detail': f'{detail.format(topic=topic, focus=focus_name)} ({minutes} min)',
+            }
+        )
+
+    return {
+        'title': f'{topic} Study Plan',
+        'summary': (
+            f'Study plan for {goal} ({topic}): {len(steps)} sessions of about {minutes} minutes.'
+        ),
+        'steps': steps,
+    }
+
+
+def build_template_plan_for_user(db: Session, user_id: str, goal: str, topic: str) -> dict:
+    preference = db.scalar(
+        select(OnboardingPreference).where(OnboardingPreference.user_id == user_id)
+    )
+    return build_template_plan(
+        goal,
+        topic,
+        daily_hours=preference.daily_hours if preference else None,
+        focus_topics=preference.focus_topics if preference else None,
+    )
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.db.models import UserStats
+
+# `current_streak` is the run of consecutive done-days ending at `last_done_date`;
+# readers decide whether that run is still alive (see `visible_streak`).
+
+_RECOMPUTE_SQL = text(
+    """
+    WITH done AS (
+        SELECT user_id, topic, duration_minutes, (completed_at AT TIME ZONE 'UTC')::date AS day
+        FROM study_sessions
+        WHERE user_id = ANY(:user_ids) AND status = 'done' AND completed_at IS NOT NULL
+    ),
+    days AS (
+        SELECT user_id, day, COUNT(*) AS sessions
+        FROM done
+        GROUP BY user_id, day
+    ),
+    islands AS (
+        SELECT user_id, day,
+               day - (ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY day))::int AS island
+        FROM days
+    ),
+    runs AS (
+        SELECT user_id, COUNT(*) AS length, MAX(day) AS last_day
+        FROM islands
+        GROUP BY user_id, island
+    ),
+    streaks AS (
+        SELECT user_id,
+               MAX(length) AS longest_streak,
+               MAX(last_day) AS last_done_date,
+               (ARRAY_AGG(length ORDER BY last_day DESC))[1] AS current_streak
+        FROM runs
+        GROUP BY user_id
+    ),
+    topics AS (
+        SELECT user_id, jsonb_object_agg(topic, minutes) AS topic_minutes,
+               SUM(minutes) AS focus_minutes_total
+        FROM (
+            SELECT user_id, topic, SUM(duration_minutes) AS minutes
+            FROM done
+            GROUP BY user_id, topic
+        ) AS per_topic
+        GROUP BY user_id
+    )
+    INSERT INTO user_stats (
+        user_id, current_streak, longest_streak, last_done_date,
+        last_done_day_sessions, focus_minutes_total, topic_minutes, updated_at
+    )
+    SELECT users.id,
+           COALESCE(streaks.current_streak, 0),
+           COALESCE(streaks.longest_streak, 0),
+           streaks.last_done_date,
+           COALESCE(days.sessions, 0),
+           COALESCE(topics.focus_minutes_total, 0),
+           COALESCE(topics.topic_minutes, '{}'::jsonb),
+           now()
+    FROM users
+    LEFT JOIN streaks ON streaks.user_id = users.id
+    LEFT JOIN days ON days.user_id = users.id AND days.day = streaks.last_done_date
+    LEFT JOIN topics ON topics.user_id = users.id
+    WHERE users.id = ANY(:user_ids)
+    ON CONFLICT (user_id) DO UPDATE SET
+        current_streak = EXCLUDED.current_streak,
+        longest_streak = EXCLUDED.longest_streak,
+        last_done_date = EXCLUDED.last_done_date,
+        last_done_day_sessions = EXCLUDED.last_done_day_sessions,
+        focus_minutes_total = EXCLUDED.focus_minutes_total,
+        topic_minutes = EXCLUDED.topic_minutes,
+        updated_at = EXCLUDED.updated_at
+    WHERE (
+        user_stats.current_streak, user_stats.longest_streak, user_stats.last_done_date,
+        user_stats.last_done_day_sessions, user_stats.focus_minutes_total, user_stats.topic_minutes
+    ) IS DISTINCT FROM (
+        EXCLUDED.current_streak, EXCLUDED.longest_streak, EXCLUDED.last_done_date,
+        EXCLUDED.last_done_day_sessions, EXCLUDED.focus_minutes_total, EXCLUDED.topic_minutes
+    )
+    RETURNING user_stats.user_id
+    """
+)
+
+
+def recompute_user_stats(db: Session, user_ids: list[str]) -> int:
+    # Full recompute from session history; returns how many rows were created or repaired.
+    if not user_ids:
+        return 0
+    return len(db.execute(_RECOMPUTE_SQL, {'user_ids': user_ids}).all())
+
+
+def visible_streak(stats: UserStats | None, today: date) -> int:
+    if not stats or stats.last_done_date != today:
+        return 0
+    return stats.current_streak
+
+
+def apply_session_transition(
+    db: Session,
+    user_id: str,
+    *,
+    topic: str,
+    duration_minutes: int,
+    previous_done_day: date | None,
+    new_done_day: date | None,
+) -> None:
+    # Call after the session change is made (and, for a delete, flushed).
+    if previous_done_day == new_done_day:
+        return
+
+    stats = db.scalar(select(UserStats).where(UserStats.user_id == user_id).with_for_update())
+    exact = stats is not None
+    if exact and previous_done_day is not None:
+        exact = _remove_done_day(stats, previous_done_day)
+    if exact and new_done_day is not None:
+        exact = _add_done_day(stats, new_done_day)
+    if not exact:
+        # First transition for this user, a back-dated completion or a removed
+        # done-day (which can split any run): recompute this user from history,
+        # including the change, instead of guessing.
+        db.flush()
+        recompute_user_stats(db, [user_id])
+        if stats is not None:
+            db.refresh(stats)
+        return
+
+    topic_minutes = dict(stats.topic_minutes or {})
+    if previous_done_day is not None:
+        stats.focus_minutes_total = max(stats.focus_minutes_total - duration_minutes, 0)
+        remaining = topic_minutes.get(topic, 0) - duration_minutes
+        if remaining > 0:
+            topic_minutes[topic] = remaining
+        else:
+            topic_minutes.pop(topic, None)
+    if new_done_day is not None:
+        stats.focus_minutes_total += duration_minutes
+        topic_minutes[topic] = topic_minutes.get(topic, 0) + duration_minutes
+
+    stats.topic_minutes = topic_minutes
+    stats.updated_at = datetime.now(UTC)
+
+
+def _add_done_day(stats: UserStats, day: date) -> bool:
+    # Returns False, leaving `stats` untouched, when the day is not at the end
+    # of the history and the streaks have to be recomputed.
+    if stats.last_done_date == day:
+        stats.last_done_day_sessions += 1
+        return True
+    if stats.last_done_date is not None and day < stats.last_done_date:
+        return False
+
+    extends = stats.last_done_date == day - timedelta(days=1)
+    stats.current_streak = stats.current_streak + 1 if extends else 1
+    stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+    stats.last_done_date = day
+    stats.last_done_day_sessions = 1
+    return True
+
+
+def _remove_done_day(stats: UserStats, day: date) -> bool:
+    # Only another session on the last done-day keeps every streak as it is;
+    # removing a done-day anywhere can split a run and lower either streak.
+    if stats.last_done_date != day or stats.last_done_day_sessions <= 1:
+        return False
+    stats.last_done_day_sessions -= 1
+    return True
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import re
+from datetime import UTC, datetime, time, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models import StudyPlan, StudySession
+from app.services.scheduler import daily_capacity_minutes, load_busy_intervals, schedule_sessions
+
+# Turns a normalized {title, summary, steps} plan into this week's StudyPlan and
+# scheduled sessions. Used by the generation worker and by template mode in the API.
+
+_MIN_SCHEDULE_DAYS = 3
+
+
+def persist_weekly_plan(
+    db: Session, user_id: str, topic: str, structured: dict
+) -> StudyPlan | None:
+    now = datetime.now(UTC)
+    week_start_date = now.date() - timedelta(days=now.date().weekday())
+    week_start = datetime.combine(week_start_date, time.min, tzinfo=UTC)
+    week_end = week_start + timedelta(days=7)
+
+    existing_week_plan = db.scalar(
+        select(StudyPlan.id).where(
+            StudyPlan.user_id == user_id,
+            StudyPlan.created_at >= week_start,
+            StudyPlan.created_at < week_end,
+        )
+    )
+    if existing_week_plan:
+        return None
+
+    steps = structured.get('steps') or []
+    if not isinstance(steps, list):
+        steps = []
+
+    normalized_steps = [
+        step for step in steps if isinstance(step, dict) and str(step.get('title') or '').strip()
+    ]
+    if not normalized_steps:
+        normalized_steps = [
+            {'title': structured.get('summary') or f'{topic} review', 'detail': None}
+        ]
+
+    estimated_total = sum(
+        estimate_duration_minutes(step.get('title', ''), step.get('detail', ''))
+        for step in normalized_steps
+    )
+    plan = StudyPlan(
+        user_id=user_id,
+        title=str(structured.get('title') or f'{topic} Weekly Plan')[:180],
+        topic=topic,
+        duration_minutes=max(estimated_total, 30),
+        status='pending',
+    )
+    db.add(plan)
+    db.flush()
+
+    planned_steps = []
+    for step in normalized_steps[:10]:
+        title = str(step.get('title') or '').strip()
+        detail = str(step.get('detail') or '').strip()
+        planned_steps.append((title, detail, estimate_duration_minutes(title, detail)))
+
+    # Sessions start from now (never in an already-past part of the week); a plan
+    # generated late in the week may spill a few days into the next one.
+    window_start = max(week_start, now)
+    window_days = max((week_end.date() - window_start.date()).days, _MIN_SCHEDULE_DAYS)
+    schedule = schedule_sessions(
+        [minutes for _, _, minutes in planned_steps],
+        start=window_start,
+        days=window_days,
+        daily_capacity_minutes=daily_capacity_minutes(db, user_id),
+        busy=load_busy_intervals(
+            db, user_id, window_start, window_start + timedelta(days=window_days)
+        ),
+    )
+
+    for (title, detail, minutes), scheduled_at in zip(planned_steps, schedule, strict=True):
+        merged_title = f'{title} - {detail}' if detail else title
+        db.add(
+            StudySession(
+                plan_id=plan.id,
+                user_id=user_id,
+                title=merged_title[:180],
+                topic=topic,
+                duration_minutes=minutes,
+                status='pending',
+                scheduled_at=scheduled_at,
+            )
+        )
+    return plan
+
+
+def estimate_duration_minutes(title: str, detail: str) -> int:
+    text = f'{title} {detail}'
+    match = re.search(r'(\d{2,3})\s*(min|minute|minutes)', text, re.I)
+    if match:
+        value = int(match.group(1))
+        return max(20, min(value, 180))
+    return 45
@@ -1,15 +1,163 @@
+import threading
+import time
+
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import (
+    before_task_publish,
+    setup_logging,
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_ready,
+)
 
+from app.core import metrics
 from app.core.config import settings
+from app.core.logging import configure_logging, job_id_var, new_request_id, request_id_var
+from app.db.session import dispose_engines
+from app.services.ai_service import warm_up_model
+from app.workers.metrics_exporter import export_once, start_metrics_exporter
+
+GENERATION_QUEUE = 'ai'
+HOUSEKEEPING_QUEUE = 'housekeeping'
+
+# Hard limits leave room for the Ollama call plus parsing/persistence; the soft
+# limit fires first so the task can still mark its job as failed.
+GENERATION_SOFT_TIME_LIMIT = int(settings.ollama_timeout_seconds) + 30
+GENERATION_TIME_LIMIT = GENERATION_SOFT_TIME_LIMIT + 30
+
+# Start a worker per profile, e.g.
+#   CELERY_WORKER_PROFILE=generation celery -A app.workers.celery_app.celery_app worker -Q ai
+#   CELERY_WORKER_PROFILE=housekeeping celery -A app.workers.celery_app.celery_app worker \
+#     -Q housekeeping
+WORKER_PROFILES: dict[str, dict[str, object]] = {
+    # Long LLM calls: never hold more than the running task, and only ack after
+    # it finishes so a crashed worker hands the job to another one.
+    'generation': {
+        'worker_prefetch_multiplier': 1,
+        'worker_concurrency': settings.celery_generation_concurrency,
+        'worker_max_tasks_per_child': 200,
+    },
+    # Short rollup/cleanup tasks: each child reserves up to 8 so it never idles
+    # on a broker round trip; a reserved task waits milliseconds, not minutes.
+    'housekeeping': {
+        'worker_prefetch_multiplier': 8,
+        'worker_concurrency': settings.celery_housekeeping_concurrency,
+    },
+}
 
 celery_app = Celery(
     'schediora',
     broker=settings.redis_url,
     backend=settings.redis_url,
-    include=['app.workers.tasks.ai_tasks'],
+    include=['app.workers.tasks.ai_tasks', 'app.workers.tasks.maintenance_tasks'],
 )
-celery_app.conf.task_default_queue = 'ai'
-celery_app.conf.task_create_missing_queues = True
-celery_app.conf.task_routes = {
-    'app.workers.tasks.ai_tasks.generate_plan_task': {'queue': 'ai'},
-}
+celery_app.conf.update(
+    task_default_queue=GENERATION_QUEUE,
+    task_create_missing_queues=True,
+    task_routes={
+        'app.workers.tasks.ai_tasks.generate_plan_task': {'queue': GENERATION_QUEUE},
+        'app.workers.tasks.ai_tasks.generate_plan_batch_task': {'queue': GENERATION_QUEUE},
+        'app.workers.tasks.maintenance_tasks.*': {'queue': HOUSEKEEPING_QUEUE},
+    },
+    task_annotations={
+        'app.workers.tasks.ai_tasks.generate_plan_task': {
+            'soft_time_limit': GENERATION_SOFT_TIME_LIMIT,
+            'time_limit': GENERATION_TIME_LIMIT,
+        },
+        # Jobs in a batch run side by side, so a batch needs no longer than one job.
+        'app.workers.tasks.ai_tasks.generate_plan_batch_task': {
+            'soft_time_limit': GENERATION_SOFT_TIME_LIMIT,
+            'time_limit': GENERATION_TIME_LIMIT,
+        },
+    },
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    task_serializer=settings.celery_serializer,
+    result_serializer=settings.celery_serializer,
+    accept_content=['msgpack', 'json'],
+    result_expires=settings.celery_result_expires_seconds,
+    beat_schedule={
+        'dispatch-ai-jobs': {
+            'task': 'app.workers.tasks.maintenance_tasks.dispatch_ai_jobs_task',
+            'schedule': settings.ai_dispatch_interval_seconds,
+        },
+        'reschedule-missed-sessions': {
+            'task': 'app.workers.tasks.maintenance_tasks.reschedule_missed_sessions_task',
+            'schedule': crontab(minute=5),
+        },
+        'reconcile-user-stats': {
+            'task': 'app.workers.tasks.maintenance_tasks.reconcile_user_stats_task',
+            'schedule': crontab(hour=0, minute=20),
+        },
+        'prune-sync-tombstones': {
+            'task': 'app.workers.tasks.maintenance_tasks.prune_sync_tombstones_task',
+            'schedule': crontab(hour=0, minute=40),
+        },
+        'archive-ai-jobs': {
+            'task': 'app.workers.tasks.maintenance_tasks.archive_ai_jobs_task',
+            'schedule': crontab(hour=1, minute=10),
+        },
+    },
+)
+celery_app.conf.update(WORKER_PROFILES[settings.celery_worker_profile])
+
+
+@setup_logging.connect
+def _setup_worker_logging(**_kwargs) -> None:
+    # Connecting this signal stops Celery from installing its own root handlers.
+    configure_logging()
+
+
+@worker_process_init.connect
+def _setup_child_process(**_kwargs) -> None:
+    configure_logging()
+    dispose_engines()
+    # Tasks run in the prefork children, so that is where metrics accumulate.
+    start_metrics_exporter(settings.celery_worker_profile)
+
+
+@worker_process_shutdown.connect
+def _export_final_metrics(**_kwargs) -> None:
+    export_once(settings.celery_worker_profile)
+
+
+@worker_ready.connect
+def _warm_up_model(**_kwargs) -> None:
+    # In the background: a cold model load can take minutes and the worker must
+    # keep heartbeating meanwhile. Jobs arriving early just wait on the load.
+    if settings.celery_worker_profile == 'generation' and settings.ollama_warmup_enabled:
+        # The warm-up runs in the main worker process, not a child: export its
+        # load time (`ai.ollama.load_seconds`) from here too.
+        start_metrics_exporter(settings.celery_worker_profile)
+        threading.Thread(target=warm_up_model, name='ollama-warmup', daemon=True).start()
+
+
+@before_task_publish.connect
+def _propagate_request_id(headers: dict | None = None, **_kwargs) -> None:
+    request_id = request_id_var.get()
+    if headers is None:
+        return
+    if request_id and 'request_id' not in headers:
+        headers['request_id'] = request_id
+    headers.setdefault('published_at', time.time())
+
+
+@task_prerun.connect
+def _bind_task_log_context(task=None, kwargs: dict | None = None, **_kwargs) -> None:
+    request_id = getattr(task.request, 'request_id', None) if task else None
+    request_id_var.set(request_id or new_request_id())
+    job_id_var.set((kwargs or {}).get('job_id'))
+
+    published_at = getattr(task.request, 'published_at', None) if task else None
+    if published_at:
+        queue = (task.request.delivery_info or {}).get('routing_key') or 'unknown'
+        metrics.observe(f'celery.queue_wait_seconds.{queue}', max(time.time() - published_at, 0.0))
+
+
+@task_postrun.connect
+def _clear_task_log_context(**_kwargs) -> None:
+    request_id_var.set(None)
+    job_id_var.set(None)
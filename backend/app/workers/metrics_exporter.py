@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+
+from redis.exceptions import RedisError
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Pid of the process whose exporter is running; forked children start their own.
+_started_pid: int | None = None
+
+
+def process_name(role: str) -> str:
+    return f'{role}:{socket.gethostname()}:{os.getpid()}'
+
+
+def export_once(role: str) -> None:
+    # Three missed pushes and the entry expires.
+    ttl = max(int(settings.metrics_export_interval_seconds * 3), 1)
+    try:
+        metrics.export_snapshot(get_redis(), process_name(role), ttl)
+    except RedisError as exc:
+        logger.warning('Metrics export failed: %s', exc)
+
+
+def start_metrics_exporter(role: str) -> None:
+    global _started_pid
+    if _started_pid == os.getpid():
+        return
+    _started_pid = os.getpid()
+    stop = threading.Event()
+
+    def run() -> None:
+        while not stop.wait(settings.metrics_export_interval_seconds):
+            export_once(role)
+
+    threading.Thread(target=run, name='metrics-exporter', daemon=True).start()
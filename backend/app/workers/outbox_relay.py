@@ -0,0 +1,56 @@
+"""Publishes pending `outbox_events` rows.
+
+    python -m app.workers.outbox_relay
+
+Runs next to the Celery workers; several relays can run at once.
+"""
+
+from __future__ import annotations
+
+import logging
+import signal
+import threading
+
+from app.core.config import settings
+from app.core.logging import configure_logging
+from app.db.session import SessionLocal
+from app.services.outbox import relay_batch
+from app.workers.metrics_exporter import export_once, start_metrics_exporter
+
+logger = logging.getLogger(__name__)
+
+
+def relay_once() -> int:
+    db = SessionLocal()
+    try:
+        return relay_batch(db, settings.outbox_batch_size)
+    finally:
+        db.close()
+
+
+def run(stop: threading.Event) -> None:
+    logger.info('Outbox relay started batch_size=%d', settings.outbox_batch_size)
+    while not stop.is_set():
+        try:
+            published = relay_once()
+        except Exception:  # noqa: BLE001
+            logger.exception('Outbox relay batch failed')
+            published = 0
+        # A full batch means more is waiting; otherwise poll again shortly.
+        if published < settings.outbox_batch_size:
+            stop.wait(settings.outbox_poll_seconds)
+    logger.info('Outbox relay stopped')
+
+
+def main() -> None:
+    configure_logging()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_args: stop.set())
+    signal.signal(signal.SIGINT, lambda *_args: stop.set())
+    start_metrics_exporter('outbox-relay')
+    run(stop)
+    export_once('outbox-relay')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,94 @@
 from __future__ import annotations
 
+import contextvars
+import json
 import logging
-import re
-from datetime import UTC, datetime, time, timedelta
-
-from sqlalchemy import select
-
-from app.db.models import AiJob, StudyPlan, StudySession
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+from time import perf_counter
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.logging import job_id_var
+from app.core.profiling import profile_block
+from app.db.models import AiJob
 from app.db.session import SessionLocal
+from app.services.ai_dispatcher import dispatch_pending_jobs
 from app.services.ai_plan_formatter import normalize_ai_plan
-from app.services.ai_service import generate_study_plan
+from app.services.ai_service import AiServiceUnavailableError, CircuitOpenError, generate_study_plan
+from app.services.outbox import CACHE_INVALIDATE, add_event
+from app.services.plan_library import embed, remember_plan, reuse_plan
+from app.services.template_planner import build_template_plan_for_user
+from app.services.weekly_plan import persist_weekly_plan
 from app.workers.celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
 
-@celery_app.task(name='app.workers.tasks.ai_tasks.generate_plan_task')
-def generate_plan_task(job_id: str, goal: str, topic: str) -> dict:
+class _RetryLater(Exception):
+    def __init__(self, cause: AiServiceUnavailableError, countdown: float) -> None:
+        super().__init__(str(cause))
+        self.cause = cause
+        self.countdown = countdown
+
+
+@celery_app.task(
+    bind=True,
+    name='app.workers.tasks.ai_tasks.generate_plan_task',
+    max_retries=settings.ai_max_retries,
+)
+def generate_plan_task(self, job_id: str, goal: str, topic: str) -> dict:
+    try:
+        with profile_block(f'generate_plan_task {job_id}'):
+            return _run_job(job_id, goal, topic, self.request.retries, self.max_retries)
+    except _RetryLater as retry:
+        raise self.retry(exc=retry.cause, countdown=retry.countdown) from retry.cause
+    finally:
+        _dispatch_next()
+
+
+@celery_app.task(name='app.workers.tasks.ai_tasks.generate_plan_batch_task')
+def generate_plan_batch_task(jobs: list[dict]) -> dict:
+    # One worker slot drives a whole dispatch batch: the model calls run side by
+    # side so the model server can batch them (OLLAMA_NUM_PARALLEL), and each
+    # job is still persisted, retried or failed on its own.
+    started = perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix='ai-batch') as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, _run_batched_job, job) for job in jobs
+            ]
+            results = [future.result() for future in futures]
+    finally:
+        _dispatch_next()
+    metrics.observe('ai.batch.size', len(jobs))
+    metrics.observe('ai.batch.seconds', perf_counter() - started)
+    return {'jobs': results}
+
+
+def _run_batched_job(job: dict) -> dict:
+    job_id_var.set(job['job_id'])
+    retries = job.get('retries', 0)
+    try:
+        with profile_block(f'generate_plan_task {job["job_id"]}'):
+            return _run_job(
+                job['job_id'], job['goal'], job['topic'], retries, settings.ai_max_retries
+            )
+    except _RetryLater as retry:
+        # The rest of the batch is done with; this job retries on its own.
+        generate_plan_task.apply_async(
+            kwargs={'job_id': job['job_id'], 'goal': job['goal'], 'topic': job['topic']},
+            countdown=retry.countdown,
+            retries=retries + 1,
+        )
+        return {'job_id': job['job_id'], 'status': 'retrying'}
+
+
+def _run_job(job_id: str, goal: str, topic: str, retries: int, max_retries: int) -> dict:
     db = SessionLocal()
     try:
         job = db.scalar(select(AiJob).where(AiJob.id == job_id))
@@ -24,26 +96,77 @@ def generate_plan_task(job_id: str, goal: str, topic: str) -> dict:
             logger.warning('AI job missing job_id=%s', job_id)
             return {'job_id': job_id, 'status': 'missing'}
 
-        job.status = 'running'
-        job.updated_at = datetime.now(UTC)
+        # Commits below keep the user's reads on the primary (see app/db/session.py).
+        db.info['user_id'] = job.user_id
+
+        # Only one message runs a job: a redelivered or duplicate message finds
+        # it running or finished and leaves it alone.
+        claimed = db.execute(
+            update(AiJob)
+            .where(AiJob.id == job_id, AiJob.status == 'queued')
+            .values(status='running', updated_at=datetime.now(UTC))
+        ).rowcount
         db.commit()
+        if not claimed:
+            db.refresh(job)
+            logger.info('AI job not claimed job_id=%s status=%s', job_id, job.status)
+            return {'job_id': job_id, 'status': job.status}
+
+        # Set only when the model answered, so only model output enters the library.
+        embedding = None
+        try:
+            if settings.ai_plan_mode == 'template':
+                result = _template_plan_text(db, job.user_id, goal, topic)
+            else:
+                query = embed(goal, topic) if settings.ai_plan_reuse_enabled else None
+                result = _library_plan_text(db, query) if query else None
+                if result is None:
+                    # Hand the connection back for the model call: a batch runs
+                    # OLLAMA_NUM_PARALLEL jobs side by side on a small pool.
+                    db.commit()
+                    result = generate_study_plan(goal=goal, topic=topic)
+                    embedding = query
+        except CircuitOpenError:
+            # Model server is known to be down: answer from templates, or fail now
+            # instead of waiting out a timeout.
+            if not settings.ai_template_fallback_enabled:
+                raise
+            logger.warning('AI circuit open, using template plan job_id=%s', job_id)
+            result = _template_plan_text(db, job.user_id, goal, topic)
+        except AiServiceUnavailableError as exc:
+            if retries >= max_retries:
+                raise
+            countdown = _retry_backoff_seconds(retries)
+            job.status = 'queued'
+            job.error = f'{exc} (retry {retries + 1} in {countdown:.0f}s)'
+            job.updated_at = datetime.now(UTC)
+            # The retry message is a new dispatch; the stale sweep counts from when it is due.
+            job.dispatched_at = job.updated_at + timedelta(seconds=countdown)
+            db.commit()
+            logger.warning('AI job retry scheduled job_id=%s countdown=%.1fs', job_id, countdown)
+            raise _RetryLater(exc, countdown) from exc
 
-        result = generate_study_plan(goal=goal, topic=topic)
         structured = normalize_ai_plan(result, goal=goal, topic=topic)
-        _persist_weekly_plan_from_ai(
+        persist_weekly_plan(
             db=db,
             user_id=job.user_id,
             topic=topic,
             structured=structured,
         )
 
+        if embedding is not None and structured['steps']:
+            _remember_plan(db, goal, topic, embedding, structured, job_id)
+
         job.status = 'completed'
         job.result_text = result
         job.updated_at = datetime.now(UTC)
+        add_event(db, CACHE_INVALIDATE, {'user_ids': [job.user_id]})
         db.commit()
 
         logger.info('AI job completed job_id=%s', job_id)
         return {'job_id': job_id, 'status': 'completed'}
+    except _RetryLater:
+        raise
     except Exception as exc:  # noqa: BLE001
         db.rollback()
         job = db.scalar(select(AiJob).where(AiJob.id == job_id))
@@ -58,77 +181,44 @@ def generate_plan_task(job_id: str, goal: str, topic: str) -> dict:
         db.close()
 
 
-def enqueue_generate_plan(job_id: str, goal: str, topic: str) -> None:
-    generate_plan_task.delay(job_id=job_id, goal=goal, topic=topic)
+def _dispatch_next() -> None:
+    # A finished (or retrying) job frees a slot; hand it to the next waiting job
+    # right away instead of waiting for the periodic dispatch.
+    try:
+        dispatch_pending_jobs()
+    except Exception:  # noqa: BLE001
+        logger.exception('AI job dispatch failed')
 
 
-def _persist_weekly_plan_from_ai(db, user_id: str, topic: str, structured: dict) -> None:
-    now = datetime.now(UTC)
-    week_start_date = now.date() - timedelta(days=now.date().weekday())
-    week_start = datetime.combine(week_start_date, time.min, tzinfo=UTC)
-    week_end = week_start + timedelta(days=7)
+def _library_plan_text(db, embedding: list[float]) -> str | None:
+    # A library failure (e.g. pgvector missing) must not fail the job: ask the model.
+    try:
+        plan = reuse_plan(db, embedding, settings.ai_plan_reuse_min_similarity)
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception('Plan library lookup failed')
+        return None
+    return json.dumps(plan) if plan is not None else None
 
-    existing_week_plan = db.scalar(
-        select(StudyPlan.id).where(
-            StudyPlan.user_id == user_id,
-            StudyPlan.created_at >= week_start,
-            StudyPlan.created_at < week_end,
-        )
-    )
-    if existing_week_plan:
-        return
-
-    steps = structured.get('steps') or []
-    if not isinstance(steps, list):
-        steps = []
-
-    normalized_steps = [step for step in steps if isinstance(step, dict) and str(step.get('title') or '').strip()]
-    if not normalized_steps:
-        normalized_steps = [{'title': structured.get('summary') or f'{topic} review', 'detail': None}]
-
-    estimated_total = sum(_estimate_duration_minutes(step.get('title', ''), step.get('detail', '')) for step in normalized_steps)
-    plan = StudyPlan(
-        user_id=user_id,
-        title=str(structured.get('title') or f'{topic} Weekly Plan')[:180],
-        topic=topic,
-        duration_minutes=max(estimated_total, 30),
-        status='pending',
-    )
-    db.add(plan)
-    db.flush()
 
-    for index, step in enumerate(normalized_steps[:10]):
-        title = str(step.get('title') or '').strip()
-        detail = str(step.get('detail') or '').strip()
-        merged_title = f'{title} - {detail}' if detail else title
-        scheduled_at = _build_schedule_time(week_start, index)
-        db.add(
-            StudySession(
-                plan_id=plan.id,
-                user_id=user_id,
-                title=merged_title[:180],
-                topic=topic,
-                duration_minutes=_estimate_duration_minutes(title, detail),
-                status='pending',
-                scheduled_at=scheduled_at,
-            )
-        )
+def _remember_plan(
+    db, goal: str, topic: str, embedding: list[float], plan: dict, job_id: str
+) -> None:
+    db.flush()
+    try:
+        with db.begin_nested():
+            remember_plan(db, goal=goal, topic=topic, embedding=embedding, plan=plan, job_id=job_id)
+    except SQLAlchemyError:
+        logger.exception('Plan library insert failed job_id=%s', job_id)
 
 
-def _build_schedule_time(week_start: datetime, index: int) -> datetime:
-    # Distribute tasks across weekdays first; additional tasks use a second/third slot
-    # on the same weekday instead of collapsing all extras into Sunday.
-    day_offset = index % 7
-    slot_index = index // 7
-    slot_hours = [10, 14, 18]
-    hour = slot_hours[min(slot_index, len(slot_hours) - 1)]
-    return week_start + timedelta(days=day_offset, hours=hour)
+def _template_plan_text(db, user_id: str, goal: str, topic: str) -> str:
+    return json.dumps(build_template_plan_for_user(db, user_id, goal, topic))
 
 
-def _estimate_duration_minutes(title: str, detail: str) -> int:
-    text = f'{title} {detail}'
-    match = re.search(r'(\d{2,3})\s*(min|minute|minutes)', text, re.I)
-    if match:
-        value = int(match.group(1))
-        return max(20, min(value, 180))
-    return 45
+def _retry_backoff_seconds(retries: int) -> float:
+    # Exponential backoff with full jitter, never below the base delay.
+    ceiling = min(
+        settings.ai_retry_backoff_max_seconds, settings.ai_retry_backoff_base_seconds * 2**retries
+    )
+    return random.uniform(settings.ai_retry_backoff_base_seconds, ceiling)
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    String,
+    column,
+    delete,
+    func,
+    select,
+    tuple_,
+    update,
+    values,
+)
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.db.models import OnboardingPreference, StudySession, SyncTombstone, User
+from app.db.session import SessionLocal
+from app.services.ai_dispatcher import dispatch_pending_jobs, recover_stale_jobs
+from app.services.ai_job_archive import (
+    archive_default_rows,
+    archive_partition,
+    ensure_partitions,
+    expired_months,
+    list_partitions,
+)
+from app.services.outbox import CACHE_INVALIDATE, add_event
+from app.services.scheduler import schedule_sessions
+from app.services.user_stats import recompute_user_stats
+from app.workers.celery_app import celery_app
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name='app.workers.tasks.maintenance_tasks.reschedule_missed_sessions_task')
+def reschedule_missed_sessions_task(batch_size: int | None = None) -> dict:
+    lock = get_redis().lock(
+        'maintenance:reschedule-missed',
+        timeout=settings.reschedule_lock_seconds,
+        blocking=False,
+    )
+    if not lock.acquire():
+        logger.info('Missed-session rescheduling already running, skipping')
+        return {'status': 'skipped'}
+
+    try:
+        return _reschedule_missed_sessions(batch_size or settings.reschedule_batch_size)
+    finally:
+        lock.release()
+
+
+@celery_app.task(name='app.workers.tasks.maintenance_tasks.dispatch_ai_jobs_task')
+def dispatch_ai_jobs_task() -> dict:
+    # Sweeper for dispatch triggers that were missed (API or worker could not
+    # reach the broker) and for dispatched jobs whose message was lost.
+    db = SessionLocal()
+    try:
+        requeued, failed = recover_stale_jobs(db, datetime.now(UTC))
+    finally:
+        db.close()
+    return {
+        'status': 'completed',
+        'requeued': requeued,
+        'failed': failed,
+        'dispatched': dispatch_pending_jobs(),
+    }
+
+
+@celery_app.task(name='app.workers.tasks.maintenance_tasks.reconcile_user_stats_task')
+def reconcile_user_stats_task(batch_size: int | None = None) -> dict:
+    # Nightly safety net for the O(1) updates made in `update_session`: recompute
+    # every user's stats from history in keyset batches and repair any drift.
+    size = batch_size or settings.user_stats_batch_size
+    started = time.perf_counter()
+    cursor = ''
+    checked = 0
+    repaired = 0
+
+    while True:
+        db = SessionLocal()
+        try:
+            user_ids = list(
+                db.scalars(
+                    select(User.id).where(User.id > cursor).order_by(User.id.asc()).limit(size)
+                )
+            )
+            if not user_ids:
+                break
+            cursor = user_ids[-1]
+            checked += len(user_ids)
+            repaired += recompute_user_stats(db, user_ids)
+            db.commit()
+        finally:
+            db.close()
+
+    elapsed = time.perf_counter() - started
+    metrics.increment('maintenance.user_stats.repaired', repaired)
+    logger.info(
+        'Reconciled user stats checked=%d repaired=%d elapsed=%.2fs', checked, repaired, elapsed
+    )
+    return {
+        'status': 'completed',
+        'checked': checked,
+        'repaired': repaired,
+        'seconds': round(elapsed, 3),
+    }
+
+
+@celery_app.task(name='app.workers.tasks.maintenance_tasks.prune_sync_tombstones_task')
+def prune_sync_tombstones_task() -> dict:
+    cutoff = datetime.now(UTC) - timedelta(days=settings.sync_tombstone_retention_days)
+    db = SessionLocal()
+    try:
+        pruned = db.execute(
+            delete(SyncTombstone)
+            .where(SyncTombstone.deleted_at < cutoff)
+            .returning(SyncTombstone.user_id, SyncTombstone.change_seq)
+        ).all()
+        floors: dict[str, int] = {}
+        for user_id, change_seq in pruned:
+            floors[user_id] = max(floors.get(user_id, 0), change_seq)
+        # Cursors below the floor may have missed a pruned delete; /sync resets them.
+        if floors:
+            new_floors = values(
+                column('id', String),
+                column('floor', BigInteger),
+                name='new_floors',
+            ).data(list(floors.items()))
+            db.execute(
+                update(User)
+                .where(User.id == new_floors.c.id)
+                .values(sync_floor=func.greatest(User.sync_floor, new_floors.c.floor))
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+    finally:
+        db.close()
+
+    metrics.increment('maintenance.sync_tombstones.pruned', len(pruned))
+    logger.info('Pruned sync tombstones count=%d users=%d', len(pruned), len(floors))
+    return {'status': 'completed', 'pruned': len(pruned), 'users': len(floors)}
+
+
+@celery_app.task(name='app.workers.tasks.maintenance_tasks.archive_ai_jobs_task')
+def archive_ai_jobs_task() -> dict:
+    today = datetime.now(UTC).date()
+    batch_size = settings.ai_jobs_archive_batch_size
+    db = SessionLocal()
+    try:
+        created = ensure_partitions(db, today, settings.ai_jobs_partitions_ahead_months)
+        db.commit()
+
+        partitions = list_partitions(db)
+        expired = expired_months(list(partitions.values()), today, settings.ai_jobs_retention_days)
+        by_month = {month: name for name, month in partitions.items()}
+        archived = 0
+        # One transaction per partition: the copy and the DROP land together.
+        for month in expired:
+            archived += archive_partition(db, by_month[month], batch_size)
+            db.commit()
+
+        before = datetime.now(UTC) - timedelta(days=settings.ai_jobs_retention_days)
+        archived += archive_default_rows(db, before, batch_size)
+        db.commit()
+    finally:
+        db.close()
+
+    metrics.increment('maintenance.ai_jobs.archived', archived)
+    logger.info(
+        'Archived AI jobs rows=%d partitions_dropped=%d partitions_created=%d',
+        archived,
+        len(expired),
+        len(created),
+    )
+    return {
+        'status': 'completed',
+        'archived': archived,
+        'dropped': len(expired),
+        'created': created,
+    }
+
+
+def _reschedule_missed_sessions(batch_size: int) -> dict:
+    now = datetime.now(UTC)
+    horizon_days = settings.schedule_reschedule_horizon_days
+    # Older misses stay where they are: packing a long overdue history into the
+    # next few days would bury the current plan.
+    oldest = now - timedelta(days=settings.reschedule_max_age_days)
+    started = time.perf_counter()
+    cursor: tuple[datetime, str] | None = None
+    scanned = 0
+    moved = 0
+
+    while True:
+        db = SessionLocal()
+        try:
+            # Keyset pagination over ix_study_sessions_status_scheduled_at: each batch
+            # is an index range scan, never an OFFSET, and only one batch is in memory.
+            query = (
+                select(
+                    StudySession.id,
+                    StudySession.user_id,
+                    StudySession.scheduled_at,
+                    StudySession.duration_minutes,
+                )
+                .where(
+                    StudySession.status == 'pending',
+                    StudySession.scheduled_at >= oldest,
+                    StudySession.scheduled_at < now,
+                )
+                .order_by(StudySession.scheduled_at.asc(), StudySession.id.asc())
+                .limit(batch_size)
+            )
+            if cursor:
+                query = query.where(tuple_(StudySession.scheduled_at, StudySession.id) > cursor)
+
+            rows = db.execute(query).all()
+            if not rows:
+                break
+            cursor = (rows[-1].scheduled_at, rows[-1].id)
+            scanned += len(rows)
+
+            new_slots = _plan_batch(db, rows, now, horizon_days)
+            if new_slots:
+                slots = values(
+                    column('id', String),
+                    column('scheduled_at', DateTime(timezone=True)),
+                    name='new_slots',
+                ).data(new_slots)
+                # Rows an API request is editing are skipped until the next run:
+                # that request holds the row and then waits for the owner's sync
+                # counter, which this batch may already hold.
+                unlocked = (
+                    select(StudySession.id)
+                    .where(StudySession.id.in_([slot_id for slot_id, _ in new_slots]))
+                    .with_for_update(skip_locked=True)
+                )
+                result = db.execute(
+                    update(StudySession)
+                    .where(
+                        StudySession.id == slots.c.id,
+                        StudySession.status == 'pending',
+                        StudySession.id.in_(unlocked),
+                    )
+                    .values(scheduled_at=slots.c.scheduled_at)
+                    .execution_options(synchronize_session=False)
+                )
+                moved += result.rowcount
+                add_event(db, CACHE_INVALIDATE, {'user_ids': sorted({row.user_id for row in rows})})
+            db.commit()
+        finally:
+            db.close()
+
+    elapsed = time.perf_counter() - started
+    rate = moved / elapsed if elapsed else 0.0
+    metrics.observe('maintenance.reschedule_missed.rows_per_second', rate)
+    logger.info(
+        'Rescheduled missed sessions scanned=%d moved=%d elapsed=%.2fs rate=%.0f rows/s',
+        scanned,
+        moved,
+        elapsed,
+        rate,
+    )
+    return {'status': 'completed', 'scanned': scanned, 'moved': moved, 'seconds': round(elapsed, 3)}
+
+
+def _plan_batch(db, rows, now: datetime, horizon_days: int) -> list[tuple[str, datetime]]:
+    missed_by_user: dict[str, list] = defaultdict(list)
+    for row in rows:
+        missed_by_user[row.user_id].append(row)
+    user_ids = list(missed_by_user)
+    horizon_end = now + timedelta(days=horizon_days)
+
+    # Capacities and busy time for every user in the batch come from two queries.
+    capacity = {
+        user_id: daily_hours * 60
+        for user_id, daily_hours in db.execute(
+            select(OnboardingPreference.user_id, OnboardingPreference.daily_hours).where(
+                OnboardingPreference.user_id.in_(user_ids)
+            )
+        )
+        if daily_hours and daily_hours > 0
+    }
+    busy: dict[str, list[tuple[datetime, int]]] = defaultdict(list)
+    for user_id, scheduled_at, minutes in db.execute(
+        select(
+            StudySession.user_id, StudySession.scheduled_at, StudySession.duration_minutes
+        ).where(
+            StudySession.user_id.in_(user_ids),
+            StudySession.status != 'done',
+            StudySession.scheduled_at >= now,
+            StudySession.scheduled_at < horizon_end,
+        )
+    ):
+        busy[user_id].append((scheduled_at, minutes))
+
+    new_slots: list[tuple[str, datetime]] = []
+    for user_id, missed in missed_by_user.items():
+        schedule = schedule_sessions(
+            [row.duration_minutes for row in missed],
+            start=now,
+            days=horizon_days,
+            daily_capacity_minutes=capacity.get(user_id),
+            busy=busy[user_id],
+        )
+        new_slots.extend(
+            (row.id, scheduled_at) for row, scheduled_at in zip(missed, schedule, strict=True)
+        )
+    return new_slots
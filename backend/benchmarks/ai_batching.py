@@ -0,0 +1,122 @@
+"""Jobs per minute and p95 latency: one job per worker slot vs dispatch batches.
+
+    python -m benchmarks.ai_batching [jobs]
+
+A burst of `jobs` (default 48) is worked off by CELERY_GENERATION_CONCURRENCY
+worker slots, first one job per task (OLLAMA_NUM_PARALLEL=1), then in batches
+of OLLAMA_NUM_PARALLEL (at least 4) generated side by side, as
+`generate_plan_batch_task` does. Latency is measured from the burst to each
+job's completion.
+
+With OLLAMA_BASE_URL reachable the real model is called. Otherwise a simulated
+server stands in: at most `parallel` sequences decode at once and every
+decoding step slows down by 15% per extra active sequence. That only shows the
+shape of the trade-off; the numbers to act on come from a real server.
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from app.core.config import settings
+from app.services.ai_service import generate_study_plan
+
+TOPICS = [
+    'Calculus',
+    'Organic Chemistry',
+    'Spanish',
+    'Python programming',
+    'World History',
+    'Physics',
+]
+
+
+class SimulatedServer:
+    def __init__(self, parallel: int, tokens: int = 250, step_seconds: float = 0.002) -> None:
+        self.slots = threading.Semaphore(parallel)
+        self.tokens = tokens
+        self.step_seconds = step_seconds
+        self.active = 0
+        self.lock = threading.Lock()
+
+    def generate(self, goal: str, topic: str) -> str:
+        with self.slots:
+            with self.lock:
+                self.active += 1
+            try:
+                for _ in range(self.tokens):
+                    with self.lock:
+                        active = self.active
+                    time.sleep(self.step_seconds * (1 + 0.15 * (active - 1)))
+            finally:
+                with self.lock:
+                    self.active -= 1
+        return '{}'
+
+
+def _run(
+    jobs: int, slots: int, batch_size: int, generate: Callable[[str, str], str]
+) -> tuple[float, list[float]]:
+    pending = list(range(jobs))
+    lock = threading.Lock()
+    latencies: list[float] = []
+    started = time.perf_counter()
+
+    def run_job(index: int) -> None:
+        generate('Pass the final exam', TOPICS[index % len(TOPICS)])
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    def worker_slot() -> None:
+        with ThreadPoolExecutor(max_workers=batch_size) as pool:
+            while True:
+                with lock:
+                    batch, pending[:batch_size] = pending[:batch_size], []
+                if not batch:
+                    return
+                list(pool.map(run_job, batch))
+
+    threads = [threading.Thread(target=worker_slot) for _ in range(slots)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies
+
+
+def _report(label: str, elapsed: float, latencies: list[float]) -> None:
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    p50 = statistics.median(latencies)
+    print(
+        f'{label:<28} {len(latencies) / elapsed * 60:>9.0f} jobs/min  '
+        f'p50 {p50:6.2f} s  p95 {p95:6.2f} s'
+    )
+
+
+def main() -> None:
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 48
+    slots = settings.celery_generation_concurrency
+    parallel = max(settings.ollama_num_parallel, 4)
+    try:
+        httpx.get(f'{settings.ollama_base_url}/api/tags', timeout=2).raise_for_status()
+    except httpx.HTTPError as exc:
+        print(f'model server unreachable ({exc}); using the simulated server, parallel={parallel}')
+        server = SimulatedServer(parallel)
+        generate = server.generate
+    else:
+        print(f'model {settings.ollama_model} at {settings.ollama_base_url}, parallel={parallel}')
+        generate = generate_study_plan
+
+    _report(f'one job per slot, {slots} slots', *_run(jobs, slots, 1, generate))
+    _report(f'batches of {parallel}, {slots} slots', *_run(jobs, slots, parallel, generate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""Archive compression ratio and plain vs monthly-partitioned ai_jobs.
+
+    python -m benchmarks.ai_jobs_partitioning [rows]
+
+The compression rows run anywhere. The Postgres rows use DATABASE_URL, build
+both layouts in a scratch schema (dropped afterwards) with `rows` jobs spread
+over twelve months (default 2,000,000), and report table plus index size, the
+hot queries under EXPLAIN ANALYZE, and the cost of expiring the oldest month:
+DELETE on the plain table vs DROP of a partition. Skipped if unreachable.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import sys
+import time
+import timeit
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.db.session import engine
+from app.services import ai_job_archive
+from app.services.template_planner import build_template_plan
+
+SCHEMA = 'bench_ai_jobs'
+TOPICS = ['Math', 'Physics', 'Spanish', 'Biology', 'History', 'Chemistry']
+GOALS = [
+    'Pass the final exam',
+    'Build a portfolio project',
+    'Speak fluent Spanish',
+    'Master calculus',
+]
+COLUMNS = """
+    id text NOT NULL, user_id text NOT NULL,
+    goal varchar(180) NOT NULL, topic varchar(120) NOT NULL,
+    status varchar(24) NOT NULL, priority integer NOT NULL DEFAULT 0,
+    dispatched_at timestamptz, result_text text, error text,
+    created_at timestamptz NOT NULL, updated_at timestamptz NOT NULL
+"""
+# Every job carries the same sample model output as result_text.
+FILL = """
+INSERT INTO {table}
+SELECT md5(n::text), 'user-' || (n % 20000), 'Pass the final exam', 'Math',
+       CASE WHEN n % 500 = 0 THEN 'queued' ELSE 'completed' END, 0, NULL,
+       :result, NULL, ts, ts
+FROM (
+    SELECT n,
+           timestamptz '2025-11-01 00:00:00+00'
+               + ((n - 1)::float / :rows) * interval '365 days' AS ts
+    FROM generate_series(1, :rows) AS n
+) AS jobs
+"""
+QUERIES = {
+    'user history': (
+        "SELECT id, status FROM {table} WHERE user_id = 'user-42' "
+        "AND created_at >= now() - interval '30 days' ORDER BY created_at DESC"
+    ),
+    'dispatch scan': "SELECT id FROM {table} WHERE status = 'queued' AND dispatched_at IS NULL",
+    'job by id': "SELECT status FROM {table} WHERE id = md5('123456')",
+}
+
+
+def _result_texts(count: int, rng: random.Random) -> list[str]:
+    texts = []
+    for _ in range(count):
+        plan = build_template_plan(
+            rng.choice(GOALS), rng.choice(TOPICS), daily_hours=rng.randint(1, 4)
+        )
+        # Roughly what the model returns: the plan as JSON with a line of prose.
+        texts.append('Here is your weekly plan:\n' + json.dumps(plan, indent=2))
+    return texts
+
+
+def _compression() -> str:
+    texts = _result_texts(2_000, random.Random(7))
+    raw = sum(len(item.encode()) for item in texts)
+    zstandard = ai_job_archive.zstandard
+    codecs = [('zstd', zstandard)] if zstandard else []
+    codecs.append(('zlib', None))
+    for codec, module in codecs:
+        ai_job_archive.zstandard = module
+        packed = [ai_job_archive.compress_result(item) for item in texts]
+        size = sum(len(data) for _, data in packed)
+        encode = timeit.timeit(
+            lambda: [ai_job_archive.compress_result(item) for item in texts], number=3
+        ) / 3
+        decode = timeit.timeit(
+            lambda packed=packed: [ai_job_archive.decompress_result(c, d) for c, d in packed],
+            number=3,
+        ) / 3
+        print(
+            f'{codec:<5} raw {raw / len(texts):>7.0f} B/row -> {size / len(texts):>6.0f} B/row '
+            f'(ratio {raw / size:4.1f}x)  compress {encode / len(texts) * 1e6:6.1f} us/row  '
+            f'decompress {decode / len(texts) * 1e6:5.1f} us/row'
+        )
+    ai_job_archive.zstandard = zstandard
+    return texts[0]
+
+
+def _explain(conn, sql: str) -> str:
+    plan = conn.execute(text(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}')).scalar()[0]
+    nodes = [plan['Plan']]
+    scanned = 0
+    while nodes:
+        node = nodes.pop()
+        scanned += 'Relation Name' in node
+        nodes.extend(node.get('Plans', []))
+    return f'{plan["Execution Time"]:8.2f} ms  relations scanned {scanned}'
+
+
+def _postgres(rows: int, result: str) -> None:
+    with engine.connect() as conn:
+        conn.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+        conn.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+        conn.execute(text(f'CREATE TABLE {SCHEMA}.plain ({COLUMNS}, PRIMARY KEY (id))'))
+        conn.execute(
+            text(
+                f'CREATE TABLE {SCHEMA}.parted ({COLUMNS}, PRIMARY KEY (id, created_at)) '
+                'PARTITION BY RANGE (created_at)'
+            )
+        )
+        for index in range(12):
+            year, month = divmod(10 + index, 12)
+            lower = f'{2025 + year}-{month + 1:02d}-01'
+            year, month = divmod(11 + index, 12)
+            upper = f'{2025 + year}-{month + 1:02d}-01'
+            conn.execute(
+                text(
+                    f'CREATE TABLE {SCHEMA}.parted_{index:02d} PARTITION OF {SCHEMA}.parted '
+                    f"FOR VALUES FROM ('{lower} 00:00:00+00') TO ('{upper} 00:00:00+00')"
+                )
+            )
+        for table in ('plain', 'parted'):
+            conn.execute(
+                text(FILL.format(table=f'{SCHEMA}.{table}')), {'result': result, 'rows': rows}
+            )
+        conn.execute(text(f'CREATE INDEX ON {SCHEMA}.plain (user_id)'))
+        conn.execute(text(f'CREATE INDEX ON {SCHEMA}.plain (status)'))
+        conn.execute(text(f'CREATE INDEX ON {SCHEMA}.plain (status, dispatched_at)'))
+        conn.execute(text(f'CREATE INDEX ON {SCHEMA}.parted (user_id, created_at)'))
+        conn.execute(
+            text(
+                f'CREATE INDEX ON {SCHEMA}.parted (status, dispatched_at) '
+                "WHERE status IN ('queued', 'running')"
+            )
+        )
+        conn.execute(text(f'CREATE INDEX ON {SCHEMA}.parted (updated_at)'))
+        conn.execute(text(f'ANALYZE {SCHEMA}.plain'))
+        conn.execute(text(f'ANALYZE {SCHEMA}.parted'))
+        conn.commit()
+
+        for table in ('plain', 'parted'):
+            size = conn.execute(
+                # pg_partition_tree() has no rows for a plain table.
+                text(
+                    'SELECT coalesce(sum(pg_total_relation_size(relid)), '
+                    'pg_total_relation_size(CAST(:name AS regclass))) '
+                    'FROM pg_partition_tree(:name) '
+                    'UNION ALL '
+                    'SELECT coalesce(sum(pg_indexes_size(relid)), '
+                    'pg_indexes_size(CAST(:name AS regclass))) FROM pg_partition_tree(:name)'
+                ),
+                {'name': f'{SCHEMA}.{table}'},
+            ).scalars().all()
+            print(
+                f'{table:<7} total {size[0] / 2**20:8.1f} MiB  indexes {size[1] / 2**20:7.1f} MiB'
+            )
+        for label, sql in QUERIES.items():
+            for table in ('plain', 'parted'):
+                timing = _explain(conn, sql.format(table=f'{SCHEMA}.{table}'))
+                print(f'{label:<14} {table:<7} {timing}')
+
+        started = time.perf_counter()
+        conn.execute(
+            text(f"DELETE FROM {SCHEMA}.plain WHERE created_at < '2025-12-01 00:00:00+00'")
+        )
+        conn.commit()
+        elapsed = time.perf_counter() - started
+        print(f'expire oldest month plain  DELETE {elapsed:8.2f} s (plus vacuum later)')
+        started = time.perf_counter()
+        conn.execute(text(f'DROP TABLE {SCHEMA}.parted_00'))
+        conn.commit()
+        print(f'expire oldest month parted DROP   {time.perf_counter() - started:8.2f} s')
+
+        conn.execute(text(f'DROP SCHEMA {SCHEMA} CASCADE'))
+        conn.commit()
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    result = _compression()
+    try:
+        _postgres(rows, result)
+    except OperationalError as exc:
+        print(f'postgres: skipped ({exc.orig})')
+
+
+if __name__ == '__main__':
+    main()
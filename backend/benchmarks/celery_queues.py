@@ -0,0 +1,92 @@
+"""Queue wait and throughput benchmark for the Celery worker profiles.
+
+Run from `backend/` with Redis up, one worker per profile:
+
+    CELERY_WORKER_PROFILE=generation celery -A benchmarks.celery_queues worker -Q ai -c 2
+    CELERY_WORKER_PROFILE=housekeeping celery -A benchmarks.celery_queues worker \
+        -Q housekeeping -c 2
+    python -m benchmarks.celery_queues --long 20 --long-seconds 8 --short 500
+
+Add `--single-queue` (and start only the `ai` worker) to reproduce the old
+layout where every task shares one queue.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from app.workers.celery_app import GENERATION_QUEUE, HOUSEKEEPING_QUEUE, celery_app
+
+
+@celery_app.task(name='benchmarks.celery_queues.long_task')
+def long_task(seconds: float) -> list[float]:
+    started = time.time()
+    time.sleep(seconds)
+    return [started, time.time()]
+
+
+@celery_app.task(name='benchmarks.celery_queues.short_task')
+def short_task() -> list[float]:
+    started = time.time()
+    return [started, time.time()]
+
+
+def _result(task_id: str) -> list[float]:
+    # Reads the stored result directly: with hundreds of pending results the
+    # pub/sub based `AsyncResult.get()` can miss ones stored before it subscribed.
+    while True:
+        meta = celery_app.backend.get_task_meta(task_id)
+        if meta['status'] == 'SUCCESS':
+            return meta['result']
+        time.sleep(0.05)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+def _report(label: str, waits: list[float], elapsed: float) -> None:
+    print(
+        f'{label:>6}: n={len(waits)} wait_p50={statistics.median(waits):.3f}s '
+        f'wait_p95={_percentile(waits, 0.95):.3f}s throughput={len(waits) / elapsed:.1f}/s'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--long', type=int, default=20)
+    parser.add_argument('--long-seconds', type=float, default=8.0)
+    parser.add_argument('--short', type=int, default=500)
+    parser.add_argument('--single-queue', action='store_true')
+    args = parser.parse_args()
+
+    short_queue = GENERATION_QUEUE if args.single_queue else HOUSEKEEPING_QUEUE
+    started = time.time()
+    pending: list[tuple[str, float, object]] = []
+    for index in range(max(args.long, args.short)):
+        if index < args.long:
+            result = long_task.apply_async(args=[args.long_seconds], queue=GENERATION_QUEUE)
+            pending.append(('long', time.time(), result))
+        if index < args.short:
+            result = short_task.apply_async(queue=short_queue)
+            pending.append(('short', time.time(), result))
+
+    waits: dict[str, list[float]] = {'long': [], 'short': []}
+    # Throughput is measured to the last task's own finish time, not to when
+    # this loop happened to collect its result.
+    finished: dict[str, float] = {}
+    for kind, published_at, result in pending:
+        task_started, task_finished = _result(result.id)  # type: ignore[attr-defined]
+        waits[kind].append(max(task_started - published_at, 0.0))
+        finished[kind] = max(finished.get(kind, 0.0), task_finished)
+
+    for kind, values in waits.items():
+        if values:
+            _report(kind, values, finished[kind] - started)
+
+
+if __name__ == '__main__':
+    main()
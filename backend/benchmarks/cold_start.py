@@ -0,0 +1,55 @@
+"""Cold import time of the API, worker and migration entry points.
+
+    python -m benchmarks.cold_start [runs]
+
+Each entry point is imported `runs` times (default 15) in a fresh interpreter,
+the way a new API pod, Celery worker or one-off migration container starts.
+Reports the median and best wall time plus how many modules were loaded.
+Bytecode is compiled by a first, unmeasured run.
+"""
+
+from __future__ import annotations
+
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = {
+    'api (app.main)': 'import app.main',
+    'worker (celery_app)': 'import app.workers.celery_app',
+    'migrations (models)': 'import app.db.models',
+}
+
+
+def _import(statement: str) -> tuple[float, int]:
+    code = (
+        f'import sys, time; t = time.perf_counter(); {statement}; '
+        'print(time.perf_counter() - t, len(sys.modules))'
+    )
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, '-c', code], cwd=BACKEND, capture_output=True, text=True, check=True
+    )
+    wall = time.perf_counter() - started
+    _import_seconds, modules = out.stdout.split()
+    return wall, int(modules)
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    for label, statement in ENTRY_POINTS.items():
+        _import(statement)
+        results = [_import(statement) for _ in range(runs)]
+        walls = [wall for wall, _ in results]
+        print(
+            f'{label:<22} median {statistics.median(walls) * 1000:6.0f} ms  '
+            f'best {min(walls) * 1000:6.0f} ms  modules {results[0][1]}'
+        )
+
+
+if __name__ == '__main__':
+    main()
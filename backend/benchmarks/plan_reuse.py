@@ -0,0 +1,118 @@
+"""Hit rate and false reuse of the plan library on a synthetic goal/topic corpus.
+
+    python -m benchmarks.plan_reuse
+
+The library holds one entry per base goal/topic pair. Queries are rewrites of
+those pairs a user might type (case, filler words, plurals, typos, word order)
+and should reuse their base plan; unrelated pairs and the same goal under
+another topic should not. Nearest neighbours are exact (brute force), so this
+measures the embedding and threshold, not HNSW recall.
+"""
+
+from __future__ import annotations
+
+import random
+import timeit
+
+from app.services.plan_library import cosine_similarity, embed
+
+GOALS = [
+    'Pass the final exam',
+    'Prepare for the midterm',
+    'Build a portfolio project',
+    'Get a summer internship',
+    'Speak fluently while travelling',
+    'Ace the entrance test',
+    'Review the whole syllabus',
+    'Write a research paper',
+    'Catch up after missing classes',
+    'Prepare for a job interview',
+]
+TOPICS = [
+    'Calculus',
+    'Organic Chemistry',
+    'Spanish',
+    'Python programming',
+    'World History',
+    'Physics',
+]
+UNRELATED = [
+    ('Train for a marathon', 'Running'),
+    ('Learn to bake sourdough', 'Cooking'),
+    ('Play guitar chords', 'Music'),
+    ('Improve my chess openings', 'Chess'),
+    ('Design a logo', 'Graphic design'),
+]
+THRESHOLDS = (0.8, 0.85, 0.9, 0.95)
+
+
+def _typo(word: str, rng: random.Random) -> str:
+    if len(word) < 5:
+        return word
+    index = rng.randrange(1, len(word) - 2)
+    return word[:index] + word[index + 1] + word[index] + word[index + 2 :]
+
+
+def _rewrite(goal: str, topic: str, rng: random.Random) -> tuple[str, str]:
+    kind = rng.choice(['case', 'filler', 'plural', 'typo', 'order', 'punctuation'])
+    if kind == 'case':
+        return goal.upper(), topic.lower()
+    if kind == 'filler':
+        return f'I want to {goal.lower()}', topic
+    if kind == 'plural':
+        return goal + 's', topic
+    if kind == 'typo':
+        words = goal.split()
+        pick = rng.randrange(len(words))
+        words[pick] = _typo(words[pick], rng)
+        return ' '.join(words), topic
+    if kind == 'order':
+        words = goal.split()
+        return ' '.join(words[1:] + words[:1]), topic
+    return goal + '!!', f' {topic}. '
+
+
+def _nearest(query: list[float], library: list) -> tuple[tuple[str, str], float]:
+    scored = ((key, cosine_similarity(query, vector)) for key, vector in library)
+    return max(scored, key=lambda item: item[1])
+
+
+def main() -> None:
+    rng = random.Random(11)
+    base = [(goal, topic) for goal in GOALS for topic in TOPICS]
+    library = [(pair, embed(*pair)) for pair in base]
+
+    positives = [(pair, _rewrite(*pair, rng)) for pair in base for _ in range(4)]
+    negatives = list(UNRELATED)
+    # Same goal, topic outside the library: must not reuse another topic's plan.
+    negatives += [(goal, topic) for topic in ('Art History', 'Statistics') for goal in GOALS]
+
+    positive_scores = []
+    for pair, query in positives:
+        found, similarity = _nearest(embed(*query), library)
+        positive_scores.append((found == pair, similarity))
+    negative_scores = [_nearest(embed(*query), library)[1] for query in negatives]
+
+    print(
+        f'library {len(library)} entries, {len(positives)} rewrites, '
+        f'{len(negatives)} unrelated queries'
+    )
+    print(f'{"threshold":>9} {"hit rate":>9} {"wrong plan":>11} {"false reuse":>12}')
+    for threshold in THRESHOLDS:
+        hits = sum(1 for correct, score in positive_scores if correct and score >= threshold)
+        wrong = sum(1 for correct, score in positive_scores if not correct and score >= threshold)
+        false_reuse = sum(1 for score in negative_scores if score >= threshold)
+        print(
+            f'{threshold:>9.2f} {hits / len(positives):>9.1%} {wrong / len(positives):>11.1%} '
+            f'{false_reuse / len(negatives):>12.1%}'
+        )
+
+    runs = 2_000
+    seconds = timeit.timeit(
+        lambda: embed('Prepare for the calculus midterm exam', 'Calculus'), number=runs
+    )
+    print(f'embed: {seconds / runs * 1e6:.0f} us/query')
+
+
+if __name__ == '__main__':
+    main()
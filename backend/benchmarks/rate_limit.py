@@ -0,0 +1,39 @@
+"""Per-request overhead of the rate limit check, against Redis and in-process.
+
+    python -m benchmarks.rate_limit
+
+Uses REDIS_URL from the environment; the Redis row is skipped if it is unreachable.
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from redis.exceptions import RedisError
+
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+def main() -> None:
+    settings.rate_limit_reads_per_minute = 10**9
+    settings.rate_limit_reads_burst = 10**9
+    runs = 5_000
+
+    try:
+        get_redis().ping()
+    except RedisError as exc:
+        print(f'redis      : skipped ({exc})')
+    else:
+        seconds = timeit.timeit(lambda: rate_limit.check_rate_limit('reads', 'bench'), number=runs)
+        print(f'redis      : {seconds / runs * 1e6:8.1f} us/check')
+
+    buckets = rate_limit._LocalBuckets()
+    limits = rate_limit._group_limits('reads')[:1]
+    seconds = timeit.timeit(lambda: buckets.take(['bench'], list(limits)), number=runs)
+    print(f'in-process : {seconds / runs * 1e6:8.1f} us/check')
+
+
+if __name__ == '__main__':
+    main()
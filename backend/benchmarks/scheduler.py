@@ -0,0 +1,36 @@
+"""Per-plan latency of `schedule_sessions` for 10-100 sessions per week.
+
+    python -m benchmarks.scheduler
+"""
+
+from __future__ import annotations
+
+import random
+import timeit
+from datetime import UTC, datetime, timedelta
+
+from app.services.scheduler import schedule_sessions
+
+WEEK_START = datetime(2026, 3, 2, tzinfo=UTC)
+
+
+def main() -> None:
+    rng = random.Random(7)
+    for sessions in (10, 25, 50, 100):
+        durations = [rng.choice([25, 30, 45, 60, 90]) for _ in range(sessions)]
+        busy = [
+            (WEEK_START + timedelta(days=rng.randrange(7), hours=rng.randrange(9, 20)), 45)
+            for _ in range(sessions // 2)
+        ]
+        runs = 2_000
+        seconds = timeit.timeit(
+            lambda durations=durations, busy=busy: schedule_sessions(
+                durations, start=WEEK_START, daily_capacity_minutes=240, busy=busy
+            ),
+            number=runs,
+        )
+        print(f'{sessions:>4} sessions, {len(busy):>3} busy: {seconds / runs * 1e6:8.1f} us/plan')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Bytes on the wire and server CPU per response for each format and encoding.
+
+    python -m benchmarks.wire_format
+
+Builds `GET /sessions?week=all` and `GET /dashboard/summary` payloads for a
+typical user (a few weeks of history) and a heavy one (years of history), then
+times serialization plus compression exactly as the API does it. Encodings whose
+optional package is missing are skipped.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import timeit
+from datetime import UTC, datetime, timedelta
+
+import msgpack
+from pydantic_core import to_json, to_jsonable_python
+
+from app.core.compression import available_encoders
+from app.schemas.dashboard import DashboardSummaryResponse
+from app.schemas.plans import StudySessionResponse
+from app.services.template_planner import build_template_plan
+
+START = datetime(2026, 3, 2, 9, tzinfo=UTC)
+TOPICS = ['Math', 'Physics', 'Spanish', 'Biology', 'History', 'Chemistry']
+GOALS = [
+    'Pass the final exam',
+    'Build a portfolio project',
+    'Speak fluent Spanish',
+    'Master calculus',
+]
+
+
+def _sessions(count: int, rng: random.Random) -> list[StudySessionResponse]:
+    sessions = []
+    while len(sessions) < count:
+        topic = rng.choice(TOPICS)
+        plan = build_template_plan(rng.choice(GOALS), topic, daily_hours=rng.randint(1, 4))
+        plan_id = f'{rng.getrandbits(128):032x}'
+        for step in plan['steps']:
+            sessions.append(
+                StudySessionResponse(
+                    id=f'{rng.getrandbits(128):032x}',
+                    plan_id=plan_id,
+                    title=step['title'],
+                    topic=topic,
+                    duration_minutes=rng.choice([25, 30, 45, 60, 90]),
+                    status=rng.choice(['pending', 'in_progress', 'done']),
+                    scheduled_at=START + timedelta(minutes=rng.randrange(60 * 24 * 365)),
+                )
+            )
+    return sessions[:count]
+
+
+def _summary(days: int, rng: random.Random) -> DashboardSummaryResponse:
+    return DashboardSummaryResponse(
+        today_completed=3,
+        today_total=5,
+        streak_days=12,
+        weekly_progress=[rng.randint(0, 100) for _ in range(days)],
+        focus_minutes_trend=[
+            {
+                'date': (START + timedelta(days=day)).date().isoformat(),
+                'minutes': rng.randint(0, 240),
+            }
+            for day in range(days)
+        ],
+        subject_distribution=[
+            {'subject': topic, 'minutes': rng.randint(0, 900)} for topic in TOPICS
+        ],
+    )
+
+
+def _serializers():
+    yield 'json', lambda data: to_json(data)
+    yield 'msgpack', lambda data: msgpack.packb(to_jsonable_python(data), use_bin_type=True)
+
+
+def _measure(label: str, data, runs: int) -> None:
+    for format_name, serialize in _serializers():
+        body = serialize(data)
+        seconds = timeit.timeit(lambda serialize=serialize: serialize(data), number=runs) / runs
+        print(
+            f'{label:<22} {format_name:<8} {"identity":<9} {len(body):>10,} B '
+            f'{seconds * 1e6:>10.0f} us'
+        )
+        for encoding, encoder in available_encoders().items():
+            compressed = encoder().finish(body)
+            elapsed = timeit.timeit(
+                lambda serialize=serialize, encoder=encoder: encoder().finish(serialize(data)),
+                number=runs,
+            ) / runs
+            print(
+                f'{label:<22} {format_name:<8} {encoding:<9} {len(compressed):>10,} B '
+                f'{elapsed * 1e6:>10.0f} us'
+            )
+
+
+def main() -> None:
+    rng = random.Random(7)
+    print(f'{"payload":<22} {"format":<8} {"encoding":<9} {"bytes":>12} {"cpu/resp":>13}')
+    _measure('sessions typical (120)', _sessions(120, rng), runs=200)
+    _measure('sessions heavy (5000)', _sessions(5_000, rng), runs=10)
+    _measure('summary 7d', _summary(7, rng), runs=2_000)
+    _measure('summary 30d', _summary(30, rng), runs=2_000)
+    # Cache hits already hold JSON bytes; MessagePack has to re-encode them.
+    cached = to_json(_summary(30, rng))
+    runs = 2_000
+    seconds = timeit.timeit(
+        lambda: msgpack.packb(json.loads(cached), use_bin_type=True), number=runs
+    ) / runs
+    print(f'summary 30d cache hit -> msgpack re-encode: {seconds * 1e6:.0f} us')
+
+
+if __name__ == '__main__':
+    main()
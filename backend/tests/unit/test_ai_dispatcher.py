@@ -0,0 +1,137 @@
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import AiJob
+from app.services import ai_dispatcher
+from app.services.ai_dispatcher import (
+    PRIORITY_INTERACTIVE,
+    _batches,
+    _should_collect,
+    _waiting_jobs,
+    queue_position,
+    recover_stale_jobs,
+)
+
+START = datetime(2026, 3, 2, 9, tzinfo=UTC)
+
+
+def _job(
+    job_id: str, user_id: str, minute: int, priority: int = PRIORITY_INTERACTIVE, **extra
+) -> dict:
+    created_at = START + timedelta(minutes=minute)
+    return {
+        'id': job_id,
+        'user_id': user_id,
+        'goal': 'Pass exam',
+        'topic': 'Math',
+        'status': 'queued',
+        'priority': priority,
+        'created_at': created_at,
+        'updated_at': created_at,
+        **extra,
+    }
+
+
+def test_dispatch_order_is_priority_then_round_robin_across_users() -> None:
+    # ai_jobs only uses portable column types, so SQLite runs the same window query.
+    engine = create_engine('sqlite://')
+    AiJob.__table__.create(engine)
+    with Session(engine) as db:
+        db.execute(
+            insert(AiJob),
+            [
+                _job('heavy-1', 'heavy', 0),
+                _job('heavy-2', 'heavy', 1),
+                _job('heavy-3', 'heavy', 2),
+                _job('light-1', 'light', 3),
+                _job('batch-1', 'batch', -10, priority=0),
+                _job('other-1', 'other', 4),
+                _job('sent-1', 'other', -5, dispatched_at=START),
+            ],
+        )
+        waiting, order = _waiting_jobs()
+
+        assert list(db.scalars(select(waiting.c.id).order_by(*order))) == [
+            'heavy-1',
+            'light-1',
+            'other-1',
+            'heavy-2',
+            'heavy-3',
+            'batch-1',
+        ]
+        assert queue_position(db, 'light-1') == 2
+        assert queue_position(db, 'sent-1') is None
+
+
+def test_claimed_jobs_are_split_into_batches_of_server_parallelism() -> None:
+    assert _batches([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+    assert _batches([1, 2], 1) == [[1], [2]]
+
+
+def test_lone_new_job_waits_for_the_batch_window_only_once(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'ollama_num_parallel', 4)
+    monkeypatch.setattr(settings, 'ai_batch_window_ms', 100)
+    scheduled: list[float] = []
+    celery = SimpleNamespace(send_task=lambda _name, countdown: scheduled.append(countdown))
+    monkeypatch.setattr(ai_dispatcher, '_celery', lambda: celery)
+    fresh = [SimpleNamespace(id='j1', created_at=START - timedelta(milliseconds=30))]
+
+    assert _should_collect(fresh, free_slots=8, now=START) is True
+    assert 0.06 < scheduled[0] <= 0.07
+    # Window over, a full batch, or no room for more than one: dispatch now.
+    assert _should_collect(fresh, free_slots=8, now=START + timedelta(milliseconds=80)) is False
+    assert _should_collect(fresh * 4, free_slots=8, now=START) is False
+    assert _should_collect(fresh, free_slots=1, now=START) is False
+    monkeypatch.setattr(settings, 'ollama_num_parallel', 1)
+    assert _should_collect(fresh, free_slots=8, now=START) is False
+    assert len(scheduled) == 1
+
+
+def test_lost_dispatches_are_requeued_and_stuck_or_expired_jobs_fail(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'ai_dispatch_stale_seconds', 15 * 60)
+    monkeypatch.setattr(settings, 'ai_job_timeout_seconds', 60 * 60)
+    now = START + timedelta(minutes=30)
+    engine = create_engine('sqlite://')
+    AiJob.__table__.create(engine)
+    with Session(engine) as db:
+        db.execute(
+            insert(AiJob),
+            [
+                _job('lost', 'u1', 0, dispatched_at=START),
+                _job('lost-retry', 'u7', 0, dispatched_at=START + timedelta(minutes=5)),
+                _job(
+                    'stuck',
+                    'u2',
+                    0,
+                    status='running',
+                    dispatched_at=START + timedelta(minutes=5),
+                ),
+                _job(
+                    'in-flight',
+                    'u3',
+                    20,
+                    status='running',
+                    dispatched_at=START + timedelta(minutes=20),
+                ),
+                _job('waiting', 'u4', 25),
+                _job('ancient', 'u5', -90),
+                _job('done', 'u6', 0, status='completed', dispatched_at=START),
+            ],
+        )
+
+        assert recover_stale_jobs(db, now) == (2, 2)
+        jobs = {job.id: job for job in db.scalars(select(AiJob))}
+        assert [jobs['lost'].status, jobs['lost'].dispatched_at] == ['queued', None]
+        assert [jobs['lost-retry'].status, jobs['lost-retry'].dispatched_at] == ['queued', None]
+        assert jobs['in-flight'].dispatched_at is not None
+        # Still running after the stale window: requeueing could run it twice.
+        assert jobs['stuck'].status == 'failed'
+        assert jobs['stuck'].error == 'Worker stopped responding'
+        assert jobs['ancient'].status == 'failed'
+        assert jobs['done'].status == 'completed'
+        waiting, order = _waiting_jobs()
+        assert set(db.scalars(select(waiting.c.id))) == {'lost', 'lost-retry', 'waiting'}
@@ -0,0 +1,77 @@
+from datetime import date
+from types import SimpleNamespace
+
+from app.services import ai_job_archive
+from app.services.ai_job_archive import (
+    compress_result,
+    decompress_result,
+    ensure_partitions,
+    expired_months,
+    next_month,
+    partition_month,
+    partition_name,
+)
+
+
+def test_result_round_trips_through_both_codecs(monkeypatch) -> None:
+    text = '{"weekly_plan": [' + ', '.join(['{"day": "Mon", "minutes": 45}'] * 50) + ']}'
+    codec, data = compress_result(text)
+    assert len(data) < len(text.encode())
+    assert decompress_result(codec, data) == text
+
+    monkeypatch.setattr(ai_job_archive, 'zstandard', None)
+    codec, data = compress_result(text)
+    assert codec == 'zlib'
+    assert decompress_result(codec, data) == text
+    assert compress_result(None) == (None, None)
+
+
+def test_partition_names_and_month_bounds() -> None:
+    assert partition_name(date(2026, 2, 1)) == 'ai_jobs_p202602'
+    assert partition_month('ai_jobs_p202602') == date(2026, 2, 1)
+    assert partition_month('ai_jobs_default') is None
+    assert next_month(date(2026, 1, 1)) == date(2026, 2, 1)
+    assert next_month(date(2026, 12, 1)) == date(2027, 1, 1)
+
+
+def test_only_months_entirely_past_retention_expire() -> None:
+    months = [date(2026, 3, 1), date(2026, 4, 1), date(2026, 5, 1), date(2026, 1, 1)]
+    # Cutoff is 2026-05-01: April ends exactly there, May is still partly retained.
+    expected = [date(2026, 1, 1), date(2026, 3, 1), date(2026, 4, 1)]
+    assert expired_months(months, date(2026, 10, 28), 180) == expected
+
+
+class _Db:
+    def __init__(self, existing: set[str], stranded: bool) -> None:
+        self.existing = existing
+        self.stranded = stranded
+        self.statements: list[str] = []
+
+    def scalar(self, statement, params):
+        if 'to_regclass' in str(statement):
+            return params['name'] if params['name'] in self.existing else None
+        return self.stranded
+
+    def execute(self, statement, params=None):
+        self.statements.append(' '.join(str(statement).split()[:4]))
+        return SimpleNamespace(rowcount=3)
+
+
+def test_month_with_rows_in_the_default_partition_takes_them_over() -> None:
+    db = _Db(existing={'ai_jobs_p202603'}, stranded=True)
+
+    assert ensure_partitions(db, date(2026, 3, 10), 1) == ['ai_jobs_p202604']
+    assert db.statements == [
+        'SET LOCAL lock_timeout =',
+        'ALTER TABLE ai_jobs DETACH',
+        'CREATE TABLE ai_jobs_p202604 PARTITION',
+        'WITH moved AS (DELETE',
+        'ALTER TABLE ai_jobs ATTACH',
+    ]
+
+
+def test_month_without_default_rows_is_created_directly() -> None:
+    db = _Db(existing=set(), stranded=False)
+
+    assert ensure_partitions(db, date(2026, 3, 10), 0) == ['ai_jobs_p202603']
+    assert db.statements == ['CREATE TABLE ai_jobs_p202603 PARTITION']
@@ -0,0 +1,87 @@
+import httpx
+import pytest
+
+from app.core import metrics
+from app.core.config import settings
+from app.services import ai_service
+from app.services.ai_service import (
+    SYSTEM_PROMPT,
+    AiRequestRejectedError,
+    AiServiceUnavailableError,
+    _request_body,
+    generate_study_plan,
+    record_generation_metrics,
+)
+
+
+def test_request_keeps_the_fixed_prefix_in_system_and_caps_generation(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'ollama_num_predict', 512)
+    monkeypatch.setattr(settings, 'ollama_stop', ['\n\n\n'])
+    body = _request_body('Goal: Pass exam\nTopic: Math')
+
+    assert body['system'] == SYSTEM_PROMPT
+    assert body['prompt'] == 'Goal: Pass exam\nTopic: Math'
+    assert body['keep_alive'] == settings.ollama_keep_alive
+    assert body['options']['num_predict'] == 512
+    assert body['options']['num_ctx'] == settings.ollama_num_ctx
+    assert body['options']['stop'] == ['\n\n\n']
+    assert _request_body('x', num_predict=1)['options']['num_predict'] == 1
+
+
+def test_generation_metrics_report_ttft_and_tokens() -> None:
+    before = metrics.snapshot()['timings'].get('ai.ollama.output_tokens', {'count': 0, 'sum': 0})
+    truncated = metrics.counter_value('ai.ollama.truncated')
+    record_generation_metrics(
+        {
+            'load_duration': 2_000_000_000,
+            'prompt_eval_duration': 500_000_000,
+            'prompt_eval_count': 180,
+            'eval_count': 400,
+            'eval_duration': 8_000_000_000,
+            'done_reason': 'length',
+        }
+    )
+
+    timings = metrics.snapshot()['timings']
+    assert timings['ai.ollama.ttft_seconds']['max'] >= 2.5
+    assert timings['ai.ollama.output_tokens']['sum'] - before['sum'] == 400
+    assert timings['ai.ollama.tokens_per_second']['max'] >= 50
+    assert metrics.counter_value('ai.ollama.truncated') == truncated + 1
+
+
+def test_missing_response_text_is_an_unavailable_model(monkeypatch) -> None:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={'done': True}))
+    client = httpx.Client
+    monkeypatch.setattr(httpx, 'Client', lambda **kwargs: client(transport=transport, **kwargs))
+    monkeypatch.setattr(ai_service.ollama_breaker, 'allow_request', lambda: True)
+    monkeypatch.setattr(ai_service.ollama_breaker, 'record_success', lambda: None)
+
+    with pytest.raises(AiServiceUnavailableError):
+        generate_study_plan('Pass exam', 'Math')
+
+
+def _respond_with(monkeypatch, status_code: int) -> list[str]:
+    transport = httpx.MockTransport(lambda request: httpx.Response(status_code, json={}))
+    client = httpx.Client
+    monkeypatch.setattr(httpx, 'Client', lambda **kwargs: client(transport=transport, **kwargs))
+    outcomes: list[str] = []
+    monkeypatch.setattr(ai_service.ollama_breaker, 'allow_request', lambda: True)
+    monkeypatch.setattr(ai_service.ollama_breaker, 'record_success', lambda: outcomes.append('ok'))
+    monkeypatch.setattr(ai_service.ollama_breaker, 'record_failure', lambda: outcomes.append('fail'))
+    return outcomes
+
+
+def test_client_error_is_not_an_outage(monkeypatch) -> None:
+    outcomes = _respond_with(monkeypatch, 404)
+
+    with pytest.raises(AiRequestRejectedError):
+        generate_study_plan('Pass exam', 'Math')
+    assert outcomes == ['ok']
+
+
+def test_server_error_counts_against_the_breaker(monkeypatch) -> None:
+    outcomes = _respond_with(monkeypatch, 503)
+
+    with pytest.raises(AiServiceUnavailableError):
+        generate_study_plan('Pass exam', 'Math')
+    assert outcomes == ['fail']
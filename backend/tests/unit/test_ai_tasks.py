@@ -0,0 +1,67 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.db.models import AiJob
+from app.services.ai_service import AiServiceUnavailableError
+from app.workers.tasks import ai_tasks
+
+
+def _engine_with_job(tmp_path, status: str = 'queued'):
+    engine = create_engine(f'sqlite:///{tmp_path}/jobs.db', poolclass=QueuePool, pool_size=1)
+    AiJob.__table__.create(engine)
+    now = datetime.now(UTC)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(AiJob),
+            [
+                {
+                    'id': 'j1',
+                    'user_id': 'u1',
+                    'goal': 'g',
+                    'topic': 't',
+                    'status': status,
+                    'created_at': now,
+                    'updated_at': now,
+                }
+            ],
+        )
+    return engine
+
+
+def test_no_connection_is_held_during_the_model_call(tmp_path, monkeypatch) -> None:
+    engine = _engine_with_job(tmp_path)
+    monkeypatch.setattr(ai_tasks, 'SessionLocal', sessionmaker(bind=engine))
+    monkeypatch.setattr(settings, 'ai_plan_mode', 'llm')
+    monkeypatch.setattr(settings, 'ai_plan_reuse_enabled', True)
+
+    def library_miss(db, _embedding, _min_similarity):
+        db.execute(select(AiJob.id))  # opens a transaction, like the vector lookup
+        return None
+
+    checked_out: list[int] = []
+
+    def model_call(**_kwargs):
+        checked_out.append(engine.pool.checkedout())
+        raise AiServiceUnavailableError('model down')
+
+    monkeypatch.setattr(ai_tasks, 'reuse_plan', library_miss)
+    monkeypatch.setattr(ai_tasks, 'generate_study_plan', model_call)
+
+    assert ai_tasks._run_job('j1', 'g', 't', retries=3, max_retries=3)['status'] == 'failed'
+    assert checked_out == [0]
+
+
+def test_job_running_elsewhere_is_not_run_again(tmp_path, monkeypatch) -> None:
+    engine = _engine_with_job(tmp_path, status='running')
+    monkeypatch.setattr(ai_tasks, 'SessionLocal', sessionmaker(bind=engine))
+    monkeypatch.setattr(settings, 'ai_plan_mode', 'llm')
+    monkeypatch.setattr(settings, 'ai_plan_reuse_enabled', False)
+    calls: list[str] = []
+    monkeypatch.setattr(ai_tasks, 'generate_study_plan', lambda **kwargs: calls.append('model'))
+
+    assert ai_tasks._run_job('j1', 'g', 't', retries=0, max_retries=3)['status'] == 'running'
+    assert calls == []
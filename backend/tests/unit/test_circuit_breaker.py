@@ -0,0 +1,109 @@
+import fakeredis
+import pytest
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.services import circuit_breaker
+from app.services.circuit_breaker import CircuitBreaker
+from app.workers.tasks.ai_tasks import _retry_backoff_seconds
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    clock = _Clock()
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(circuit_breaker, 'get_redis', lambda: redis)
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+    return clock
+
+
+class _RedisDown:
+    def __getattr__(self, _name):
+        raise RedisError('connection refused')
+
+
+def _breaker() -> CircuitBreaker:
+    return CircuitBreaker('test', failure_threshold=3, window_seconds=60, open_seconds=30)
+
+
+def test_circuit_opens_after_threshold_failures(clock) -> None:
+    breaker = _breaker()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == 30
+    clock.now += 10
+    assert breaker.retry_after() == 20
+
+
+def test_success_resets_the_failure_count(clock) -> None:
+    breaker = _breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+
+    assert breaker.allow_request()
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success(clock) -> None:
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 31
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # others wait for the probe
+
+    breaker.record_success()
+
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+    assert breaker.retry_after() == 0
+
+
+def test_failed_probe_reopens_the_circuit(clock) -> None:
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 31
+    assert breaker.allow_request()
+
+    breaker.record_failure()  # a single failure is enough while probing
+
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == 30
+
+
+def test_breaker_fails_open_without_redis(monkeypatch) -> None:
+    monkeypatch.setattr(circuit_breaker, 'get_redis', _RedisDown)
+    breaker = _breaker()
+    for _ in range(5):
+        breaker.record_failure()
+
+    assert breaker.allow_request()
+    assert breaker.retry_after() == 0
+
+
+def test_retry_backoff_grows_with_full_jitter_and_is_capped(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'ai_retry_backoff_base_seconds', 5.0)
+    monkeypatch.setattr(settings, 'ai_retry_backoff_max_seconds', 60.0)
+    bounds = {0: (5.0, 5.0), 1: (5.0, 10.0), 2: (5.0, 20.0), 3: (5.0, 40.0), 6: (5.0, 60.0)}
+
+    for retries, (low, high) in bounds.items():
+        delays = [_retry_backoff_seconds(retries) for _ in range(200)]
+        assert all(low <= delay <= high for delay in delays)
+    assert max(_retry_backoff_seconds(6) for _ in range(200)) > 40
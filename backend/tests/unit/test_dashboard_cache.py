@@ -0,0 +1,99 @@
+import fakeredis
+import pytest
+
+from app.core.config import settings
+from app.schemas.dashboard import DashboardSummaryResponse
+from app.services import dashboard_cache
+from app.services.dashboard_cache import get_or_compute_summary, invalidate_dashboard_summary
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(dashboard_cache, 'get_redis', lambda: redis)
+    monkeypatch.setattr(settings, 'dashboard_cache_enabled', True)
+    dashboard_cache._read_script.cache_clear()
+    yield redis
+    dashboard_cache._read_script.cache_clear()
+
+
+class _Compute:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self) -> DashboardSummaryResponse:
+        self.calls += 1
+        return DashboardSummaryResponse(
+            today_completed=self.calls,
+            today_total=3,
+            streak_days=0,
+            weekly_progress=[],
+            focus_minutes_trend=[],
+            subject_distribution=[],
+        )
+
+
+def _entry_key(redis, user_id: str) -> bytes:
+    (key,) = [key for key in redis.keys(f'dashboard:summary:{user_id}:*') if b':lock' not in key]
+    return key
+
+
+def test_entries_are_keyed_by_version_and_invalidation_moves_on(redis) -> None:
+    compute = _Compute()
+    first = get_or_compute_summary('u1', 'week', compute)
+    assert get_or_compute_summary('u1', 'week', compute) == first
+    assert compute.calls == 1
+    assert _entry_key(redis, 'u1').startswith(b'dashboard:summary:u1:0:week:')
+
+    invalidate_dashboard_summary('u1')
+    second = get_or_compute_summary('u1', 'week', compute)
+
+    assert compute.calls == 2
+    assert second != first
+    versions = {key.split(b':')[3] for key in redis.keys('dashboard:summary:u1:*')}
+    assert versions == {b'0', b'1'}  # the old entry just expires
+
+
+def test_result_computed_under_an_old_version_is_never_served(redis) -> None:
+    compute = _Compute()
+
+    def racing_compute() -> DashboardSummaryResponse:
+        invalidate_dashboard_summary('u1')  # a write lands while we compute
+        return compute()
+
+    get_or_compute_summary('u1', 'week', racing_compute)
+    get_or_compute_summary('u1', 'week', compute)
+
+    assert compute.calls == 2
+
+
+def test_concurrent_miss_waits_for_the_lock_holder(redis, monkeypatch) -> None:
+    compute = _Compute()
+    payload = get_or_compute_summary('u1', 'week', compute)
+    entry_key = _entry_key(redis, 'u1')
+    redis.delete(entry_key)
+    redis.set(entry_key + b':lock', b'1', nx=True, px=5_000)
+
+    def holder_finishes(_seconds: float) -> None:
+        redis.set(entry_key, payload)
+
+    monkeypatch.setattr(dashboard_cache.time, 'sleep', holder_finishes)
+
+    assert get_or_compute_summary('u1', 'week', compute) == payload
+    assert compute.calls == 1
+
+
+def test_waiter_computes_itself_when_the_lock_holder_never_writes(redis, monkeypatch) -> None:
+    compute = _Compute()
+    get_or_compute_summary('u1', 'week', compute)
+    entry_key = _entry_key(redis, 'u1')
+    redis.delete(entry_key)
+    redis.set(entry_key + b':lock', b'1', nx=True, px=5_000)
+    monkeypatch.setattr(dashboard_cache, '_LOCK_WAIT_SECONDS', 0.1)
+    monkeypatch.setattr(dashboard_cache, '_LOCK_POLL_SECONDS', 0.01)
+
+    get_or_compute_summary('u1', 'week', compute)
+
+    assert compute.calls == 2
+    assert redis.get(entry_key) is not None
+    assert redis.exists(entry_key + b':lock')  # the holder's lock is left alone
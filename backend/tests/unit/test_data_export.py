@@ -0,0 +1,138 @@
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.api.v1 import ai
+from app.api.v1.exports import import_ndjson
+from app.core.config import settings
+from app.db.models import AiJob, OnboardingPreference, OutboxEvent, StudyPlan, StudySession
+from app.schemas.ai import GeneratePlanRequest
+from app.schemas.exports import PlanRecord, SessionRecord, export_record_adapter
+from app.services.data_export import DataImportError, NdjsonImporter, _ics_event, _ics_line
+
+SCHEDULED = datetime(2026, 3, 2, 9, 30, tzinfo=UTC)
+
+
+def test_long_ics_lines_are_folded_at_75_octets() -> None:
+    line = _ics_line('SUMMARY:' + 'é' * 60)
+
+    physical = line.removesuffix('\r\n').split('\r\n')
+    assert len(physical) > 1
+    assert all(len(item.encode()) <= 75 for item in physical)
+    assert all(item.startswith(' ') for item in physical[1:])
+    unfolded = ''.join(item[1:] if index else item for index, item in enumerate(physical))
+    assert unfolded == 'SUMMARY:' + 'é' * 60
+
+
+def test_ics_event_escapes_text_and_uses_utc() -> None:
+    row = SimpleNamespace(
+        id='session-1',
+        title='Algebra; part 1, review',
+        topic='Math',
+        duration_minutes=45,
+        scheduled_at=SCHEDULED,
+    )
+    event = _ics_event(row, '20260301T000000Z')
+
+    assert 'SUMMARY:Algebra\\; part 1\\, review\r\n' in event
+    assert 'DTSTART:20260302T093000Z\r\n' in event
+    assert 'DURATION:PT45M\r\n' in event
+
+
+def test_ndjson_records_round_trip() -> None:
+    record = SessionRecord(
+        id='session-1',
+        plan_id='plan-1',
+        title='Algebra',
+        topic='Math',
+        duration_minutes=45,
+        status='done',
+        scheduled_at=SCHEDULED,
+        completed_at=SCHEDULED,
+        created_at=SCHEDULED,
+    )
+
+    assert export_record_adapter.validate_json(record.model_dump_json()) == record
+
+
+class _Body:
+    def __init__(self, *chunks: bytes) -> None:
+        self.chunks = chunks
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def _import(*chunks: bytes) -> int:
+    user = SimpleNamespace(id='u1')
+    with pytest.raises(HTTPException) as rejected:
+        asyncio.run(import_ndjson(_Body(*chunks), db=None, current_user=user))
+    return rejected.value.status_code
+
+
+def test_oversized_line_inside_a_chunk_is_rejected(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'import_max_line_bytes', 100)
+    assert _import(b'x' * 500 + b'\n{}\n') == 413
+
+
+def test_import_size_is_capped(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'import_max_bytes', 1000)
+    assert _import(*[b'{}\n' * 100] * 4) == 413
+
+
+def test_oversized_duration_is_a_validation_error() -> None:
+    record = SessionRecord(
+        id='session-1',
+        plan_id=None,
+        title='Algebra',
+        topic='Math',
+        duration_minutes=45,
+        status='pending',
+        scheduled_at=None,
+        completed_at=None,
+        created_at=SCHEDULED,
+    )
+    line = json.dumps({**record.model_dump(mode='json'), 'duration_minutes': 10**11})
+
+    with pytest.raises(DataImportError, match='line 1'):
+        NdjsonImporter(db=None, user_id='u1').import_lines([line.encode()])
+
+
+def _plan_line(created_at: datetime) -> bytes:
+    plan = PlanRecord(
+        id='plan-1',
+        title='Math Study Plan',
+        topic='Math',
+        duration_minutes=120,
+        status='pending',
+        created_at=created_at,
+    )
+    return plan.model_dump_json().encode()
+
+
+def test_imported_plans_keep_their_week(monkeypatch) -> None:
+    # A restored plan from the current week is this week's plan; older ones are history.
+    monkeypatch.setattr(settings, 'ai_plan_mode', 'template')
+    monkeypatch.setattr(ai, 'invalidate_dashboard_summary', lambda _user_id: None)
+    engine = create_engine('sqlite://')
+    for model in (AiJob, OnboardingPreference, OutboxEvent, StudyPlan, StudySession):
+        model.__table__.create(engine)
+    payload = GeneratePlanRequest(goal='Pass the exam', topic='Math')
+    now = datetime.now(UTC)
+
+    with Session(engine) as db:
+        NdjsonImporter(db, 'old').import_lines([_plan_line(now - timedelta(days=30))])
+        NdjsonImporter(db, 'current').import_lines([_plan_line(now)])
+        db.commit()
+
+        assert ai._create_generation_job(db, 'old', payload).status == 'completed'
+        with pytest.raises(HTTPException) as rejected:
+            ai._create_generation_job(db, 'current', payload)
+        assert rejected.value.status_code == 409
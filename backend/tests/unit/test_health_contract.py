@@ -1,4 +1,9 @@
+import pytest
+from fastapi import HTTPException
+
 from app.api.v1.health import live, ready
+from app.core.config import settings
+from app.core.dependencies import require_metrics_token
 
 
 def test_live() -> None:
@@ -7,3 +12,16 @@ def test_live() -> None:
 
 def test_ready() -> None:
     assert ready()['status'] == 'ready'
+
+
+def test_metrics_need_the_configured_token(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'metrics_token', '')
+    with pytest.raises(HTTPException) as disabled:
+        require_metrics_token('anything')
+    assert disabled.value.status_code == 404
+
+    monkeypatch.setattr(settings, 'metrics_token', 's3cret')
+    with pytest.raises(HTTPException) as wrong:
+        require_metrics_token('guess')
+    assert wrong.value.status_code == 401
+    require_metrics_token('s3cret')
@@ -0,0 +1,20 @@
+from starlette.requests import Request
+
+from app.api.v1.home import _etag_matches
+
+ETAG = 'W/"0123456789abcdef0123"'
+
+
+def _request(if_none_match: str | None) -> Request:
+    headers = [(b'if-none-match', if_none_match.encode())] if if_none_match else []
+    return Request({'type': 'http', 'method': 'GET', 'path': '/home', 'headers': headers})
+
+
+def test_etag_matches_any_listed_tag() -> None:
+    assert _etag_matches(_request(f'W/"other", {ETAG}'), ETAG)
+    assert _etag_matches(_request('*'), ETAG)
+
+
+def test_etag_mismatch_or_missing_header() -> None:
+    assert not _etag_matches(_request('W/"other"'), ETAG)
+    assert not _etag_matches(_request(None), ETAG)
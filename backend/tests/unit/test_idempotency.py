@@ -0,0 +1,73 @@
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.api.v1.ai import _in_flight_job
+from app.core.config import settings
+from app.core.idempotency import _replay
+from app.db.models import AiJob
+
+
+def _stored(state: str, fingerprint: str = 'abc', body: str | None = None) -> bytes:
+    entry = {'state': state, 'fingerprint': fingerprint}
+    if body is not None:
+        entry['body'] = body
+    return json.dumps(entry).encode()
+
+
+def test_completed_request_is_replayed() -> None:
+    claim = _replay(_stored('done', body='{"job_id":"job-1","status":"queued"}'), 'abc')
+
+    assert claim.redis_key is None
+    assert claim.replay is not None
+    assert claim.replay.body == b'{"job_id":"job-1","status":"queued"}'
+    assert claim.replay.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_request_in_progress_is_rejected() -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        _replay(_stored('pending'), 'abc')
+
+    assert exc_info.value.status_code == 409
+
+
+def test_key_reused_with_different_body_is_rejected() -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        _replay(_stored('done', body='{}'), 'other')
+
+    assert exc_info.value.status_code == 422
+
+
+def test_expired_key_runs_request_again() -> None:
+    claim = _replay(None, 'abc')
+
+    assert claim.replay is None
+    assert claim.redis_key is None
+
+
+def test_in_flight_guard_ignores_lost_and_expired_jobs(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'ai_dispatch_stale_seconds', 15 * 60)
+    monkeypatch.setattr(settings, 'ai_job_timeout_seconds', 60 * 60)
+    week_start = datetime(2026, 3, 2, tzinfo=UTC)
+    now = week_start + timedelta(days=2)
+    engine = create_engine('sqlite://')
+    AiJob.__table__.create(engine)
+
+    def add(job_id: str, age: timedelta, **extra) -> None:
+        created_at = now - age
+        row = {'id': job_id, 'user_id': 'u1', 'goal': 'g', 'topic': 't', 'status': 'queued'}
+        row.update(created_at=created_at, updated_at=created_at, **extra)
+        db.execute(insert(AiJob), [row])
+
+    with Session(engine) as db:
+        add('lost', timedelta(minutes=40), dispatched_at=now - timedelta(minutes=30))
+        add('expired', timedelta(hours=2))
+        assert _in_flight_job(db, 'u1', week_start, week_start + timedelta(days=7), now) is None
+
+        add('live', timedelta(minutes=1), dispatched_at=now - timedelta(seconds=30))
+        job = _in_flight_job(db, 'u1', week_start, week_start + timedelta(days=7), now)
+        assert job.id == 'live'
@@ -0,0 +1,28 @@
+import json
+import logging
+
+from app.core.logging import ContextFilter, DebugSamplingFilter, JsonFormatter, request_id_var
+
+
+def _record(level: int, message: str = 'hello') -> logging.LogRecord:
+    return logging.LogRecord('test', level, __file__, 1, message, None, None)
+
+
+def test_debug_sampling_never_drops_info() -> None:
+    sampler = DebugSamplingFilter(0.0)
+    assert sampler.filter(_record(logging.INFO))
+    assert not sampler.filter(_record(logging.DEBUG))
+
+
+def test_json_formatter_includes_request_id() -> None:
+    token = request_id_var.set('req-123')
+    try:
+        record = _record(logging.INFO)
+        ContextFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload['message'] == 'hello'
+    assert payload['request_id'] == 'req-123'
+    assert 'job_id' not in payload
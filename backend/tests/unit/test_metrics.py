@@ -0,0 +1,50 @@
+import fakeredis
+
+from app.api.v1 import health
+from app.core import metrics
+from app.services import plan_library  # noqa: F401  (registers the hit-ratio collector)
+from app.services.ai_service import record_generation_metrics
+from app.workers import metrics_exporter
+
+
+def test_worker_snapshots_are_pushed_to_redis_and_listed(monkeypatch) -> None:
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(metrics_exporter, 'get_redis', lambda: redis)
+    monkeypatch.setattr(health, 'get_redis', lambda: redis)
+    metrics.increment('celery.test.exported')
+    metrics.observe('celery.queue_wait_seconds.ai', 0.25)
+
+    metrics_exporter.export_once('generation')
+
+    [(process, snapshot)] = health.worker_metrics().items()
+    assert process == metrics_exporter.process_name('generation')
+    assert snapshot['counters']['celery.test.exported'] >= 1
+    assert snapshot['timings']['celery.queue_wait_seconds.ai']['max'] >= 0.25
+    assert 0 < redis.ttl(f'{metrics.EXPORT_PREFIX}{process}') <= 45
+
+
+def test_plan_reuse_hit_ratio_is_part_of_the_exported_snapshot(monkeypatch) -> None:
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(metrics_exporter, 'get_redis', lambda: redis)
+    metrics.increment('ai.plan_reuse.hits')
+
+    metrics_exporter.export_once('generation')
+
+    snapshot = metrics.exported_snapshots(redis)[metrics_exporter.process_name('generation')]
+    assert 0 < snapshot['gauges']['ai.plan_reuse.hit_ratio'] <= 1
+    assert snapshot['counters']['ai.plan_reuse.hits'] >= 1
+
+
+def test_generation_metrics_are_part_of_the_exported_snapshot(monkeypatch) -> None:
+    redis = fakeredis.FakeRedis()
+    monkeypatch.setattr(metrics_exporter, 'get_redis', lambda: redis)
+    record_generation_metrics(
+        {'prompt_eval_duration': 400_000_000, 'eval_count': 300, 'eval_duration': 6_000_000_000}
+    )
+
+    metrics_exporter.export_once('generation')
+
+    snapshots = metrics.exported_snapshots(redis)
+    timings = snapshots[metrics_exporter.process_name('generation')]['timings']
+    assert timings['ai.ollama.ttft_seconds']['count'] >= 1
+    assert timings['ai.ollama.output_tokens']['max'] >= 300
@@ -0,0 +1,53 @@
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db.models import OutboxEvent
+from app.services.outbox import AI_DISPATCH, CACHE_INVALIDATE, add_event, relay_batch
+
+
+def _db() -> Session:
+    engine = create_engine('sqlite://')
+    OutboxEvent.__table__.create(engine)
+    return Session(engine)
+
+
+def test_relay_publishes_each_topic_once_per_batch_and_deletes_rows() -> None:
+    db = _db()
+    add_event(db, CACHE_INVALIDATE, {'user_ids': ['u1']})
+    add_event(db, AI_DISPATCH, {'job_id': 'j1'})
+    add_event(db, CACHE_INVALIDATE, {'user_ids': ['u2', 'u1']})
+    db.commit()
+
+    calls: list[tuple[str, list[dict]]] = []
+    handlers = {
+        CACHE_INVALIDATE: lambda payloads: calls.append((CACHE_INVALIDATE, payloads)),
+        AI_DISPATCH: lambda payloads: calls.append((AI_DISPATCH, payloads)),
+    }
+
+    assert relay_batch(db, 2, handlers) == 2
+    assert calls == [(CACHE_INVALIDATE, [{'user_ids': ['u1']}]), (AI_DISPATCH, [{'job_id': 'j1'}])]
+    assert relay_batch(db, 2, handlers) == 1
+    assert relay_batch(db, 2, handlers) == 0
+    assert db.scalars(select(OutboxEvent)).all() == []
+
+
+def test_failed_topic_is_kept_and_backed_off_without_blocking_others() -> None:
+    db = _db()
+    add_event(db, CACHE_INVALIDATE, {'user_ids': ['u1']})
+    add_event(db, AI_DISPATCH, {'job_id': 'j1'})
+    db.commit()
+
+    def broker_down(_payloads: list[dict]) -> None:
+        raise ConnectionError('broker down')
+
+    delivered: list[list[dict]] = []
+    handlers = {AI_DISPATCH: broker_down, CACHE_INVALIDATE: delivered.append}
+
+    assert relay_batch(db, 10, handlers) == 1
+    assert delivered == [[{'user_ids': ['u1']}]]
+
+    pending = db.scalars(select(OutboxEvent)).all()
+    assert [(event.topic, event.attempts) for event in pending] == [(AI_DISPATCH, 1)]
+    assert 'broker down' in pending[0].last_error
+    # Backed off: not claimed again right away.
+    assert relay_batch(db, 10, handlers) == 0
@@ -0,0 +1,36 @@
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db.models import PlanLibraryEntry
+from app.services.plan_library import DIMENSIONS, cosine_similarity, embed, remember_plan
+
+
+def test_embedding_is_deterministic_and_normalized() -> None:
+    vector = embed('Pass the final exam', 'Calculus')
+    assert len(vector) == DIMENSIONS
+    assert vector == embed('Pass the final exam', 'Calculus')
+    assert abs(sum(item * item for item in vector) - 1.0) < 1e-9
+
+
+def test_rewrites_stay_close_and_other_topics_do_not() -> None:
+    base = embed('Pass the final exam', 'Calculus')
+    assert cosine_similarity(base, embed('I want to PASS the final exam!', 'calculus')) > 0.95
+    assert cosine_similarity(base, embed('Pass the final exams', 'Calculus')) > 0.85
+    assert cosine_similarity(base, embed('Pass the final exam', 'Art History')) < 0.7
+    assert cosine_similarity(base, embed('Train for a marathon', 'Running')) < 0.2
+
+
+def test_embedding_round_trips_through_the_vector_column() -> None:
+    engine = create_engine('sqlite://')
+    PlanLibraryEntry.__table__.create(engine)
+    db = Session(engine)
+    vector = embed('Speak Spanish', 'Spanish')
+    plan = {'title': 'Spanish Study Plan', 'summary': 'Daily practice.', 'steps': []}
+    remember_plan(
+        db, goal='Speak Spanish', topic='Spanish', embedding=vector, plan=plan, job_id='j1'
+    )
+    db.commit()
+
+    stored = db.scalars(select(PlanLibraryEntry)).one()
+    assert stored.plan == plan
+    assert [round(item, 5) for item in stored.embedding] == [round(item, 5) for item in vector]
@@ -0,0 +1,59 @@
+import json
+import time
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.profiling import ProfiledRoute, ProfilingMiddleware
+
+
+def _busy_dashboard() -> dict:
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    return {'ok': True}
+
+
+def _client(tmp_path, sample_rate: float = 0.0) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=str(tmp_path),
+        sample_rate=sample_rate,
+        token='secret',
+        interval_ms=1,
+    )
+    router = APIRouter(route_class=ProfiledRoute)
+
+    @router.get('/dashboard')
+    def dashboard(days: int = 7) -> dict:
+        return _busy_dashboard() | {'days': days}
+
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_profile_header_writes_a_speedscope_file_for_the_endpoint_thread(tmp_path) -> None:
+    response = _client(tmp_path).get('/dashboard?days=3', headers={'X-Profile': 'secret'})
+
+    assert response.json() == {'ok': True, 'days': 3}
+    written = tmp_path / response.headers['x-profile']
+    profile = json.loads(written.read_text())
+    frames = [frame['name'] for frame in profile['shared']['frames']]
+    sampled = profile['profiles'][0]
+    assert sampled['type'] == 'sampled'
+    assert len(sampled['samples']) == len(sampled['weights']) > 0
+    assert '_busy_dashboard' in frames
+    assert sum(sampled['weights']) <= sampled['endValue']
+
+
+def test_requests_without_the_token_are_left_alone(tmp_path) -> None:
+    client = _client(tmp_path)
+    response = client.get('/dashboard', headers={'X-Profile': 'guess'})
+
+    assert 'x-profile' not in response.headers
+    assert list(tmp_path.iterdir()) == []
+    # Sampled requests are profiled without telling the client.
+    response = _client(tmp_path, sample_rate=1.0).get('/dashboard')
+    assert 'x-profile' not in response.headers
+    assert len(list(tmp_path.iterdir())) == 1
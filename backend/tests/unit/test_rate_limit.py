@@ -0,0 +1,107 @@
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.requests import Request
+
+from app.core import rate_limit, security
+from app.core.config import settings
+from app.core.dependencies import get_token_user_id
+from app.core.rate_limit import Limit, _LocalBuckets, _login_buckets, client_address
+from app.core.security import create_access_token
+
+
+def test_burst_then_limited_with_retry_hint() -> None:
+    buckets = _LocalBuckets()
+    limit = Limit(per_minute=60, burst=3)
+
+    assert [buckets.take(['client'], [limit]) for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait_ms = buckets.take(['client'], [limit])
+    assert 0 < wait_ms <= 1000
+
+
+def test_global_bucket_limits_all_clients() -> None:
+    buckets = _LocalBuckets()
+    per_client = Limit(per_minute=60, burst=5)
+    shared = Limit(per_minute=60, burst=2)
+
+    assert buckets.take(['a', 'global'], [per_client, shared]) == 0.0
+    assert buckets.take(['b', 'global'], [per_client, shared]) == 0.0
+    assert buckets.take(['c', 'global'], [per_client, shared]) > 0
+    # A rejected request takes no token from the per-client bucket either.
+    assert [buckets.take(['c'], [per_client]) for _ in range(5)] == [0.0] * 5
+
+
+def _request(peer: str, *forwarded: str) -> Request:
+    headers = [(b'x-forwarded-for', value.encode()) for value in forwarded]
+    return Request({'type': 'http', 'headers': headers, 'client': (peer, 1234)})
+
+
+def test_forwarded_for_ignored_unless_proxies_trusted(monkeypatch) -> None:
+    request = _request('10.0.0.2', '203.0.113.9')
+
+    monkeypatch.setattr(settings, 'rate_limit_trusted_proxy_hops', 0)
+    assert client_address(request) == '10.0.0.2'
+    monkeypatch.setattr(settings, 'rate_limit_trusted_proxy_hops', 1)
+    assert client_address(request) == '203.0.113.9'
+
+
+def test_forwarded_for_skips_client_supplied_entries(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'rate_limit_trusted_proxy_hops', 2)
+    # The client sent a spoofed entry; the two trusted proxies appended theirs.
+    request = _request('10.0.0.2', '1.1.1.1, 203.0.113.9', '10.0.0.1')
+
+    assert client_address(request) == '203.0.113.9'
+    # Fewer entries than trusted hops: the header is not from our proxies.
+    assert client_address(_request('10.0.0.2', '1.1.1.1')) == '10.0.0.2'
+
+
+def test_login_limited_per_address_and_per_account(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'rate_limit_trusted_proxy_hops', 0)
+    monkeypatch.setattr(settings, 'rate_limit_login_global_per_minute', 0)
+    request = _request('10.0.0.2')
+
+    keys, limits = _login_buckets(request, 'Ana@Example.com ')
+    assert keys == _login_buckets(request, 'ana@example.com')[0]
+    assert limits == [
+        Limit(settings.rate_limit_login_per_minute, settings.rate_limit_login_burst),
+        Limit(settings.rate_limit_auth_per_minute, settings.rate_limit_auth_burst),
+    ]
+    other_keys, _ = _login_buckets(request, 'bo@example.com')
+    # Every account tried from one address draws on the same address bucket.
+    assert other_keys[0] == keys[0]
+    assert other_keys[1] != keys[1]
+    assert _login_buckets(_request('10.0.0.3'), 'ana@example.com')[0][1] != keys[1]
+    assert 'ana' not in keys[1]
+
+
+def test_stuffing_from_one_address_is_limited(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'rate_limit_trusted_proxy_hops', 0)
+    monkeypatch.setattr(settings, 'rate_limit_login_burst', 3)
+    buckets = _LocalBuckets()
+    request = _request('10.0.0.2')
+
+    waits = [buckets.take(*_login_buckets(request, f'user{n}@example.com')) for n in range(4)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3] > 0
+
+
+def test_token_is_decoded_once_per_request(monkeypatch) -> None:
+    token = create_access_token('user-1')
+    request = Request(
+        {
+            'type': 'http',
+            'headers': [(b'authorization', f'Bearer {token}'.encode())],
+            'client': ('10.0.0.2', 1234),
+        }
+    )
+    decoded: list[str] = []
+    real_decode = security.decode_access_token
+
+    def counting_decode(value: str) -> dict:
+        decoded.append(value)
+        return real_decode(value)
+
+    monkeypatch.setattr(security, 'decode_access_token', counting_decode)
+
+    assert rate_limit._client_identity(request, 'reads') == 'user:user-1'
+    credentials = HTTPAuthorizationCredentials(scheme='Bearer', credentials=token)
+    assert get_token_user_id(request, credentials) == 'user-1'
+    assert decoded == [token]
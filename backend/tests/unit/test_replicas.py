@@ -0,0 +1,61 @@
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.core import dependencies
+from app.db.models import User
+from app.db.replicas import ReplicaPool
+
+
+def _engines(count: int) -> list:
+    return [create_engine('sqlite://') for _ in range(count)]
+
+
+def test_replicas_are_used_round_robin() -> None:
+    engines = _engines(3)
+    pool = ReplicaPool(engines, retry_seconds=30)
+
+    first_choices = [pool.candidates()[0] for _ in range(4)]
+    assert first_choices == [engines[0], engines[1], engines[2], engines[0]]
+
+
+def test_failed_replica_is_skipped_until_retry() -> None:
+    engines = _engines(2)
+    pool = ReplicaPool(engines, retry_seconds=30)
+    pool.mark_down(engines[0], OperationalError('connect', {}, Exception('refused')))
+
+    assert all(pool.candidates() == [engines[1]] for _ in range(3))
+
+    pool.retry_seconds = 0
+    pool.mark_down(engines[1], OperationalError('connect', {}, Exception('refused')))
+    assert engines[1] in pool.candidates()
+
+
+def test_replica_reads_never_check_out_a_primary_connection(tmp_path, monkeypatch) -> None:
+    primary = create_engine(f'sqlite:///{tmp_path}/primary.db', poolclass=QueuePool)
+    replica = create_engine(f'sqlite:///{tmp_path}/replica.db', poolclass=QueuePool)
+    for item in (primary, replica):
+        User.__table__.create(item)
+    with primary.begin() as conn:
+        conn.execute(insert(User), [{'id': u, 'email': u, 'password_hash': '-'} for u in 'ab'])
+    with replica.begin() as conn:
+        conn.execute(insert(User), [{'id': 'a', 'email': 'a', 'password_hash': '-'}])
+    primary_checkouts: list[int] = []
+    monkeypatch.setattr(dependencies, 'engine', primary)
+    monkeypatch.setattr(dependencies, 'SessionLocal', sessionmaker(bind=primary))
+    monkeypatch.setattr(dependencies, 'replicas', ReplicaPool([replica], retry_seconds=30))
+    monkeypatch.setattr(dependencies, 'is_primary_sticky', lambda _user_id: False)
+    event.listen(primary, 'checkout', lambda *_args: primary_checkouts.append(1))
+
+    reads = dependencies.get_read_db('a')
+    db = next(reads)
+    assert dependencies.get_read_user('a', db).id == 'a'
+    assert db.get_bind() is replica
+    assert primary_checkouts == []
+
+    # An account the replica has not received yet is looked up on the primary.
+    assert dependencies.get_read_user('b', db).id == 'b'
+    assert len(primary_checkouts) == 1
+    reads.close()
+
@@ -0,0 +1,96 @@
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.models import StudySession
+from app.workers.tasks import maintenance_tasks
+
+MONDAY = datetime(2026, 3, 2, tzinfo=UTC)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine('sqlite://')
+    StudySession.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+def _session(session_id: str, scheduled_at: datetime, status: str = 'pending') -> dict:
+    return {
+        'id': session_id,
+        'user_id': 'u1',
+        'title': session_id,
+        'topic': 't',
+        'duration_minutes': 45,
+        'status': status,
+        'scheduled_at': scheduled_at,
+    }
+
+
+def _end(start: datetime, minutes: int) -> datetime:
+    return start + timedelta(minutes=minutes)
+
+
+class _Batch:
+    # Stands in for the session: capacity rows first, then busy rows, as _plan_batch asks.
+    def __init__(self, *results) -> None:
+        self.results = list(results)
+
+    def execute(self, _query):
+        return self.results.pop(0)
+
+
+def test_plan_batch_packs_each_user_into_free_slots() -> None:
+    now = MONDAY + timedelta(hours=8)
+    busy_start = MONDAY + timedelta(hours=9)
+    rows = [
+        SimpleNamespace(id='u1-missed-1', user_id='u1', duration_minutes=45),
+        SimpleNamespace(id='u1-missed-2', user_id='u1', duration_minutes=45),
+        SimpleNamespace(id='u2-missed', user_id='u2', duration_minutes=30),
+    ]
+    db = _Batch([('u1', 1), ('u2', 3)], [('u2', busy_start, 120)])
+
+    new_slots = dict(maintenance_tasks._plan_batch(db, rows, now, horizon_days=7))
+
+    assert set(new_slots) == {'u1-missed-1', 'u1-missed-2', 'u2-missed'}
+    assert all(slot >= now for slot in new_slots.values())
+    # One hour a day for u1: the two 45-minute sessions land on different days.
+    assert new_slots['u1-missed-1'] < new_slots['u1-missed-2']
+    assert new_slots['u1-missed-1'].date() != new_slots['u1-missed-2'].date()
+    # u2's new slot stays clear of the session already on its calendar.
+    u2_start = new_slots['u2-missed']
+    assert _end(u2_start, 30) <= busy_start or u2_start >= _end(busy_start, 120)
+
+
+def test_only_recent_misses_are_rescheduled(session_factory, monkeypatch) -> None:
+    now = datetime.now(UTC)
+    monkeypatch.setattr(maintenance_tasks, 'SessionLocal', session_factory)
+    monkeypatch.setattr(settings, 'reschedule_max_age_days', 3)
+    with session_factory() as db:
+        db.execute(
+            insert(StudySession),
+            [
+                _session('recent', now - timedelta(days=1)),
+                _session('stale', now - timedelta(days=10)),
+                _session('done', now - timedelta(days=1), status='done'),
+                _session('upcoming', now + timedelta(days=1)),
+            ],
+        )
+        db.commit()
+
+    planned: list[str] = []
+
+    def plan(_db, rows, _now, _horizon_days):
+        planned.extend(row.id for row in rows)
+        return []
+
+    monkeypatch.setattr(maintenance_tasks, '_plan_batch', plan)
+
+    result = maintenance_tasks._reschedule_missed_sessions(batch_size=1)
+
+    assert planned == ['recent']
+    assert result['scanned'] == 1
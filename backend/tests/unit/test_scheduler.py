@@ -0,0 +1,74 @@
+from datetime import UTC, datetime, timedelta
+
+from app.services.scheduler import schedule_sessions
+
+MONDAY = datetime(2026, 3, 2, tzinfo=UTC)
+
+
+def _overlaps(start: datetime, minutes: int, other: datetime, other_minutes: int) -> bool:
+    end = start + timedelta(minutes=minutes)
+    return start < other + timedelta(minutes=other_minutes) and other < end
+
+
+def test_sessions_keep_plan_order_and_spread_over_week() -> None:
+    schedule = schedule_sessions([45] * 7, start=MONDAY, daily_capacity_minutes=120)
+
+    assert schedule == sorted(schedule)
+    week = {(MONDAY + timedelta(days=day)).date() for day in range(7)}
+    assert {item.date() for item in schedule} == week
+    assert all(9 <= item.hour < 21 for item in schedule)
+
+
+def _minutes_per_day(schedule: list[datetime], minutes: int) -> dict:
+    per_day: dict = {}
+    for item in schedule:
+        per_day[item.date()] = per_day.get(item.date(), 0) + minutes
+    return per_day
+
+
+def test_daily_capacity_is_respected() -> None:
+    schedule = schedule_sessions([60] * 7, start=MONDAY, daily_capacity_minutes=60)
+
+    assert max(_minutes_per_day(schedule, 60).values()) <= 60
+
+
+def test_overflow_is_spread_over_the_least_loaded_days() -> None:
+    schedule = schedule_sessions([60] * 10, start=MONDAY, daily_capacity_minutes=60)
+
+    # 7 days x 60 min < 600 min: three days take one extra session each.
+    assert sorted(_minutes_per_day(schedule, 60).values()) == [60] * 4 + [120] * 3
+    assert len(set(schedule)) == 10
+
+
+def test_overflow_past_a_full_window_gets_distinct_slots() -> None:
+    schedule = schedule_sessions(
+        [60] * 5,
+        start=MONDAY,
+        days=1,
+        daily_capacity_minutes=60,
+        day_start_hour=9,
+        day_end_hour=11,
+        break_minutes=0,
+    )
+
+    assert len(schedule) == 5
+    for position, item in enumerate(schedule):
+        for other in schedule[position + 1 :]:
+            assert not _overlaps(item, 60, other, 60)
+    assert all(9 <= item.hour < 11 for item in schedule)
+
+
+def test_existing_sessions_are_not_overlapped() -> None:
+    busy = [(MONDAY + timedelta(hours=9), 120), (MONDAY + timedelta(days=1, hours=9), 600)]
+    schedule = schedule_sessions([45, 45, 45], start=MONDAY, daily_capacity_minutes=240, busy=busy)
+
+    for item in schedule:
+        for busy_start, busy_minutes in busy:
+            assert not _overlaps(item, 45, busy_start, busy_minutes)
+
+
+def test_nothing_is_scheduled_before_start() -> None:
+    start = MONDAY + timedelta(days=2, hours=15, minutes=7)
+    schedule = schedule_sessions([30] * 5, start=start, days=5)
+
+    assert min(schedule) >= start
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[2]
+
+# Loaded on first use (enqueue, model call, login/token check), never at API start.
+DEFERRED = ('celery', 'kombu', 'httpx', 'jose', 'passlib', 'app.workers', 'app.services.ai_service')
+
+
+def _imported_modules(statement: str) -> list[str]:
+    out = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=BACKEND,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return [
+        line.rsplit('|', 1)[-1].strip()
+        for line in out.stderr.splitlines()
+        if line.startswith('import time:')
+    ]
+
+
+def test_api_start_does_not_import_worker_or_client_libraries() -> None:
+    modules = _imported_modules('import app.main')
+
+    assert 'app.main' in modules
+    loaded = sorted({name for name in modules if name.startswith(DEFERRED)})
+    assert loaded == []
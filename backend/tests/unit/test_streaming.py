@@ -0,0 +1,68 @@
+import tracemalloc
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.models import StudySession
+from app.schemas.plans import StudySessionResponse
+from app.services.streaming import iter_ndjson, record_columns
+
+SESSION_COUNT = 100_000
+
+
+def _peak_bytes(consume) -> int:
+    tracemalloc.start()
+    try:
+        consume()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_streamed_sessions_use_bounded_memory(tmp_path) -> None:
+    # study_sessions only uses portable column types, so SQLite is enough to
+    # compare peak memory of the streamed and materialized paths.
+    engine = create_engine(f'sqlite:///{tmp_path / "sessions.db"}')
+    StudySession.__table__.create(engine)
+    start = datetime(2026, 1, 1, tzinfo=UTC)
+    with Session(engine) as db:
+        db.execute(
+            insert(StudySession),
+            [
+                {
+                    'id': f'session-{index:06d}',
+                    'user_id': 'user-1',
+                    'title': f'Session {index}',
+                    'topic': 'Math',
+                    'duration_minutes': 45,
+                    'status': 'pending',
+                    'scheduled_at': start + timedelta(minutes=index),
+                    'created_at': start,
+                }
+                for index in range(SESSION_COUNT)
+            ],
+        )
+        db.commit()
+
+    query = select(*record_columns(StudySession, StudySessionResponse)).where(
+        StudySession.user_id == 'user-1'
+    )
+    lines = 0
+
+    def streamed() -> None:
+        nonlocal lines
+        with Session(engine) as db:
+            for chunk in iter_ndjson(db, query, StudySessionResponse):
+                lines += chunk.count(b'\n')
+
+    def materialized() -> None:
+        with Session(engine) as db:
+            db.scalars(select(StudySession).where(StudySession.user_id == 'user-1')).all()
+
+    streamed_peak = _peak_bytes(streamed)
+    materialized_peak = _peak_bytes(materialized)
+
+    assert lines == SESSION_COUNT
+    assert streamed_peak < 8 * 1024 * 1024
+    assert streamed_peak * 10 < materialized_peak
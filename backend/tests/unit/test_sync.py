@@ -0,0 +1,130 @@
+from datetime import UTC, datetime
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.db.models import StudyPlan, StudySession, SyncTombstone, User
+from app.services.sync import changes_since
+
+NOW = datetime(2026, 3, 2, 9, tzinfo=UTC)
+
+
+def _db(change_seq: int, sync_floor: int = 0) -> Session:
+    # The sequence triggers are PostgreSQL-only, so rows carry explicit numbers here.
+    engine = create_engine('sqlite://')
+    for model in (User, StudyPlan, StudySession, SyncTombstone):
+        model.__table__.create(engine)
+    db = Session(engine)
+    db.execute(
+        insert(User),
+        [
+            {
+                'id': 'u1',
+                'email': 'a@example.com',
+                'password_hash': 'x',
+                'change_seq': change_seq,
+                'sync_floor': sync_floor,
+            }
+        ],
+    )
+    db.execute(
+        insert(StudyPlan),
+        [
+            _plan('p1', 1),
+            _plan('p2', 4),
+            # Written by a transaction that has not committed its counter yet.
+            _plan('p3', change_seq + 1),
+        ],
+    )
+    db.execute(insert(StudySession), [_session('s1', 2), _session('s2', 5)])
+    db.execute(
+        insert(SyncTombstone),
+        [
+            {
+                'user_id': 'u1',
+                'change_seq': 3,
+                'entity': 'session',
+                'entity_id': 's0',
+                'deleted_at': NOW,
+            }
+        ],
+    )
+    return db
+
+
+def _plan(plan_id: str, seq: int) -> dict:
+    return {
+        'id': plan_id,
+        'user_id': 'u1',
+        'title': plan_id,
+        'topic': 'Math',
+        'duration_minutes': 60,
+        'status': 'pending',
+        'created_at': NOW,
+        'updated_at': NOW,
+        'change_seq': seq,
+    }
+
+
+def _session(session_id: str, seq: int) -> dict:
+    return {
+        'id': session_id,
+        'plan_id': 'p1',
+        'user_id': 'u1',
+        'title': session_id,
+        'topic': 'Math',
+        'duration_minutes': 30,
+        'status': 'pending',
+        'scheduled_at': NOW,
+        'created_at': NOW,
+        'updated_at': NOW,
+        'change_seq': seq,
+    }
+
+
+def test_first_sync_pages_through_everything_up_to_the_committed_counter() -> None:
+    db = _db(change_seq=5)
+
+    first = changes_since(db, 'u1', 0, limit=2)
+    assert (first.cursor, first.has_more) == (2, True)
+    assert [row[0] for row in first.plans.rows] == ['p1']
+    assert [row[0] for row in first.sessions.rows] == ['s1']
+    assert first.sessions.rows[0][1] == 'p1'
+
+    second = changes_since(db, 'u1', first.cursor, limit=2)
+    # Tombstone at 3 and p2 at 4 fill the page; s2 comes next.
+    assert (second.cursor, second.has_more) == (4, True)
+    assert second.deleted.sessions == ['s0']
+    assert [row[0] for row in second.plans.rows] == ['p2']
+
+    last = changes_since(db, 'u1', second.cursor, limit=2)
+    assert (last.cursor, last.has_more) == (5, False)
+    assert [row[0] for row in last.sessions.rows] == ['s2']
+    # p3 is above the counter that was read first, so it waits for the next poll.
+    assert last.plans.rows == []
+
+
+def test_first_sync_skips_tombstones_and_up_to_date_cursor_is_empty() -> None:
+    db = _db(change_seq=5)
+
+    snapshot = changes_since(db, 'u1', 0, limit=100)
+    assert snapshot.cursor == 5
+    assert snapshot.deleted.sessions == []
+    assert snapshot.plans.fields[:2] == ['id', 'title']
+
+    idle = changes_since(db, 'u1', 5, limit=100)
+    assert (idle.cursor, idle.has_more, idle.reset) == (5, False, False)
+    assert idle.plans.rows == idle.sessions.rows == []
+
+
+def test_cursor_ahead_of_a_lagging_replica_is_kept_without_reset() -> None:
+    lagging = changes_since(_db(change_seq=5), 'u1', 9, limit=100)
+    assert (lagging.reset, lagging.cursor, lagging.has_more) == (False, 9, False)
+    assert lagging.plans.rows == lagging.sessions.rows == lagging.deleted.sessions == []
+
+
+def test_pruned_cursor_asks_client_to_reset() -> None:
+    pruned = _db(change_seq=5, sync_floor=3)
+    response = changes_since(pruned, 'u1', 2, limit=100)
+    assert (response.reset, response.cursor) == (True, 0)
+    assert not changes_since(pruned, 'u1', 3, limit=100).reset
@@ -0,0 +1,62 @@
+import json
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.api.v1 import ai
+from app.core.config import settings
+from app.db.models import AiJob, OnboardingPreference, OutboxEvent, StudyPlan, StudySession
+from app.schemas.ai import GeneratePlanRequest
+from app.services.ai_plan_formatter import normalize_ai_plan
+from app.services.template_planner import build_template_plan, classify_goal, session_minutes_for
+from app.services.weekly_plan import estimate_duration_minutes
+
+
+def test_classify_goal() -> None:
+    assert classify_goal('Pass the biology final exam') == 'exam'
+    assert classify_goal('Build a portfolio project') == 'project'
+    assert classify_goal('Improve my Spanish vocabulary') == 'language'
+    assert classify_goal('Understand calculus') == 'mastery'
+
+
+def test_session_minutes_follow_daily_hours() -> None:
+    assert session_minutes_for(None) == 30
+    assert session_minutes_for(2) == 60
+    assert session_minutes_for(8) == 90
+
+
+def test_template_plan_survives_normalization() -> None:
+    plan = build_template_plan('Pass the exam', 'Math', daily_hours=2, focus_topics=['Algebra'])
+    normalized = normalize_ai_plan(json.dumps(plan), goal='Pass the exam', topic='Math')
+
+    assert normalized['title'] == 'Math Study Plan'
+    assert 6 <= len(normalized['steps']) <= 10
+    assert any('Algebra' in step['title'] for step in normalized['steps'])
+    first = normalized['steps'][0]
+    assert estimate_duration_minutes(first['title'], first['detail']) == 60
+
+
+def test_template_plan_is_deterministic() -> None:
+    first = build_template_plan('Learn Python', 'Python')
+    assert first == build_template_plan('Learn Python', 'Python')
+
+
+def test_template_mode_persists_the_plan_in_the_request(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'ai_plan_mode', 'template')
+    monkeypatch.setattr(ai, 'invalidate_dashboard_summary', lambda _user_id: None)
+    engine = create_engine('sqlite://')
+    for model in (AiJob, OnboardingPreference, OutboxEvent, StudyPlan, StudySession):
+        model.__table__.create(engine)
+
+    payload = GeneratePlanRequest(goal='Pass the exam', topic='Math')
+
+    with Session(engine) as db:
+        response = ai._create_generation_job(db, 'u1', payload)
+
+        assert response.status == 'completed'
+        assert response.result_structured.title == 'Math Study Plan'
+        assert db.scalar(select(AiJob.status).where(AiJob.id == response.job_id)) == 'completed'
+        assert db.scalar(select(func.count()).select_from(StudyPlan)) == 1
+        sessions = db.scalar(select(func.count()).select_from(StudySession))
+        assert sessions == len(response.result_structured.steps)
+        assert db.scalar(select(func.count()).select_from(OutboxEvent)) == 0  # nothing to dispatch
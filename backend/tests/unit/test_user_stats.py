@@ -0,0 +1,124 @@
+from datetime import date, timedelta
+
+from app.db.models import UserStats
+from app.services import user_stats
+from app.services.user_stats import (
+    _add_done_day,
+    _remove_done_day,
+    apply_session_transition,
+    visible_streak,
+)
+
+TODAY = date(2026, 3, 5)
+
+
+def _stats(
+    current: int = 0, longest: int = 0, last: date | None = None, sessions: int = 0
+) -> UserStats:
+    return UserStats(
+        user_id='user-1',
+        current_streak=current,
+        longest_streak=longest,
+        last_done_date=last,
+        last_done_day_sessions=sessions,
+    )
+
+
+def test_consecutive_days_extend_the_streak() -> None:
+    stats = _stats()
+    for offset in (2, 1, 0):
+        _add_done_day(stats, TODAY - timedelta(days=offset))
+    _add_done_day(stats, TODAY)
+
+    assert (stats.current_streak, stats.longest_streak) == (3, 3)
+    assert stats.last_done_day_sessions == 2
+    assert visible_streak(stats, TODAY) == 3
+
+
+def test_gap_restarts_the_streak_but_keeps_longest() -> None:
+    stats = _stats(current=4, longest=4, last=TODAY - timedelta(days=3), sessions=1)
+    _add_done_day(stats, TODAY)
+
+    assert (stats.current_streak, stats.longest_streak) == (1, 4)
+
+
+def test_only_a_second_session_on_the_last_day_is_removed_in_place() -> None:
+    stats = _stats(current=3, longest=3, last=TODAY, sessions=2)
+    assert _remove_done_day(stats, TODAY) is True
+    assert (stats.current_streak, stats.last_done_day_sessions) == (3, 1)
+
+    # The day itself goes away: the run, longest streak and the previous day's
+    # session count are only known from history.
+    assert _remove_done_day(stats, TODAY) is False
+    assert _remove_done_day(stats, TODAY - timedelta(days=1)) is False
+    assert (stats.current_streak, stats.last_done_date, stats.last_done_day_sessions) == (
+        3,
+        TODAY,
+        1,
+    )
+
+
+class _Db:
+    def __init__(self, stats: UserStats | None) -> None:
+        self.stats = stats
+        self.calls: list[str] = []
+
+    def scalar(self, _query):
+        return self.stats
+
+    def flush(self) -> None:
+        self.calls.append('flush')
+
+    def refresh(self, _stats) -> None:
+        self.calls.append('refresh')
+
+
+def _transition(monkeypatch, stats: UserStats | None, previous: date | None, new: date | None):
+    db = _Db(stats)
+    monkeypatch.setattr(
+        user_stats, 'recompute_user_stats', lambda _db, ids: db.calls.append(f'recompute {ids}')
+    )
+    apply_session_transition(
+        db,
+        'user-1',
+        topic='Math',
+        duration_minutes=30,
+        previous_done_day=previous,
+        new_done_day=new,
+    )
+    return db.calls
+
+
+def test_uncompleting_the_last_done_day_recomputes(monkeypatch) -> None:
+    stats = _stats(current=5, longest=5, last=TODAY, sessions=1)
+
+    calls = _transition(monkeypatch, stats, previous=TODAY, new=None)
+
+    # The session change is flushed first so the recompute sees it.
+    assert calls == ['flush', "recompute ['user-1']", 'refresh']
+    assert (stats.current_streak, stats.longest_streak, stats.last_done_date) == (5, 5, TODAY)
+
+
+def test_back_dated_completion_recomputes(monkeypatch) -> None:
+    stats = _stats(current=2, longest=2, last=TODAY, sessions=1)
+
+    calls = _transition(monkeypatch, stats, previous=None, new=TODAY - timedelta(days=2))
+
+    assert calls == ['flush', "recompute ['user-1']", 'refresh']
+
+
+def test_completion_today_is_applied_in_place(monkeypatch) -> None:
+    stats = _stats(current=2, longest=2, last=TODAY - timedelta(days=1), sessions=1)
+    stats.focus_minutes_total = 60
+    stats.topic_minutes = {'Math': 60}
+
+    assert _transition(monkeypatch, stats, previous=None, new=TODAY) == []
+    assert (stats.current_streak, stats.longest_streak) == (3, 3)
+    assert (stats.focus_minutes_total, stats.topic_minutes) == (90, {'Math': 90})
+
+
+def test_first_transition_seeds_from_history(monkeypatch) -> None:
+    assert _transition(monkeypatch, None, previous=None, new=TODAY) == [
+        'flush',
+        "recompute ['user-1']",
+    ]
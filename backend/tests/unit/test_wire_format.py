@@ -0,0 +1,92 @@
+import gzip
+
+import msgpack
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import choose_encoding
+from app.core.middleware import CompressionMiddleware
+from app.core.wire_format import negotiated_response
+from app.schemas.plans import StudyPlanResponse
+
+PLANS = [
+    StudyPlanResponse(
+        id=f'plan-{index}',
+        title='Linear algebra',
+        topic='Math',
+        duration_minutes=60,
+        status='pending',
+    )
+    for index in range(50)
+]
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=512, encodings=['gzip'])
+
+    @app.get('/plans')
+    def plans(request: Request) -> Response:
+        return negotiated_response(request, PLANS)
+
+    @app.get('/small')
+    def small(request: Request) -> Response:
+        return negotiated_response(request, PLANS[:1])
+
+    @app.get('/stream')
+    def stream() -> StreamingResponse:
+        lines = (plan.model_dump_json().encode() + b'\n' for plan in PLANS)
+        return StreamingResponse(lines, media_type='application/x-ndjson')
+
+    return TestClient(app)
+
+
+def test_choose_encoding_uses_client_quality_then_server_order() -> None:
+    preferred = ['gzip']
+    assert choose_encoding('gzip, deflate', preferred) == 'gzip'
+    assert choose_encoding('gzip;q=0, deflate', preferred) is None
+    assert choose_encoding('*', preferred) == 'gzip'
+    assert choose_encoding('', preferred) is None
+    # Unknown names in the server list are ignored.
+    assert choose_encoding('gzip', ['snappy', 'gzip']) == 'gzip'
+
+
+def test_large_bodies_are_compressed_and_small_ones_are_not() -> None:
+    client = _client()
+
+    response = client.get('/plans', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['vary']
+    assert response.json()[0]['id'] == 'plan-0'
+    assert int(response.headers['content-length']) < len(response.content) / 4
+
+    small = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in small.headers
+    assert small.json()[0]['id'] == 'plan-0'
+
+    identity = client.get('/plans', headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in identity.headers
+
+
+def test_streamed_ndjson_is_compressed_incrementally() -> None:
+    with _client().stream('GET', '/stream', headers={'Accept-Encoding': 'gzip'}) as response:
+        assert response.headers['content-encoding'] == 'gzip'
+        assert 'content-length' not in response.headers
+        raw = b''.join(response.iter_raw())
+    lines = gzip.decompress(raw).splitlines()
+    assert len(lines) == len(PLANS)
+
+
+def test_msgpack_keeps_the_json_shape() -> None:
+    client = _client()
+    as_json = client.get('/plans').json()
+    response = client.get(
+        '/plans', headers={'Accept': 'application/msgpack', 'Accept-Encoding': 'identity'}
+    )
+
+    assert response.headers['content-type'] == 'application/msgpack'
+    assert 'Accept' in response.headers['vary']
+    assert msgpack.unpackb(response.content) == as_json
+    as_json_bytes = client.get('/plans', headers={'Accept-Encoding': 'identity'}).content
+    assert len(response.content) < len(as_json_bytes)